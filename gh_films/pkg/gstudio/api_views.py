@@ -0,0 +1,384 @@
+from typing import List, Dict, Tuple, Iterator, Any, Type
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, QuerySet
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.views.generic.base import View
+
+from gh_films.pkg.gstudio.filters import FilterError, get_filters, \
+    filter_films
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.views import DatasetCacheMixin, SnapshotMixin, \
+    AsyncViewMixin, dataset_condition
+
+
+__all__ = ["FilmsListView", "FilmsDetailView", "FilmsExportView",
+           "PeopleListView", "PeopleDetailView", "PeopleExportView",
+           "AsyncFilmsListView", "AsyncFilmsDetailView",
+           "AsyncPeopleListView", "AsyncPeopleDetailView", ]
+
+
+# SQLite doesn't allow more than 999 variables in a single query
+_QUERY_BATCH_SIZE = 500
+
+
+class ApiError(Exception):
+    """
+    Invalid parameters of API request
+    """
+
+
+def _get_public_fields(model: Type[Model]) -> List[str]:
+    """
+    Returns names of fields which are exposed via API
+
+    :param model:
+
+    :return:
+    """
+    return [f.name for f in model._meta.concrete_fields
+            if f.name != "checksum"]
+
+
+class ApiMixin(object):
+    """
+    Common logic of JSON API views: sparse fieldsets (`?fields=a,b`) and
+    embedding of related entries (`?embed=people`)
+    """
+    model = None
+
+    # {"embed": (related_model, through_model, own_field, related_field)}
+    relations = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            # invalid requests are rejected before conditional processing,
+            # thus they get neither validators of the dataset nor 304
+            self.validate_params()
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as err:
+            return JsonResponse({"error": str(err)}, status=400)
+
+    def validate_params(self) -> None:
+        """
+        Checks parameters of the request
+
+        :raise ApiError: if parameters aren't valid
+        """
+        self.get_fields()
+        self.get_embed()
+
+    def get_fields(self) -> List[str]:
+        """
+        Returns requested fields of the model (primary key is always included)
+
+        :return:
+
+        :raise ApiError: if unknown fields are requested
+        """
+        available = _get_public_fields(self.model)
+        requested = self.request.GET.get("fields")
+        if not requested:
+            return available
+
+        fields = [f for f in requested.split(",") if f]
+        unknown = set(fields).difference(available)
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        pk_name = self.model._meta.pk.name
+        return [pk_name] + [f for f in fields if f != pk_name]
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        Restricts queryset of the model by filtering parameters of the
+        request (no filters by default)
+
+        :param queryset:
+
+        :return:
+
+        :raise ApiError: if parameters aren't valid
+        """
+        return queryset
+
+    def get_embed(self) -> List[str]:
+        """
+        Returns names of requested relations
+
+        :return:
+
+        :raise ApiError: if unknown relations are requested
+        """
+        embed = [e for e in self.request.GET.get("embed", "").split(",") if e]
+        unknown = set(embed).difference(self.relations)
+        if unknown:
+            raise ApiError(f"Unknown relations: {', '.join(sorted(unknown))}")
+
+        return embed
+
+    def fetch(self, queryset, fields: List[str],
+              embed: List[str]) -> List[Dict[str, Any]]:
+        """
+        Evaluates queryset of the model into serializable rows and embeds
+        related entries into them (two extra queries per relation and batch
+        of `_QUERY_BATCH_SIZE` entries)
+
+        :param queryset: queryset of the model
+        :param fields: names of fields to include
+        :param embed: names of relations to include
+
+        :return:
+        """
+        rows = list(queryset.values(*fields))
+        if not rows or not embed:
+            return rows
+
+        pk_name = self.model._meta.pk.name
+        pks = [row[pk_name] for row in rows]
+
+        for name in embed:
+            related_model, through, own_field, related_field = \
+                self.relations[name]
+
+            links = {}
+            for idx in range(0, len(pks), _QUERY_BATCH_SIZE):
+                batch = pks[idx:idx + _QUERY_BATCH_SIZE]
+                for own_id, related_id in through.objects.filter(
+                        **{f"{own_field}__in": batch}).values_list(
+                        own_field, related_field).order_by(related_field):
+                    links.setdefault(own_id, []).append(related_id)
+
+            related_ids = list({i for ids in links.values() for i in ids})
+            related = {}
+            for idx in range(0, len(related_ids), _QUERY_BATCH_SIZE):
+                batch = related_ids[idx:idx + _QUERY_BATCH_SIZE]
+                for item in related_model.objects.filter(
+                        pk__in=batch).values(
+                        "pk", *_get_public_fields(related_model)):
+                    related[item.pop("pk")] = item
+
+            for row in rows:
+                row[name] = [related[i] for i in links.get(row[pk_name], ())
+                             if i in related]
+
+        return rows
+
+
+class DatasetConditionMixin(object):
+    """
+    Processes conditional requests by the version of the dataset (see
+    `gh_films.pkg.gstudio.views.dataset_condition`)
+    """
+    @method_decorator(dataset_condition)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+
+class ListView(ApiMixin, DatasetConditionMixin, DatasetCacheMixin, View):
+    """
+    Returns a page of entries. Pages are selected by primary key of the last
+    entry of the previous page (keyset pagination), thus the cost of a page
+    doesn't depend on its position:
+    `?limit=100&after=<uuid>` => `{"results": [...], "next": "<url>"}`
+    """
+    def get_page_params(self) -> Tuple[int, Any]:
+        """
+        Returns the size of the page and the key of the last seen entry
+
+        :return: (limit, after)
+
+        :raise ApiError: if parameters aren't valid
+        """
+        try:
+            limit = int(self.request.GET.get("limit",
+                                             settings.GSTUDIO_API_PAGE_SIZE))
+            after = self.request.GET.get("after")
+            if after:
+                after = self.model._meta.pk.to_python(after)
+        except (ValueError, ValidationError):
+            raise ApiError("Invalid pagination parameters")
+
+        if not 0 < limit <= settings.GSTUDIO_API_MAX_PAGE_SIZE:
+            raise ApiError(f"The limit should be in range "
+                           f"1..{settings.GSTUDIO_API_MAX_PAGE_SIZE}")
+
+        return limit, after
+
+    def validate_params(self) -> None:
+        super().validate_params()
+        self.get_page_params()
+
+    def get(self, request, *args, **kwargs):
+        fields, embed = self.get_fields(), self.get_embed()
+        limit, after = self.get_page_params()
+
+        queryset = self.filter_queryset(self.model.objects.order_by("pk"))
+        if after:
+            queryset = queryset.filter(pk__gt=after)
+
+        # one extra row shows whether the next page exists
+        rows = self.fetch(queryset[:limit + 1], fields, embed)
+
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            params = request.GET.copy()
+            params["after"] = str(rows[-1][self.model._meta.pk.name])
+            next_url = f"{request.path}?{urlencode(params, doseq=True)}"
+
+        return JsonResponse({"results": rows, "next": next_url})
+
+
+class DetailView(ApiMixin, DatasetConditionMixin, DatasetCacheMixin, View):
+    """
+    Returns a single entry by its primary key
+    """
+    def get(self, request, pk, *args, **kwargs):
+        rows = self.fetch(self.model.objects.filter(pk=pk),
+                          self.get_fields(), self.get_embed())
+        if not rows:
+            return JsonResponse({"error": "Not found"}, status=404)
+
+        return JsonResponse(rows[0])
+
+
+class ExportView(ApiMixin, DatasetConditionMixin, SnapshotMixin, View):
+    """
+    Streams all entries as a JSON array. Entries are loaded by chunks (see
+    `GSTUDIO_API_EXPORT_CHUNK_SIZE` setting), thus memory usage doesn't
+    depend on the number of entries. The export without parameters is a part
+    of the static snapshot
+    """
+    snapshot_content_type = "application/json"
+
+    def iter_chunks(self, queryset: QuerySet, fields: List[str],
+                    embed: List[str]) -> Iterator[List[Dict]]:
+        """
+        Iterates over all entries by chunks using keyset pagination
+
+        :param queryset: queryset of entries ordered by primary key
+        :param fields: names of fields to include
+        :param embed: names of relations to include
+
+        :return:
+        """
+        pk_name = self.model._meta.pk.name
+        chunk_size = settings.GSTUDIO_API_EXPORT_CHUNK_SIZE
+
+        rows = self.fetch(queryset[:chunk_size], fields, embed)
+        while rows:
+            yield rows
+            if len(rows) < chunk_size:
+                break
+
+            rows = self.fetch(
+                queryset.filter(pk__gt=rows[-1][pk_name])[:chunk_size],
+                fields, embed)
+
+    def iter_json(self, queryset: QuerySet, fields: List[str],
+                  embed: List[str]) -> Iterator[str]:
+        """
+        Encodes entries into JSON array piece by piece
+
+        :param queryset: queryset of entries ordered by primary key
+        :param fields: names of fields to include
+        :param embed: names of relations to include
+
+        :return:
+        """
+        encoder = DjangoJSONEncoder()
+        separator = ""
+
+        yield "["
+        for rows in self.iter_chunks(queryset, fields, embed):
+            yield separator + ",".join(encoder.encode(row) for row in rows)
+            separator = ","
+        yield "]"
+
+    def get(self, request, *args, **kwargs):
+        # parameters are validated before the response is started
+        fields, embed = self.get_fields(), self.get_embed()
+        queryset = self.filter_queryset(self.model.objects.order_by("pk"))
+        return StreamingHttpResponse(self.iter_json(queryset, fields, embed),
+                                     content_type=self.snapshot_content_type)
+
+    def iter_snapshot(self) -> Iterator[str]:
+        fields, embed = self.get_fields(), self.get_embed()
+        queryset = self.filter_queryset(self.model.objects.order_by("pk"))
+        return self.iter_json(queryset, fields, embed)
+
+
+class FilmsMixin(object):
+    model = Films
+    relations = {
+        "people": (People, Films.people.through, "films_id", "people_id"),
+    }
+
+    def get_filters(self) -> Dict[str, Any]:
+        # see `gh_films.pkg.gstudio.filters` for parameters
+        try:
+            return get_filters(self.request.GET)
+        except FilterError as err:
+            raise ApiError(str(err))
+
+    def validate_params(self) -> None:
+        super().validate_params()
+        self.get_filters()
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        filters = self.get_filters()
+        return filter_films(queryset, filters) if filters else queryset
+
+
+class PeopleMixin(object):
+    model = People
+    relations = {
+        "films": (Films, Films.people.through, "people_id", "films_id"),
+    }
+
+
+class FilmsListView(FilmsMixin, ListView):
+    pass
+
+
+class FilmsDetailView(FilmsMixin, DetailView):
+    pass
+
+
+class FilmsExportView(FilmsMixin, ExportView):
+    pass
+
+
+class PeopleListView(PeopleMixin, ListView):
+    pass
+
+
+class PeopleDetailView(PeopleMixin, DetailView):
+    pass
+
+
+class PeopleExportView(PeopleMixin, ExportView):
+    pass
+
+
+# NOTE: there are no async versions of export views, because Django 3.1
+# can't stream async content
+class AsyncFilmsListView(AsyncViewMixin, FilmsListView):
+    pass
+
+
+class AsyncFilmsDetailView(AsyncViewMixin, FilmsDetailView):
+    pass
+
+
+class AsyncPeopleListView(AsyncViewMixin, PeopleListView):
+    pass
+
+
+class AsyncPeopleDetailView(AsyncViewMixin, PeopleDetailView):
+    pass
@@ -5,4 +5,9 @@ __all__ = ["GStudioConfig", ]
 
 
 class GStudioConfig(AppConfig):
-    name = "gstudio"
+    name = "gh_films.pkg.gstudio"
+    label = "gstudio"
+
+    def ready(self):
+        # registers system checks
+        from gh_films.pkg.gstudio import checks  # noqa: F401
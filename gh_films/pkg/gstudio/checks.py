@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+__all__ = ["check_shared_caches", ]
+
+
+# backends which keep data per process (or don't keep it at all), thus the
+# sync task and web server processes don't see changes of each other
+_UNSHARED_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs=None, **kwargs):
+    """
+    Checks that the caches which keep state of the dataset and the sync (see
+    `GSTUDIO_CACHE` and `GSTUDIO_VALIDATORS_CACHE` settings) are shared
+    between processes
+    """
+    errors = []
+    for name in ("GSTUDIO_CACHE", "GSTUDIO_VALIDATORS_CACHE"):
+        alias = getattr(settings, name)
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in _UNSHARED_BACKENDS:
+            errors.append(Error(
+                f"The cache \"{alias}\" of {name} setting isn't shared "
+                f"between processes ({backend}).",
+                hint="Use a shared backend (e.g. FileBasedCache or Redis) "
+                     "for the cache, otherwise pages aren't invalidated "
+                     "after the sync.",
+                id="gstudio.E001"))
+
+    return errors
@@ -0,0 +1,203 @@
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = ["ENCODINGS", "get_encodings", "get_encoder", "negotiate",
+           "is_compressible", "compress", "compress_sequence",
+           "encode_response", ]
+
+
+# Compression of responses negotiated by "Accept-Encoding" header: gzip and,
+# if their packages are installed, brotli ("brotli") and zstd ("zstandard").
+# Responses which are computed once per dataset version (cached pages and
+# the static snapshot) are compressed by the best levels, the others are
+# compressed on the fly by fast levels (see `GSTUDIO_COMPRESSION_*`
+# settings)
+
+# {"encoding": (fast level, best level), ...}
+ENCODINGS = OrderedDict([
+    ("br", (4, 11)),
+    ("zstd", (3, 19)),
+    ("gzip", (6, 9)),
+])
+
+# prefixes of content types worth compressing
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript")
+
+
+class _BrotliEncoder(object):
+    """
+    Brotli compressor with the interface of zlib's ones
+    """
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _gzip_encoder(level: int) -> Any:
+    # gzip container (wbits=31) without the timestamp, thus compressed
+    # content depends on the data only
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _zstd_encoder(level: int) -> Any:
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+def get_encodings() -> Dict[str, Any]:
+    """
+    Returns encodings which packages are installed in order of preference
+    (see `GSTUDIO_COMPRESSION_ENCODINGS` setting)
+
+    :return: {"encoding": factory of encoders by level, ...}
+    """
+    factories = {"gzip": _gzip_encoder}
+    if brotli is not None:
+        factories["br"] = _BrotliEncoder
+    if zstandard is not None:
+        factories["zstd"] = _zstd_encoder
+
+    return OrderedDict((name, factories[name])
+                       for name in settings.GSTUDIO_COMPRESSION_ENCODINGS
+                       if name in factories)
+
+
+def get_encoder(encoding: str, best: bool = False) -> Any:
+    """
+    Returns a new encoder which has `compress(data)` and `flush()` methods
+
+    :param encoding: one of `get_encodings`
+    :param best: whether to use the best (slow) level instead of the fast one
+
+    :return:
+    """
+    return get_encodings()[encoding](ENCODINGS[encoding][int(best)])
+
+
+def negotiate(accept_encoding: str,
+              available: Iterable[str] = None) -> Optional[str]:
+    """
+    Chooses the encoding of the response by "Accept-Encoding" header of the
+    request. The server's order of preference wins over the client's
+    weights, only encodings with zero weight are excluded
+
+    :param accept_encoding: value of the header
+    :param available: encodings to choose from or None to choose from
+                      `get_encodings`
+
+    :return: the encoding or None to send the response as it is
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    default = weights.get("*", 0.0)
+    if available is None:
+        available = get_encodings()
+    for name in available:
+        if weights.get(name, default) > 0:
+            return name
+
+    return None
+
+
+def is_compressible(response) -> bool:
+    """
+    Returns whether the response is worth compressing
+
+    :param response:
+
+    :return:
+    """
+    if response.has_header("Content-Encoding"):
+        return False
+
+    content_type = response.get("Content-Type", "").lower()
+    if not content_type.startswith(_COMPRESSIBLE_TYPES):
+        return False
+
+    return response.streaming or \
+        len(response.content) >= settings.GSTUDIO_COMPRESSION_MIN_SIZE
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compresses the whole content
+
+    :param data:
+    :param encoding: one of `get_encodings`
+    :param best: whether to use the best (slow) level
+
+    :return:
+    """
+    encoder = get_encoder(encoding, best)
+    return encoder.compress(data) + encoder.flush()
+
+
+def compress_sequence(sequence: Iterable[bytes],
+                      encoding: str) -> Iterator[bytes]:
+    """
+    Compresses streaming content piece by piece (by the fast level)
+
+    :param sequence: pieces of the content
+    :param encoding: one of `get_encodings`
+
+    :return:
+    """
+    encoder = get_encoder(encoding)
+    for item in sequence:
+        data = encoder.compress(item)
+        # encoders buffer small pieces, thus empty ones aren't sent
+        if data:
+            yield data
+    yield encoder.flush()
+
+
+def encode_response(response, encoding: str, content: bytes = None) -> None:
+    """
+    Replaces content of the response by the compressed one and sets headers
+    of the encoding (in place)
+
+    :param response: non-streaming response
+    :param encoding: one of `get_encodings`
+    :param content: the compressed content or None to compress the content
+                    of the response (by the fast level)
+    """
+    if content is None:
+        content = compress(response.content, encoding)
+
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding", ))
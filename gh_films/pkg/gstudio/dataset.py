@@ -0,0 +1,77 @@
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+
+
+__all__ = ["get_cache", "get_version", "get_state", "bump_version", ]
+
+
+# The dataset (films, people and relations between them) is changed by the
+# "update_movies" task only. Its version is used to invalidate everything
+# derived from it (e.g. cached pages)
+
+_VERSION_KEY = "gstudio.dataset.version"
+_MODIFIED_KEY = "gstudio.dataset.modified"
+
+
+def get_cache() -> BaseCache:
+    """
+    Returns the cache which keeps dataset version and data derived from it
+
+    :return:
+    """
+    return caches[settings.GSTUDIO_CACHE]
+
+
+def get_version() -> int:
+    """
+    Returns current version of the dataset
+
+    :return:
+    """
+    cache = get_cache()
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # the initial version is based on the current time, thus versions
+        # aren't reused if the key was evicted from the cache
+        cache.add(_VERSION_KEY, int(time.time()), None)
+        version = cache.get(_VERSION_KEY)
+
+    return version
+
+
+def get_state() -> Tuple[int, datetime]:
+    """
+    Returns current version of the dataset and time of its last change
+    (by a single request to the cache)
+
+    :return: (version, modified)
+    """
+    state = get_cache().get_many([_VERSION_KEY, _MODIFIED_KEY])
+    if _VERSION_KEY not in state:
+        state[_VERSION_KEY] = get_version()
+    if _MODIFIED_KEY not in state:
+        get_cache().add(_MODIFIED_KEY, time.time(), None)
+        state[_MODIFIED_KEY] = get_cache().get(_MODIFIED_KEY)
+
+    modified = datetime.fromtimestamp(state[_MODIFIED_KEY], timezone.utc)
+    return state[_VERSION_KEY], modified
+
+
+def bump_version() -> int:
+    """
+    Changes version of the dataset. It's supposed to be called after the
+    dataset was changed
+
+    :return: new version of the dataset
+    """
+    cache = get_cache()
+    cache.set(_MODIFIED_KEY, time.time(), None)
+
+    try:
+        return cache.incr(_VERSION_KEY)
+    except ValueError:
+        return get_version()
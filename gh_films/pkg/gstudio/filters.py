@@ -0,0 +1,99 @@
+from typing import Dict, Any
+
+from django.db.models import QuerySet
+
+from gh_films.pkg.gstudio.search import get_search, get_terms
+
+
+__all__ = ["FilterError", "FILTER_PARAMS", "SEARCH_PARAM", "get_filters",
+           "filter_films", ]
+
+
+# Server-side filtering of films by query parameters of pages and JSON API:
+# exact director/producer, ranges of release date and score (every lookup is
+# covered by an index) and full-text search over titles and descriptions
+
+def _small_int(value: str) -> int:
+    """
+    Converts the value of the parameter compared with positive small integer
+    fields. Values out of range of the fields are rejected, because they
+    can't be passed into the DB
+
+    :param value:
+
+    :return:
+
+    :raise ValueError: if the value isn't an integer or is out of range
+    """
+    value = int(value)
+    if not 0 <= value <= 32767:
+        raise ValueError(f"{value} is out of range")
+    return value
+
+
+# {"parameter": (field lookup, converter), ...}
+FILTER_PARAMS = {
+    "director": ("director", str),
+    "producer": ("producer", str),
+    "release_date_min": ("release_date__gte", _small_int),
+    "release_date_max": ("release_date__lte", _small_int),
+    "rt_score_min": ("rt_score__gte", _small_int),
+    "rt_score_max": ("rt_score__lte", _small_int),
+}
+
+# parameter of full-text search
+SEARCH_PARAM = "q"
+
+
+class FilterError(ValueError):
+    """
+    Invalid filtering parameters
+    """
+
+
+def get_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns filtering parameters (empty ones are skipped)
+
+    :param params: query parameters (e.g. `request.GET`)
+
+    :return: {"parameter": converted_value, ...}
+
+    :raise FilterError: if parameters aren't valid
+    """
+    filters = {}
+    for name, (_, convert) in FILTER_PARAMS.items():
+        value = params.get(name)
+        if not value:
+            continue
+
+        try:
+            filters[name] = convert(value)
+        except ValueError:
+            raise FilterError(f"Invalid value of \"{name}\"")
+
+    query = params.get(SEARCH_PARAM)
+    if query:
+        filters[SEARCH_PARAM] = query
+
+    return filters
+
+
+def filter_films(queryset: QuerySet, filters: Dict[str, Any]) -> QuerySet:
+    """
+    Restricts queryset of films by filtering parameters
+
+    :param queryset: queryset of films
+    :param filters: see `get_filters`
+
+    :return:
+    """
+    lookups = {FILTER_PARAMS[name][0]: value
+               for name, value in filters.items() if name in FILTER_PARAMS}
+    queryset = queryset.filter(**lookups)
+
+    terms = get_terms(filters.get(SEARCH_PARAM))
+    if terms:
+        queryset = get_search().filter(queryset, terms)
+
+    return queryset
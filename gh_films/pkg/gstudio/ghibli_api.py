@@ -1,8 +1,17 @@
 import logging
-from typing import List, Dict, Union
-from urllib.parse import urljoin, urlparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from typing import List, Dict, Union, Tuple, Optional, Sequence, \
+    Iterable, Iterator
+from urllib.parse import urljoin
 
-from requests import Session, RequestException
+from requests import Session, RequestException, Response
+
+from gh_films.pkg.gstudio.json_stream import iter_json_array
+from gh_films.pkg.gstudio.resolver import UrlResolver
+from gh_films.pkg.gstudio.transport import get_session
 
 
 __all__ = ["GhibliApi"]
@@ -10,48 +19,247 @@ __all__ = ["GhibliApi"]
 
 # Detail documentation of the API is here: http://ghibliapi.herokuapp.com
 
-# todo: add a checksum for each entry as a way to detect updated records
-# note: checksum should include variable number of properties (some subset of
-#       properties)
+
 class GhibliApi(object):
     """
     A simple implementation of GhibliAPI with a couple required methods
     """
     BASE_URL = "https://ghibliapi.herokuapp.com"
-
-    def __init__(self, logger=None):
+    ENDPOINTS = ("people", "films", )
+    VALIDATORS_KEY = "gstudio.validators:{url}"
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # (connect, read) timeouts in seconds
+    TIMEOUT = (5, 30)
+
+    def __init__(self, logger=None, validators=None, max_workers=None,
+                 stream=False, session: Session = None,
+                 timeout: Union[float, Tuple[float, float]] = None,
+                 extra_endpoints: Sequence[str] = ()):
         """
 
         :param logger: a logger instance or None to use default python's logger
+        :param validators: a persistent storage with django's cache interface
+                           (e.g. `django.core.cache.cache`) to keep validators
+                           of responses (ETag, Last-Modified and checksum of
+                           the body) between instances or None to disable
+                           conditional requests
+        :param max_workers: max number of endpoints requested concurrently or
+                            None to request all of them at once. Use 1 to
+                            request endpoints one by one
+        :param stream: whether to parse responses incrementally while they
+                       are being consumed via `iter_people` and `iter_films`
+                       instead of loading them into memory at once
+        :param session: HTTP session (e.g. created by
+                        `gh_films.pkg.gstudio.transport.get_session`) or None
+                        to use the session shared by the current process. The
+                        session isn't closed by the instance
+        :param timeout: timeout (seconds) of connection and of reading from
+                        socket (the single value or a (connect, read) pair)
+                        or None to use default `TIMEOUT`
+        :param extra_endpoints: names of other endpoints (e.g. "species")
+                                requested along with films and people. Their
+                                entries are available via `iter_endpoint`
         """
         self._logger = logger or logging.getLogger("gstudio.fetch.GhibliApi")
-        self._session = Session()
+        self._session = session or get_session()
         self._session.headers.update({"Content-Type": "application/json"})
+        self._timeout = timeout or self.TIMEOUT
+        self._validators = validators
+        self._stream = stream
+        self._endpoints = self.ENDPOINTS + tuple(
+            ep for ep in extra_endpoints if ep not in self.ENDPOINTS)
+        self._max_workers = max_workers or len(self._endpoints)
+        self._data = {}
+        self._resolver = UrlResolver()
+        self._responses = {}
+        self._film_people = {}
+        self._pending_validators = {}
+        self._not_modified = False
+        self._timings = {}
+        self._downloaded = {}
+        self._downloaded_lock = threading.Lock()
         self._films = None
         self._people = None
         self.refresh()
 
     def __del__(self):
-        self._session.close()
+        self._close_responses()
 
     def refresh(self) -> None:
         """
-        Updates cached properties by new data via API
+        Updates cached properties by new data via API.
+
+        If validators storage is given, the conditional requests are used. In
+        case none of endpoints was modified since the last saved validators,
+        both "films" and "people" are left empty and the `not_modified`
+        property is set.
         """
         self._films = None
         self._people = None
+        self._data = {}
+        self._close_responses()
+        self._film_people = {}
+        self._pending_validators = {}
+        self._not_modified = False
+        self._timings = {}
+        self._downloaded = {}
+
+        started = time.perf_counter()
+        conditional = self._validators is not None
+        responses = self._request_all(self._endpoints, conditional)
+
+        if all(not modified for modified, _ in responses.values()):
+            self._timings["fetch"] = time.perf_counter() - started
+            self._logger.info("Upstream data isn't modified")
+            self._not_modified = True
+            return
+
+        # films and people are required to build relations, thus we have to
+        # re-download those of them which weren't sent by the server. Other
+        # endpoints which aren't modified are just skipped
+        skipped = [ep for ep, (_, resp) in responses.items()
+                   if resp is not None and resp.status_code == 304]
+        for ep in skipped:
+            if ep not in self.ENDPOINTS:
+                responses.pop(ep)[1].close()
+        responses.update(self._request_all(
+            [ep for ep in skipped if ep in self.ENDPOINTS]))
+        self._timings["fetch"] = time.perf_counter() - started
+
+        if self._stream:
+            self._responses = {ep: resp for ep, (_, resp) in responses.items()
+                               if resp is not None}
+            return
+
+        started = time.perf_counter()
+        self._data = {ep: self._parse(resp, ep)
+                      for ep, (_, resp) in responses.items()}
+        self._timings["parse"] = time.perf_counter() - started
+
+        self._people = self._data["people"]
+        films = self._data["films"]
+
+        # because the "people" field in films endpoint seems to be broken
+        # we have to fix it manually
+        started = time.perf_counter()
+        if films is not None:
+            if self._people:
+                self._merge(films, self._people, self._resolver)
+            else:
+                self._logger.warning("Can't merge people into films")
+        self._timings["merge"] = time.perf_counter() - started
+
+        self._films = films
+
+    def save_validators(self) -> None:
+        """
+        Stores validators of the latest received responses into persistent
+        storage. It's supposed to be called after received data was
+        successfully processed, otherwise the next conditional request may
+        skip data that wasn't handled yet.
+        """
+        if self._validators is None:
+            return
+
+        for url, validators in self._pending_validators.items():
+            self._validators.set(self.VALIDATORS_KEY.format(url=url),
+                                 validators, None)
+
+        self._pending_validators = {}
 
-        self._get_people()
-        self._get_films()
+    def discard_validators(self, endpoint: str) -> None:
+        """
+        Drops validators of the latest response of given endpoint, thus it's
+        requested unconditionally next time. It's supposed to be called if
+        the endpoint's data wasn't processed
+
+        :param endpoint: name of the endpoint
+        """
+        self._pending_validators.pop(urljoin(self.BASE_URL, endpoint), None)
+
+    def iter_people(self) -> Iterator[Dict]:
+        """
+        Iterates over people. In streaming mode people are parsed one by one
+        while the response is being downloaded and can be iterated only once
+
+        :return: iterator over people
+
+        :raise ValueError, RequestException: if streamed response is broken
+        """
+        if not self._stream:
+            yield from self._people or ()
+            return
+
+        if "people" not in self._responses:
+            return
+
+        self._people = []
+        for person in self._merge_index(self.iter_endpoint("people"),
+                                        self._film_people, self._resolver):
+            self._people.append({"id": person["id"],
+                                 "films": person.get("films") or []})
+            yield person
+
+    def iter_films(self) -> Iterator[Dict]:
+        """
+        Iterates over films. In streaming mode films are parsed one by one
+        while the response is being downloaded and can be iterated only once.
+        Also, the "people" field of each film contains ids of people (instead
+        of people themselves) collected by `iter_people`, thus people are
+        supposed to be iterated first
+
+        :return: iterator over films
+
+        :raise ValueError, RequestException: if streamed response is broken
+        """
+        if not self._stream:
+            yield from self._films or ()
+            return
+
+        if "films" not in self._responses:
+            return
+
+        if "people" in self._responses:
+            self._logger.warning("Can't merge people into films")
+
+        for film in self.iter_endpoint("films"):
+            film["people"] = self._film_people.get(film["id"], [])
+            yield film
+
+    def iter_endpoint(self, endpoint: str) -> Iterator[Dict]:
+        """
+        Iterates over raw entries of given endpoint (in streaming mode they
+        are parsed one by one and can be iterated only once). There are no
+        entries of the endpoint which isn't modified since the stored
+        validators
+
+        :param endpoint: name of the requested endpoint (see
+                         `extra_endpoints`)
+
+        :return: iterator over entries
+
+        :raise ValueError, RequestException: if streamed response is broken
+        """
+        if not self._stream:
+            yield from self._data.get(endpoint) or ()
+            return
+
+        resp = self._responses.pop(endpoint, None)
+        if resp is not None:
+            yield from self._iter_response(resp, endpoint)
 
     @staticmethod
-    def _merge(films: List[Dict], people: List[Dict]) -> None:
+    def _merge(films: List[Dict], people: List[Dict],
+               resolver: UrlResolver = None) -> None:
         """
         Merges "people" into correspond films "in-place"
 
         :param films: sequence of films
         :param people: sequence of people
+        :param resolver: resolver of films' urls or None to use a new one
         """
+        resolve_many = (resolver or UrlResolver()).resolve_many
+
         d_films = {}
         for film in films:
             d_films[film["id"]] = film
@@ -62,77 +270,221 @@ class GhibliApi(object):
             if not p_films:
                 continue
 
-            film_ids = []
+            person["films"] = film_ids = resolve_many(p_films)
+            for film_id in film_ids:
+                film = d_films.get(film_id)
+                if film is not None:
+                    film["people"].append(person)
 
-            for f_url in p_films:
-                film_id = urlparse(f_url).path.rsplit("/", 1)[-1]
-                film_ids.append(film_id)
-                if film_id in d_films:
-                    d_films[film_id]["people"].append(person)
+    @staticmethod
+    def _merge_index(people: Iterable[Dict], index: Dict[str, List[str]],
+                     resolver: UrlResolver = None) -> Iterator[Dict]:
+        """
+        Index-based variant of `_merge`: replaces references to films of each
+        person by ids of films and collects ids of people per film. Thus
+        films may be merged later without keeping the whole sequence of
+        people in memory
 
-            person["films"] = film_ids
+        :param people: iterable of people
+        :param index: {"film_id": ["person_id", ...], ...} to update in-place
+        :param resolver: resolver of films' urls or None to use a new one
 
-    def _get_people(self) -> Union[List[Dict], None]:
+        :return: iterator over given people
         """
-        Retrieves sequence of people
+        resolve_many = (resolver or UrlResolver()).resolve_many
 
-        :return: sequence of people or None in case of any error
+        for person in people:
+            p_films = person.get("films")
+            if p_films:
+                person["films"] = film_ids = resolve_many(p_films)
+                for film_id in film_ids:
+                    index.setdefault(film_id, []).append(person["id"])
+
+            yield person
+
+    def _request(self, endpoint: str,
+                 conditional: bool = False) -> Tuple[bool, Optional[Response]]:
         """
-        if self._people is not None:
-            return self._people
+        Requests data of given endpoint
 
-        try:
-            resp = self._session.get(urljoin(self.BASE_URL, "people"))
+        :param endpoint: name of API's endpoint (e.g. "films")
+        :param conditional: whether to send conditional request based on
+                            the stored validators
 
-        except RequestException as err:
-            self._logger.error(err)
-            return None
+        :return: (modified, response) where "modified" is False if the data
+                 wasn't changed since the stored validators and "response" is
+                 None in case of any error
+        """
+        url = urljoin(self.BASE_URL, endpoint)
+
+        headers = {}
+        stored = None
+        if conditional:
+            stored = self._validators.get(self.VALIDATORS_KEY.format(url=url))
+
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
 
         try:
-            self._people = resp.json()
-        except ValueError as err:
+            resp = self._session.get(url, headers=headers,
+                                     stream=self._stream,
+                                     timeout=self._timeout)
+        except RequestException as err:
             self._logger.error(str(err))
-            return None
+            return True, None
+
+        if not self._stream:
+            self._count_downloaded(endpoint, len(resp.content))
+
+        if resp.status_code == 304:
+            return False, resp
+
+        if self._validators is None or resp.status_code != 200:
+            return True, resp
+
+        # the body isn't downloaded yet in streaming mode, thus its checksum
+        # can't be used
+        checksum = None if self._stream else sha1(resp.content).hexdigest()
+        validators = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "checksum": checksum,
+        }
+        self._pending_validators[url] = validators
+
+        # fallback for the servers that don't support validators
+        modified = not stored or not validators["checksum"] or \
+            stored["checksum"] != validators["checksum"]
+        return modified, resp
+
+    def _request_all(self, endpoints: Sequence[str], conditional: bool = False
+                     ) -> Dict[str, Tuple[bool, Optional[Response]]]:
+        """
+        Requests data of given endpoints concurrently
 
-        return self._people
+        :param endpoints: names of API's endpoints
+        :param conditional: whether to send conditional requests
 
-    def _get_films(self) -> Union[List[Dict], None]:
+        :return: {"endpoint": (modified, response), ...}
         """
-        Retrieves sequence of films
+        if self._max_workers < 2 or len(endpoints) < 2:
+            return {ep: self._request(ep, conditional) for ep in endpoints}
 
-        :return: sequence of films or None in case of any error
+        max_workers = min(self._max_workers, len(endpoints))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {ep: executor.submit(self._request, ep, conditional)
+                       for ep in endpoints}
+            return {ep: future.result() for ep, future in futures.items()}
+
+    def _parse(self, resp: Optional[Response],
+               endpoint: str = None) -> Union[List[Dict], None]:
         """
-        if self._films is not None:
-            return self._films
+        Decodes body of given response. Validators of the response which
+        can't be decoded are discarded, thus it's requested unconditionally
+        next time
 
-        try:
-            resp = self._session.get(urljoin(self.BASE_URL, "films"))
-        except RequestException as err:
-            self._logger.error(str(err))
+        :param resp: response or None
+        :param endpoint: name of the endpoint of the response
+
+        :return: sequence of entries or None in case of any error
+        """
+        if resp is None:
             return None
 
         try:
-            result = resp.json()
+            return resp.json()
         except ValueError as err:
             self._logger.error(str(err))
+            if endpoint is not None:
+                self.discard_validators(endpoint)
             return None
 
-        # because the "people" field in films endpoint seems to be broken
-        # we have to fix it manually
-        people = self.people
-        if people:
-            self._merge(result, self.people)
-        else:
-            self._logger.warning("Can't merge people into films")
+    def _iter_response(self, resp: Response,
+                       endpoint: str = None) -> Iterator[Dict]:
+        """
+        Incrementally decodes body of given streamed response
 
-        self._films = result
+        :param resp: streamed response
+        :param endpoint: name of the endpoint to count downloaded bytes
 
-        return self._films
+        :return: iterator over entries
+
+        :raise ValueError, RequestException: if the response is broken
+        """
+        def _iter_chunks() -> Iterator[bytes]:
+            for chunk in resp.iter_content(self.STREAM_CHUNK_SIZE):
+                self._count_downloaded(endpoint, len(chunk))
+                yield chunk
+
+        try:
+            yield from iter_json_array(_iter_chunks())
+        except (ValueError, RequestException) as err:
+            self._logger.error(str(err))
+            if endpoint is not None:
+                self.discard_validators(endpoint)
+            raise
+        finally:
+            resp.close()
+
+    def _count_downloaded(self, endpoint: str, size: int) -> None:
+        """
+        Counts downloaded bytes (endpoints are requested concurrently)
+
+        :param endpoint: name of the endpoint
+        :param size: number of bytes
+        """
+        with self._downloaded_lock:
+            self._downloaded[endpoint] = \
+                self._downloaded.get(endpoint, 0) + size
+
+    def _close_responses(self) -> None:
+        """
+        Releases connections of streamed responses which weren't consumed
+        """
+        for resp in self._responses.values():
+            resp.close()
+        self._responses = {}
+
+    @property
+    def not_modified(self) -> bool:
+        """
+        Whether upstream data wasn't modified since the latest saved validators
+
+        :return:
+        """
+        return self._not_modified
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """
+        Durations (seconds) of phases of the latest refresh: "fetch" (incl.
+        download of bodies unless they are streamed), "parse" and "merge"
+        (the latter two are absent in streaming mode, where they are a part
+        of iteration)
+
+        :return:
+        """
+        return dict(self._timings)
+
+    @property
+    def downloaded(self) -> Dict[str, int]:
+        """
+        Number of bytes of bodies downloaded by the latest refresh (in
+        streaming mode bodies are counted while they are being iterated)
+
+        :return: {"endpoint": n, ...}
+        """
+        with self._downloaded_lock:
+            return dict(self._downloaded)
 
     @property
     def films(self) -> Union[List[Dict], None]:
         """
-        Retrieves sequence of films
+        Retrieves sequence of films (always None in streaming mode, use
+        `iter_films` instead)
 
         :return: sequence of films or None in case of any error
         """
@@ -141,7 +493,8 @@ class GhibliApi(object):
     @property
     def people(self) -> Union[List[Dict], None]:
         """
-        Retrieves sequence of people
+        Retrieves sequence of people. In streaming mode only ids and films of
+        people consumed by `iter_people` are kept
 
         :return: sequence of people or None in case of any error
         """
@@ -0,0 +1,95 @@
+import codecs
+import re
+from json import JSONDecoder
+from typing import Iterable, Iterator, Any, Union
+
+
+__all__ = ["iter_json_array", ]
+
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER_TAIL = re.compile(r"[0-9eE.+\-]*")
+
+_decoder = JSONDecoder()
+
+# states of the parser
+_START = "start"
+_FIRST = "first"
+_ITEM = "item"
+_DONE = "done"
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]],
+                    encoding: str = "utf-8") -> Iterator[Any]:
+    """
+    Incrementally parses JSON array (e.g. body of the response that's being
+    downloaded) and yields its items one by one. Only the current item and
+    a chunk of raw data are kept in memory
+
+    :param chunks: sequence of raw pieces of the JSON document
+    :param encoding: encoding of chunks given as bytes
+
+    :return: iterator over items of the array
+
+    :raise ValueError: if data isn't a valid JSON array
+    """
+    decode = codecs.getincrementaldecoder(encoding)().decode
+    buf = ""
+    pos = 0
+    state = _START
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decode(chunk)
+
+        buf = buf[pos:] + chunk
+        pos = 0
+
+        while state is not _DONE:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+
+            if state is _START:
+                if buf[pos] != "[":
+                    raise ValueError(f"JSON array is expected, got "
+                                     f"\"{buf[pos]}\"")
+                state = _FIRST
+                pos += 1
+                continue
+
+            if state is _FIRST and buf[pos] == "]":
+                state = _DONE
+                pos += 1
+                break
+
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except ValueError:
+                # the item isn't downloaded completely yet
+                break
+
+            # the item is postponed until its separator is received, because
+            # a scalar at the end of the chunk (e.g. a number) may be
+            # continued by the next one
+            end = _WHITESPACE.match(buf, end).end()
+            if end == len(buf):
+                break
+
+            if buf[end] not in ",]":
+                # e.g. "1." of the "1.5" number
+                if _NUMBER_TAIL.fullmatch(buf, end):
+                    break
+                raise ValueError(f"Unexpected \"{buf[end]}\" in JSON array")
+
+            state = _ITEM if buf[end] == "," else _DONE
+            pos = end + 1
+            yield item
+
+    if buf[pos:].strip() or decode(b"", True).strip():
+        if state is _DONE:
+            raise ValueError("Extra data after the end of JSON array")
+        raise ValueError("Malformed JSON array")
+
+    if state is not _DONE:
+        raise ValueError("Unexpected end of JSON array")
@@ -0,0 +1,169 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils.timezone import now as tz_now
+
+from gh_films.pkg.gstudio.models import Lease
+
+
+__all__ = ["BaseLease", "DatabaseLease", "RedisLease", "get_lease", ]
+
+
+class BaseLease(object):
+    """
+    Named lock shared between processes (and hosts). The lock expires after
+    `ttl` seconds, thus it's released even if its owner has died. The
+    lifetime is supposed to be longer than any run of the guarded code
+    """
+    # delay (seconds) between attempts to acquire the busy lock
+    poll_interval = 0.1
+
+    def __init__(self, name: str, ttl: float):
+        """
+
+        :param name: name of the lock
+        :param ttl: lifetime (seconds) of the acquired lock
+        """
+        self._name = name
+        self._ttl = ttl
+        self._token = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def acquired(self) -> bool:
+        return self._token is not None
+
+    def acquire(self, wait: float = 0) -> bool:
+        """
+        Acquires the lock
+
+        :param wait: max time (seconds) to wait for the busy lock
+
+        :return: whether the lock was acquired
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+
+        while not self._try_acquire(token):
+            if time.monotonic() + self.poll_interval > deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+        self._token = token
+        return True
+
+    def release(self) -> bool:
+        """
+        Releases the lock if it's still owned by this instance
+
+        :return: whether the lock was released (False if it's expired and
+                 probably acquired by somebody else)
+        """
+        if self._token is None:
+            return False
+
+        token, self._token = self._token, None
+        return self._release(token)
+
+    def _try_acquire(self, token: str) -> bool:
+        raise NotImplementedError()
+
+    def _release(self, token: str) -> bool:
+        raise NotImplementedError()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class DatabaseLease(BaseLease):
+    """
+    The lock is a row of the `Lease` table. It doesn't require anything but
+    the DB, thus it's used when Redis isn't configured (e.g. in tests)
+    """
+    def _try_acquire(self, token: str) -> bool:
+        now = tz_now()
+        expires = now + timedelta(seconds=self._ttl)
+
+        # takes over the expired lock
+        if Lease.objects.filter(name=self._name, expires__lte=now).update(
+                token=token, expires=expires):
+            return True
+
+        try:
+            with transaction.atomic():
+                Lease.objects.create(name=self._name, token=token,
+                                     expires=expires)
+        except IntegrityError:
+            # the lock is owned by somebody else
+            return False
+
+        return True
+
+    def _release(self, token: str) -> bool:
+        deleted, _ = Lease.objects.filter(name=self._name,
+                                          token=token).delete()
+        return bool(deleted)
+
+
+class RedisLease(BaseLease):
+    """
+    The lock is a Redis key with limited lifetime
+    """
+    # deletes the key only if it's owned by the caller
+    _RELEASE_SCRIPT = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("del", KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, name: str, ttl: float, url: str):
+        """
+
+        :param name: name of the lock
+        :param ttl: lifetime (seconds) of the acquired lock
+        :param url: url of the Redis server
+        """
+        # optional dependency, it's installed along with celery's redis
+        # transport
+        from redis import Redis
+
+        super().__init__(name, ttl)
+        self._client = Redis.from_url(url)
+        self._release_script = self._client.register_script(
+            self._RELEASE_SCRIPT)
+
+    def _try_acquire(self, token: str) -> bool:
+        return bool(self._client.set(self._name, token, nx=True,
+                                     px=int(self._ttl * 1000)))
+
+    def _release(self, token: str) -> bool:
+        return bool(self._release_script(keys=[self._name], args=[token]))
+
+
+def get_lease(name: str, ttl: float = None) -> BaseLease:
+    """
+    Returns the lock of given name. It's kept in Redis if
+    `GSTUDIO_SYNC_LOCK_URL` setting is Redis url, otherwise in the DB
+
+    :param name: name of the lock
+    :param ttl: lifetime (seconds) of the acquired lock or None to use
+                `GSTUDIO_SYNC_LOCK_TTL` setting
+
+    :return:
+    """
+    ttl = ttl or settings.GSTUDIO_SYNC_LOCK_TTL
+    url = settings.GSTUDIO_SYNC_LOCK_URL
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisLease(f"gstudio.lease:{name}", ttl, url)
+
+    return DatabaseLease(name, ttl)
@@ -0,0 +1,107 @@
+import json
+import time
+from typing import Dict, Any, List
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+
+from gh_films.pkg.gstudio.compression import ENCODINGS, get_encodings, \
+    compress
+from gh_films.pkg.gstudio.stub import generate_dataset
+
+
+__all__ = ["Command", ]
+
+
+def _render_page(films: List[Dict], people: List[Dict]) -> bytes:
+    """
+    Renders the page of films the same way as `FilmsView` renders
+    `FilmsSummary` rows
+    """
+    names = {}
+    for person in people:
+        for url in person["films"]:
+            names.setdefault(url, []).append(person["name"])
+
+    rows = [{"title": f["title"], "people": sorted(names.get(f["url"], []))}
+            for f in films]
+    return render_to_string("films.html", {"films": rows, "filters": {}}) \
+        .encode("utf-8")
+
+
+def _render_export(films: List[Dict]) -> bytes:
+    """
+    Encodes films the same way as the export of JSON API does
+    """
+    fields = ("id", "title", "description", "director", "producer",
+              "release_date", "rt_score")
+    return DjangoJSONEncoder().encode(
+        [{name: f[name] for name in fields} for f in films]).encode("utf-8")
+
+
+class Command(BaseCommand):
+    help = "Measures CPU cost of compression of the page of films and the " \
+           "export of JSON API against saved bytes on synthetic catalogs. " \
+           "Fast levels are used by on the fly compression, best levels " \
+           "are used once per dataset version by cached pages and the " \
+           "static snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--films", type=int, nargs="+",
+                            default=[100, 1000, 10000],
+                            help="numbers of films of catalogs")
+        parser.add_argument("--people-per-film", type=int, default=10,
+                            help="number of people per film")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="number of runs of every measurement (the "
+                                 "best one is reported)")
+
+    def handle(self, *args, **options):
+        result = []
+        for size in options["films"]:
+            films, people = generate_dataset(
+                size, size * options["people_per_film"])
+
+            for name, content in (("page", _render_page(films, people)),
+                                  ("export", _render_export(films))):
+                row = {"content": name, "films": size, "bytes": len(content),
+                       "encodings": []}
+                for encoding in get_encodings():
+                    for level_name, best in (("fast", False), ("best", True)):
+                        row["encodings"].append(self._measure(
+                            content, encoding, level_name, best,
+                            options["repeat"]))
+                result.append(row)
+
+        self.stdout.write(json.dumps(result, indent=2))
+
+    @staticmethod
+    def _measure(content: bytes, encoding: str, level_name: str, best: bool,
+                 repeat: int) -> Dict[str, Any]:
+        """
+        Compresses the content by the encoding several times
+
+        :return: {"encoding": "...", "level": n, "bytes": n, "ratio": n,
+                  "saved_bytes": n, "ms": n, "mb_per_s": n,
+                  "us_per_saved_kb": n}
+        """
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            compressed = compress(content, encoding, best)
+            timings.append(time.perf_counter() - started)
+
+        elapsed = min(timings)
+        saved = len(content) - len(compressed)
+        return {
+            "encoding": encoding,
+            "level": f"{level_name} ({ENCODINGS[encoding][int(best)]})",
+            "bytes": len(compressed),
+            "ratio": len(content) / max(len(compressed), 1),
+            "saved_bytes": saved,
+            "ms": elapsed * 1000,
+            "mb_per_s": len(content) / elapsed / 2 ** 20 if elapsed else 0,
+            "us_per_saved_kb": elapsed * 1e6 / (saved / 1024)
+            if saved > 0 else None,
+        }
@@ -0,0 +1,44 @@
+import json
+import time
+from statistics import mean
+
+from django.core.management.base import BaseCommand
+
+from gh_films.pkg.gstudio.ghibli_api import GhibliApi
+from gh_films.pkg.gstudio.stub import StubServer
+
+
+__all__ = ["Command", ]
+
+
+class Command(BaseCommand):
+    help = "Compares sequential and concurrent fetching of Ghibli API " \
+           "endpoints using the local stub server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--films", type=int, default=20)
+        parser.add_argument("--people", type=int, default=50)
+        parser.add_argument("--latency", type=float, default=0.2,
+                            help="server's delay (seconds) of each response")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with StubServer(films=options["films"], people=options["people"],
+                        latency=options["latency"]) as server:
+            api_cls = type("StubGhibliApi", (GhibliApi, ),
+                           {"BASE_URL": server.url})
+
+            result = {}
+            for mode, max_workers in (("sequential", 1), ("concurrent", None)):
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    api_cls(max_workers=max_workers)
+                    timings.append(time.perf_counter() - started)
+
+                result[mode] = {"mean": mean(timings), "min": min(timings)}
+
+        result["speedup"] = result["sequential"]["mean"] / \
+            result["concurrent"]["mean"]
+
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+__all__ = ["Command", ]
+
+
+class _Connection(object):
+    """
+    Keep-alive HTTP/1.1 connection of a single virtual client
+    """
+    def __init__(self, host: str, port: int, request: bytes):
+        self._host = host
+        self._port = port
+        self._request = request
+        self._reader = self._writer = None
+
+    async def get(self) -> int:
+        """
+        Sends the request and reads the whole response
+
+        :return: status of the response
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self._host, self._port)
+
+        self._writer.write(self._request)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length, chunked, close = None, False, False
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value
+            elif name == b"connection":
+                close = value == b"close"
+
+        if chunked:
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif length is not None:
+            await self._reader.readexactly(length)
+        else:
+            await self._reader.read()
+            close = True
+
+        if close:
+            self.close()
+        return status
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+def _percentile(values: List[float], share: float) -> float:
+    # nearest-rank percentile of sorted values
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+class Command(BaseCommand):
+    help = "Measures throughput and latency of running web servers (e.g. " \
+           "`gunicorn -w 4 gh_films.wsgi` vs `uvicorn --workers 4 " \
+           "gh_films.asgi:application` with `GSTUDIO_ASYNC_VIEWS` setting " \
+           "enabled) by a number of concurrent keep-alive clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True,
+                            help="name=url of the server, e.g. "
+                                 "wsgi=http://127.0.0.1:8000/movies/")
+        parser.add_argument("--concurrency", type=int, nargs="+",
+                            default=[1, 8, 32, 128],
+                            help="numbers of concurrent clients")
+        parser.add_argument("--duration", type=float, default=10,
+                            help="duration (seconds) of each level")
+        parser.add_argument("--warmup", type=float, default=1,
+                            help="duration (seconds) of the warmup before "
+                                 "each level (isn't measured)")
+
+    def handle(self, *args, **options):
+        targets = []
+        for item in options["target"]:
+            name, _, url = item.partition("=")
+            parts = urlsplit(url)
+            if not name or parts.scheme != "http" or not parts.hostname:
+                raise CommandError(f"Invalid target \"{item}\"")
+            targets.append((name, parts))
+
+        result = {"duration": options["duration"], "targets": []}
+        for name, parts in targets:
+            levels = []
+            for concurrency in options["concurrency"]:
+                # `asyncio.run` isn't available in Python 3.6
+                loop = asyncio.new_event_loop()
+                try:
+                    levels.append(loop.run_until_complete(self._bench(
+                        parts, concurrency, options["duration"],
+                        options["warmup"])))
+                finally:
+                    loop.close()
+            result["targets"].append({"name": name, "url": parts.geturl(),
+                                      "levels": levels})
+
+        self.stdout.write(json.dumps(result, indent=2))
+
+    async def _bench(self, parts, concurrency: int, duration: float,
+                     warmup: float) -> Dict[str, Any]:
+        """
+        Runs clients for the warmup and then for the measured duration
+
+        :return: {"concurrency": n, "requests": n, "errors": n, "rps": n,
+                  "p50_ms": n, "p90_ms": n, "p99_ms": n, "max_ms": n}
+        """
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                   f"Accept-Encoding: identity\r\n\r\n").encode("latin1")
+
+        connections = [_Connection(parts.hostname, parts.port or 80, request)
+                       for _ in range(concurrency)]
+        if warmup:
+            await self._run(connections, warmup)
+
+        started = time.perf_counter()
+        latencies, errors = await self._run(connections, duration)
+        elapsed = time.perf_counter() - started
+
+        for conn in connections:
+            conn.close()
+
+        latencies.sort()
+        return {
+            "concurrency": concurrency, "requests": len(latencies),
+            "errors": errors, "rps": len(latencies) / elapsed,
+            "p50_ms": _percentile(latencies, 0.5) * 1000,
+            "p90_ms": _percentile(latencies, 0.9) * 1000,
+            "p99_ms": _percentile(latencies, 0.99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0) * 1000,
+        }
+
+    @staticmethod
+    async def _run(connections: List[_Connection],
+                   duration: float) -> Tuple[List[float], int]:
+        """
+        Sends requests by all connections until the deadline
+
+        :return: (latencies of successful requests, number of errors)
+        """
+        deadline = time.perf_counter() + duration
+        latencies, errors = [], [0]
+
+        async def _client(conn: _Connection):
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await conn.get()
+                except (OSError, ValueError, IndexError,
+                        asyncio.IncompleteReadError):
+                    conn.close()
+                    errors[0] += 1
+                    # e.g. the server isn't started
+                    await asyncio.sleep(0.01)
+                    continue
+                if status >= 500:
+                    errors[0] += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(_client(conn) for conn in connections))
+        return latencies, errors[0]
@@ -0,0 +1,78 @@
+import json
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand
+
+from gh_films.pkg.gstudio.ghibli_api import GhibliApi
+from gh_films.pkg.gstudio.resolver import UrlResolver
+from gh_films.pkg.gstudio.stub import generate_dataset
+
+
+__all__ = ["Command", ]
+
+
+def _naive_merge(films: List[Dict], people: List[Dict]) -> None:
+    """
+    The original implementation (kept as a baseline): parses the url of
+    every reference
+    """
+    d_films = {}
+    for film in films:
+        d_films[film["id"]] = film
+        film["people"] = []
+
+    for person in people:
+        p_films = person.get("films")
+        if not p_films:
+            continue
+
+        film_ids = []
+        for f_url in p_films:
+            film_id = urlparse(f_url).path.rsplit("/", 1)[-1]
+            film_ids.append(film_id)
+            if film_id in d_films:
+                d_films[film_id]["people"].append(person)
+
+        person["films"] = film_ids
+
+
+def _resolver_merge(films: List[Dict], people: List[Dict]) -> None:
+    GhibliApi._merge(films, people, UrlResolver())
+
+
+class Command(BaseCommand):
+    help = "Measures merging of people into films on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--films", type=int, default=1000,
+                            help="number of films")
+        parser.add_argument("--people", type=int, default=100000,
+                            help="number of people")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="number of runs, the best one is reported")
+
+    def handle(self, *args, **options):
+        films, people = generate_dataset(options["films"], options["people"],
+                                         "https://ghibliapi.herokuapp.com")
+        references = sum(len(p["films"]) for p in people)
+
+        result = {"films": len(films), "people": len(people),
+                  "references": references}
+        for name, merge in (("naive", _naive_merge),
+                            ("resolver", _resolver_merge)):
+            timings = []
+            for _ in range(options["repeat"]):
+                # merging changes data in-place
+                films_copy = [dict(f) for f in films]
+                people_copy = [dict(p, films=list(p["films"]))
+                               for p in people]
+
+                started = time.perf_counter()
+                merge(films_copy, people_copy)
+                timings.append(time.perf_counter() - started)
+
+            result[f"{name}_seconds"] = min(timings)
+
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.rows import RowBuilder
+from gh_films.pkg.gstudio.stub import generate_dataset
+
+
+__all__ = ["Command", ]
+
+
+def _naive_builder(model):
+    """
+    The original implementation (kept as a baseline): walks model's fields
+    for every record and instantiates the model by keyword arguments
+    """
+    def _build(api_data):
+        instance_data = {}
+        for field in model._meta.get_fields():
+            if not field.is_relation:
+                instance_data[field.name] = api_data.get(field.name)
+        return model(**instance_data)
+
+    return _build
+
+
+class Command(BaseCommand):
+    help = "Measures per-record cost of building model's instances from " \
+           "api records on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+",
+                            default=[10000, 100000],
+                            help="numbers of records, e.g. 10000 1000000")
+
+    def handle(self, *args, **options):
+        result = []
+        for size in options["sizes"]:
+            films, people = generate_dataset(max(size // 100, 1), size)
+
+            for model, records in ((People, people), (Films, films)):
+                row = {"model": model.__name__, "records": len(records)}
+
+                for name, build in (("naive", _naive_builder(model)),
+                                    ("compiled", RowBuilder(model))):
+                    started = time.perf_counter()
+                    for api_record in records:
+                        build(api_record)
+                    elapsed = time.perf_counter() - started
+                    row[f"{name}_us_per_record"] = \
+                        elapsed / len(records) * 1e6
+
+                result.append(row)
+
+        self.stdout.write(json.dumps(result, indent=2))
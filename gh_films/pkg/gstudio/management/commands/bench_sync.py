@@ -0,0 +1,125 @@
+import json
+import time
+import tracemalloc
+from typing import Dict, Any
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gh_films.pkg.gstudio.ghibli_api import GhibliApi
+from gh_films.pkg.gstudio.metrics import SyncMetrics
+from gh_films.pkg.gstudio.resources import get_resources
+from gh_films.pkg.gstudio.stub import StubServer, generate_dataset, \
+    mutate_dataset
+from gh_films.pkg.gstudio.tasks import _sync
+from gh_films.pkg.gstudio.transport import create_session
+
+
+__all__ = ["Command", ]
+
+
+class _ValidatorsStore(dict):
+    """
+    In-memory storage of validators with django's cache interface
+    """
+    def set(self, key: str, value: Any, timeout=None) -> None:
+        self[key] = value
+
+
+class Command(BaseCommand):
+    help = "Measures the end-to-end sync (the code of the " \
+           "\"update_movies\" task) against the local stub server. The " \
+           "sync is run into a temporary test database: cold (empty DB), " \
+           "warm with unchanged upstream and warm with partially changed " \
+           "upstream"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--films", type=int, default=1000)
+        parser.add_argument("--people", type=int, default=10000)
+        parser.add_argument("--change-rate", type=float, default=0.01,
+                            help="share of entries changed before the "
+                                 "partial run")
+        parser.add_argument("--latency", type=float, default=0,
+                            help="server's delay (seconds) of each response")
+        parser.add_argument("--no-etag", action="store_true",
+                            help="disable ETag support of the server, thus "
+                                 "changes are detected by checksum of bodies")
+        parser.add_argument("--stream", action="store_true",
+                            help="parse responses incrementally")
+        parser.add_argument("--no-memory", action="store_true",
+                            help="don't trace memory allocations (tracing "
+                                 "slows down everything)")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            result = self._bench(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def _bench(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        server = StubServer(films=0, people=0, latency=options["latency"],
+                            etag=not options["no_etag"])
+        extra = {r.endpoint: [] for r in get_resources()}
+        films, people = generate_dataset(options["films"], options["people"],
+                                         server.url)
+
+        session = create_session(retries=0)
+        api_cls = type("StubGhibliApi", (GhibliApi, ),
+                       {"BASE_URL": server.url})
+        validators = _ValidatorsStore()
+
+        result = {"films": options["films"], "people": options["people"],
+                  "change_rate": options["change_rate"],
+                  "latency": options["latency"],
+                  "etag": not options["no_etag"], "stream": options["stream"],
+                  "runs": []}
+
+        with server:
+            runs = (("cold", (films, people)),
+                    ("warm_unchanged", (films, people)),
+                    ("partial", mutate_dataset(films, people,
+                                               options["change_rate"])))
+            for name, data in runs:
+                server.set_data(*data, extra)
+
+                run = {"run": name}
+                run.update(self._run(api_cls, session, validators, options))
+                result["runs"].append(run)
+
+        session.close()
+        return result
+
+    @staticmethod
+    def _run(api_cls, session, validators: _ValidatorsStore,
+             options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Performs a single sync by the code of the "update_movies" task
+
+        :return: {"timings": {"phase": seconds, ...}, "stats": {...},
+                  "peak_memory_mb": n}
+        """
+        metrics = SyncMetrics()
+        trace_memory = not options["no_memory"]
+        if trace_memory:
+            tracemalloc.start()
+
+        # DB timings include parsing and merging in streaming mode
+        started = time.perf_counter()
+        _sync(metrics, api_cls=api_cls, session=session,
+              validators=validators, stream=options["stream"])
+        metrics.set_timing("total", time.perf_counter() - started)
+
+        collected = metrics.as_dict()
+        run = {"not_modified": bool(collected["counters"].get(
+                   "not_modified")),
+               "timings": collected["timings"],
+               "stats": collected["counters"]}
+        if trace_memory:
+            run["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+
+        return run
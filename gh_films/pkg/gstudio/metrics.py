@@ -0,0 +1,219 @@
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Iterator
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from gh_films.pkg.gstudio.dataset import get_cache
+
+
+__all__ = ["SyncMetrics", "BaseSink", "LoggingSink", "StatsdSink",
+           "PrometheusSink", "get_sinks", "emit", "render_prometheus", ]
+
+
+# Instrumentation of the "update_movies" task: durations of its phases and
+# counters (records, bytes, DB queries). Metrics of every run are included
+# into the task result and emitted through sinks listed by
+# `GSTUDIO_METRICS_SINKS` setting
+
+_logger = logging.getLogger("gstudio.metrics")
+
+_PROMETHEUS_KEY = "gstudio.metrics.sync"
+
+
+class SyncMetrics(object):
+    """
+    Collects metrics of a single run of the sync
+    """
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Measures duration of the phase and number of DB queries made by it
+        (as "<name>_queries" counter)
+
+        :param name: name of the phase (e.g. "relations")
+        """
+        queries = [0]
+
+        def _count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_count):
+                yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+            self.counters[f"{name}_queries"] = queries[0]
+
+    def set_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = seconds
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_stats(self, prefix: str, stats: Dict[str, Any]) -> None:
+        """
+        Adds numeric fields of stats (e.g. of `tasks.update`) as counters
+
+        :param prefix: prefix of counters (e.g. "people")
+        :param stats: {"inserted": n, ...}
+        """
+        for key, value in stats.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                self.incr(f"{prefix}_{key}", value)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns collected metrics
+
+        :return: {"timings": {"phase": seconds, ...},
+                  "counters": {"name": n, ...}}
+        """
+        return {"timings": dict(self.timings),
+                "counters": dict(self.counters)}
+
+
+class BaseSink(object):
+    """
+    Destination of metrics
+    """
+    def emit(self, metrics: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Sends metrics of the run
+
+        :param metrics: see `SyncMetrics.as_dict`
+        """
+        raise NotImplementedError()
+
+
+class LoggingSink(BaseSink):
+    """
+    Writes metrics into the log (a single record per run)
+    """
+    def emit(self, metrics: Dict[str, Dict[str, Any]]) -> None:
+        timings = " ".join(f"{k}={v:.3f}s"
+                           for k, v in sorted(metrics["timings"].items()))
+        counters = " ".join(f"{k}={v}"
+                            for k, v in sorted(metrics["counters"].items()))
+        _logger.info(f"Sync metrics: {timings} {counters}")
+
+
+class StatsdSink(BaseSink):
+    """
+    Sends metrics to statsd-compatible server via UDP (see
+    `GSTUDIO_STATSD_ADDRESS` and `GSTUDIO_STATSD_PREFIX` settings). Timings
+    are sent as timers (ms), counters as counters
+    """
+    # max size of a single datagram, lines are packed into as few datagrams
+    # as possible
+    MAX_PACKET_SIZE = 512
+
+    def __init__(self, address=None, prefix: str = None):
+        """
+
+        :param address: (host, port) of the server or None to use the setting
+        :param prefix: prefix of metrics' names or None to use the setting
+        """
+        self._address = tuple(address or settings.GSTUDIO_STATSD_ADDRESS)
+        self._prefix = prefix or settings.GSTUDIO_STATSD_PREFIX
+
+    def get_lines(self, metrics: Dict[str, Dict[str, Any]]) -> List[str]:
+        lines = [f"{self._prefix}.{name}:{seconds * 1000:.3f}|ms"
+                 for name, seconds in sorted(metrics["timings"].items())]
+        lines.extend(f"{self._prefix}.{name}:{value}|c"
+                     for name, value in sorted(metrics["counters"].items()))
+        return lines
+
+    def emit(self, metrics: Dict[str, Dict[str, Any]]) -> None:
+        packets, packet = [], ""
+        for line in self.get_lines(metrics):
+            if packet and len(packet) + len(line) + 1 > self.MAX_PACKET_SIZE:
+                packets.append(packet)
+                packet = ""
+            packet = f"{packet}\n{line}" if packet else line
+        if packet:
+            packets.append(packet)
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for packet in packets:
+                sock.sendto(packet.encode("utf-8"), self._address)
+        finally:
+            sock.close()
+
+
+class PrometheusSink(BaseSink):
+    """
+    Keeps metrics of the latest run in the cache (see `GSTUDIO_CACHE`
+    setting), thus they are exposed by web processes in Prometheus text
+    format (see `render_prometheus`)
+    """
+    def emit(self, metrics: Dict[str, Dict[str, Any]]) -> None:
+        get_cache().set(_PROMETHEUS_KEY, dict(metrics, finished=time.time()),
+                        None)
+
+
+def render_prometheus() -> str:
+    """
+    Renders metrics of the latest run stored by `PrometheusSink` in
+    Prometheus text exposition format
+
+    :return:
+    """
+    metrics = get_cache().get(_PROMETHEUS_KEY)
+    if not metrics:
+        return ""
+
+    lines = [
+        "# HELP gstudio_sync_phase_seconds Duration of phases of the latest "
+        "sync.",
+        "# TYPE gstudio_sync_phase_seconds gauge",
+    ]
+    lines.extend(f'gstudio_sync_phase_seconds{{phase="{name}"}} {value}'
+                 for name, value in sorted(metrics["timings"].items()))
+    lines.extend([
+        "# HELP gstudio_sync_count Counters of the latest sync.",
+        "# TYPE gstudio_sync_count gauge",
+    ])
+    lines.extend(f'gstudio_sync_count{{name="{name}"}} {value}'
+                 for name, value in sorted(metrics["counters"].items()))
+    lines.extend([
+        "# HELP gstudio_sync_finished_seconds Time of the latest sync.",
+        "# TYPE gstudio_sync_finished_seconds gauge",
+        f"gstudio_sync_finished_seconds {metrics['finished']}",
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def get_sinks() -> List[BaseSink]:
+    """
+    Returns sinks listed by `GSTUDIO_METRICS_SINKS` setting
+
+    :return:
+    """
+    return [import_string(path)() for path in settings.GSTUDIO_METRICS_SINKS]
+
+
+def emit(metrics: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Sends metrics through all configured sinks. Failures of sinks are logged
+    only, because metrics must not break the sync
+
+    :param metrics: see `SyncMetrics.as_dict`
+    """
+    for sink in get_sinks():
+        try:
+            sink.emit(metrics)
+        except Exception as err:
+            _logger.warning(f"Can't emit metrics by {type(sink).__name__} "
+                            f"due to \"{str(err)}\"")
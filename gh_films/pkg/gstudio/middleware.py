@@ -0,0 +1,202 @@
+import asyncio
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from gh_films.pkg.gstudio.compression import negotiate, is_compressible, \
+    compress_sequence, encode_response
+from gh_films.pkg.gstudio.web_metrics import get_recorder, format_labels
+
+
+__all__ = ["MetricsMiddleware", "CompressionMiddleware", "count_queries", ]
+
+
+# methods which are labeled by their names, others are labeled as "other" to
+# keep the number of series low
+_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class _QueryCounter(object):
+    """
+    Execution wrapper of DB connections which counts queries and their time
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+@contextmanager
+def count_queries(request) -> Iterator[None]:
+    """
+    Counts queries made by the current thread into metrics of the request.
+    Async views are supposed to wrap their calls to the DB by it, because
+    the middleware can't see threads of them
+
+    :param request:
+    """
+    counter = getattr(request, "gstudio_queries", None)
+    if counter is None:
+        yield
+        return
+
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(counter))
+        yield
+
+
+class MetricsMiddleware(object):
+    """
+    Measures requests per url name (see `gh_films.pkg.gstudio.web_metrics`):
+    latency, number and duration of DB queries, rendering of templates and
+    lookups of cached pages (see `DatasetCacheMixin`). It's supposed to be the
+    first one of `MIDDLEWARE` to measure the others as well.
+
+    It supports both sync and async modes, thus it doesn't force ASGI
+    handler to switch threads. Queries of async views are counted if they
+    use `count_queries`
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # the same way as `MiddlewareMixin` marks itself as a coroutine
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        request.gstudio_queries = _QueryCounter()
+        started = time.perf_counter()
+        with count_queries(request):
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        request.gstudio_queries = _QueryCounter()
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _record(request, response, duration: float) -> None:
+        """
+        Updates metrics of the process by results of the request
+
+        :param request:
+        :param response:
+        :param duration: duration (seconds) of the request
+        """
+        queries = request.gstudio_queries
+        match = request.resolver_match
+        view_name = match.view_name if match else "<unresolved>"
+        view = format_labels([("view", view_name)])
+        method = request.method if request.method in _METHODS else "other"
+
+        increments = [
+            ("gstudio_http_requests_total",
+             format_labels([("view", view_name), ("method", method),
+                            ("status", response.status_code)]), 1),
+        ]
+        observations = [
+            ("gstudio_http_request_duration_seconds", view, duration),
+            ("gstudio_http_db_queries", view, queries.count),
+            ("gstudio_http_db_duration_seconds", view, queries.seconds),
+        ]
+
+        render_seconds = getattr(request, "gstudio_render_seconds", None)
+        if render_seconds is not None:
+            observations.append(("gstudio_http_template_render_seconds", view,
+                                 render_seconds))
+
+        page_cache = getattr(request, "gstudio_page_cache", None)
+        if page_cache is not None:
+            increments.append(
+                ("gstudio_http_page_cache_total",
+                 format_labels([("view", view_name), ("result", page_cache)]),
+                 1))
+
+        get_recorder().record(increments, observations)
+
+    def process_template_response(self, request, response):
+        # it's called right before rendering (the middleware is the last one
+        # to process template responses), thus the callback measures the
+        # rendering only
+        started = time.perf_counter()
+
+        def _measure(resp):
+            request.gstudio_render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(_measure)
+        return response
+
+
+class CompressionMiddleware(object):
+    """
+    Compresses HTML, JSON and text responses by the encoding negotiated via
+    "Accept-Encoding" header (see `gh_films.pkg.gstudio.compression`) on the
+    fly. Responses which are compressed already (cached pages and the static
+    snapshot, see `DatasetCacheMixin` and `SnapshotMixin`) are passed as they
+    are. It's supposed to be placed before middleware which reads content of
+    responses (e.g. `ConditionalGetMiddleware`)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self._process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._process(request, await self.get_response(request))
+
+    @staticmethod
+    def _process(request, response):
+        if not response.has_header("Content-Encoding"):
+            if not is_compressible(response):
+                return response
+
+            # the identity is a representation of the negotiated encoding as
+            # well, thus caches must not serve it to other clients
+            patch_vary_headers(response, ("Accept-Encoding", ))
+            encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            if encoding is None:
+                return response
+
+            if response.streaming:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, encoding)
+                del response["Content-Length"]
+                response["Content-Encoding"] = encoding
+            else:
+                encode_response(response, encoding)
+
+        # representations of different encodings aren't byte-for-byte equal,
+        # thus their validators are weak (the same way as `GZipMiddleware`
+        # does)
+        etag = response.get("ETag")
+        if etag and etag.startswith("\""):
+            response["ETag"] = "W/" + etag
+        return response
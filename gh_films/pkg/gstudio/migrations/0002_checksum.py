@@ -0,0 +1,25 @@
+# Generated by Django 3.1.12 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='films',
+            name='checksum',
+            field=models.CharField(blank=True, default='', editable=False,
+                                   max_length=40),
+        ),
+        migrations.AddField(
+            model_name='people',
+            name='checksum',
+            field=models.CharField(blank=True, default='', editable=False,
+                                   max_length=40),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.1.12 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_summary(apps, schema_editor):
+    films_model = apps.get_model("gstudio", "Films")
+    summary_model = apps.get_model("gstudio", "FilmsSummary")
+
+    people = {}
+    for film_id, name in films_model.people.through.objects.values_list(
+            "films_id", "people__name").order_by("films_id", "people__name"):
+        people.setdefault(film_id, []).append(name)
+
+    summary_model.objects.bulk_create(
+        [summary_model(film_id=film_id, title=title,
+                       people=people.get(film_id, []))
+         for film_id, title in films_model.objects.values_list("pk",
+                                                               "title")])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0002_checksum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmsSummary',
+            fields=[
+                ('film', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True, related_name='summary',
+                    serialize=False, to='gstudio.films')),
+                ('title', models.CharField(max_length=255)),
+                ('people', models.JSONField(default=list)),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.12 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0003_films_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lease',
+            fields=[
+                ('name', models.CharField(max_length=128, primary_key=True,
+                                          serialize=False)),
+                ('token', models.CharField(max_length=32)),
+                ('expires', models.DateTimeField()),
+            ],
+        ),
+    ]
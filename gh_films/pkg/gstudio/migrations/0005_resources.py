@@ -0,0 +1,80 @@
+# Generated by Django 3.1.12 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0004_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Locations',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('climate', models.CharField(blank=True, max_length=64)),
+                ('terrain', models.CharField(blank=True, max_length=64)),
+                ('surface_water', models.CharField(blank=True,
+                                                   max_length=64)),
+                ('checksum', models.CharField(blank=True, default='',
+                                              editable=False, max_length=40)),
+                ('films', models.ManyToManyField(
+                    default=None, related_name='locations',
+                    to='gstudio.Films')),
+                ('residents', models.ManyToManyField(
+                    default=None, related_name='locations',
+                    to='gstudio.People')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Species',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('classification', models.CharField(blank=True,
+                                                    max_length=128)),
+                ('eye_colors', models.CharField(blank=True, max_length=255)),
+                ('hair_colors', models.CharField(blank=True, max_length=255)),
+                ('checksum', models.CharField(blank=True, default='',
+                                              editable=False, max_length=40)),
+                ('films', models.ManyToManyField(
+                    default=None, related_name='species',
+                    to='gstudio.Films')),
+                ('people', models.ManyToManyField(
+                    default=None, related_name='species',
+                    to='gstudio.People')),
+            ],
+            options={
+                'verbose_name_plural': 'species',
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Vehicles',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('vehicle_class', models.CharField(blank=True,
+                                                   max_length=128)),
+                ('length', models.CharField(blank=True, max_length=64)),
+                ('checksum', models.CharField(blank=True, default='',
+                                              editable=False, max_length=40)),
+                ('films', models.ManyToManyField(
+                    default=None, related_name='vehicles',
+                    to='gstudio.Films')),
+                ('pilots', models.ManyToManyField(
+                    default=None, related_name='vehicles',
+                    to='gstudio.People')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.12 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0005_resources'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='people',
+            index=models.Index(fields=['name'],
+                               name='gstudio_people_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='films',
+            index=models.Index(fields=['title'],
+                               name='gstudio_films_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='films',
+            index=models.Index(fields=['director', 'release_date'],
+                               name='gstudio_films_director_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='films',
+            index=models.Index(fields=['release_date'],
+                               name='gstudio_films_release_idx'),
+        ),
+        # films of a person are read by the index only. The opposite
+        # direction is covered by the unique index (films_id, people_id)
+        # created by Django
+        migrations.RunSQL(
+            'CREATE INDEX "gstudio_films_people_people_films_idx" '
+            'ON "gstudio_films_people" ("people_id", "films_id")',
+            'DROP INDEX "gstudio_films_people_people_films_idx"',
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 3.1.12 on 2026-10-19 00:10
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Creates the full-text index of films (see `gh_films.pkg.gstudio.search`)
+    if the DB supports it and fills it by existing films. Then it's updated
+    by the sync
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(
+                    'CREATE VIRTUAL TABLE "gstudio_films_search" USING fts5('
+                    'film_id UNINDEXED, checksum UNINDEXED, title, '
+                    'description, tokenize="unicode61 remove_diacritics 2")')
+        except OperationalError:
+            # SQLite is built without FTS5, films are searched by substrings
+            return
+        document = "%s, %s"
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            'CREATE TABLE "gstudio_films_search" ('
+            '"film_id" uuid NOT NULL PRIMARY KEY REFERENCES "gstudio_films" '
+            '("id") ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            '"checksum" varchar(40) NOT NULL, '
+            '"document" tsvector NOT NULL)')
+        schema_editor.execute(
+            'CREATE INDEX "gstudio_films_search_document_idx" '
+            'ON "gstudio_films_search" USING GIN ("document")')
+        document = "setweight(to_tsvector('english', %s), 'A') || " \
+                   "setweight(to_tsvector('english', %s), 'B')"
+    else:
+        return
+
+    films = apps.get_model("gstudio", "Films")
+    columns = "title, description" if vendor == "sqlite" else "document"
+    pk_field = films._meta.pk
+    rows = [(pk_field.get_db_prep_value(pk, schema_editor.connection),
+             checksum, title, description)
+            for pk, checksum, title, description in films.objects.values_list(
+                "pk", "checksum", "title", "description").iterator()]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO "gstudio_films_search" (film_id, checksum, '
+            f'{columns}) VALUES (%s, %s, {document})', rows)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE IF EXISTS "gstudio_films_search"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gstudio', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='films',
+            index=models.Index(fields=['producer'],
+                               name='gstudio_films_producer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='films',
+            index=models.Index(fields=['rt_score'],
+                               name='gstudio_films_score_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
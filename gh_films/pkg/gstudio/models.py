@@ -1,13 +1,15 @@
 from enum import Enum, unique
 
-from django.db.models import Model, ManyToManyField
+from django.db.models import Model, ManyToManyField, OneToOneField, \
+    JSONField, Index, CASCADE
 from django.db.models.fields import UUIDField, CharField, TextField, \
-    PositiveSmallIntegerField
+    PositiveSmallIntegerField, DateTimeField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.timezone import now as tz_now
 
 
-__all__ = ["Films", "People", "Gender", ]
+__all__ = ["Films", "People", "FilmsSummary", "Locations", "Species",
+           "Vehicles", "Lease", "Gender", ]
 
 
 @unique
@@ -42,6 +44,13 @@ class People(Model):
     age = CharField(max_length=64, blank=True)
     eye_color = CharField(max_length=64)
     hair_color = CharField(max_length=64)
+    checksum = CharField(max_length=40, blank=True, default="",
+                         editable=False)
+
+    class Meta:
+        indexes = [
+            Index(fields=["name"], name="gstudio_people_name_idx"),
+        ]
 
 
 class Films(Model):
@@ -59,6 +68,90 @@ class Films(Model):
         MaxValueValidator(tz_now().year + 1)])
     rt_score = PositiveSmallIntegerField()
     people = ManyToManyField(People, default=None)
+    checksum = CharField(max_length=40, blank=True, default="",
+                         editable=False)
+
+    class Meta:
+        ordering = ["pk"]
+        # NOTE: the through table of `people` has an extra index
+        # (people_id, films_id) created by the migration "0006_indexes",
+        # because indexes of auto-created through models can't be declared
+        indexes = [
+            Index(fields=["title"], name="gstudio_films_title_idx"),
+            Index(fields=["director", "release_date"],
+                  name="gstudio_films_director_idx"),
+            Index(fields=["release_date"],
+                  name="gstudio_films_release_idx"),
+            Index(fields=["producer"], name="gstudio_films_producer_idx"),
+            Index(fields=["rt_score"], name="gstudio_films_score_idx"),
+        ]
+
+
+class FilmsSummary(Model):
+    """
+    Read-only projection of films with names of their people. It's rebuilt
+    by the sync task, thus pages can be rendered by a single query
+    """
+    film = OneToOneField(Films, primary_key=True, on_delete=CASCADE,
+                         related_name="summary")
+    title = CharField(max_length=255)
+    people = JSONField(default=list)
+
+    class Meta:
+        ordering = ["pk"]
+
+
+class Locations(Model):
+    id = UUIDField(primary_key=True)
+    name = CharField(max_length=255)
+    climate = CharField(max_length=64, blank=True)
+    terrain = CharField(max_length=64, blank=True)
+    surface_water = CharField(max_length=64, blank=True)
+    residents = ManyToManyField(People, default=None,
+                                related_name="locations")
+    films = ManyToManyField(Films, default=None, related_name="locations")
+    checksum = CharField(max_length=40, blank=True, default="",
+                         editable=False)
+
+    class Meta:
+        ordering = ["pk"]
+
+
+class Species(Model):
+    id = UUIDField(primary_key=True)
+    name = CharField(max_length=255)
+    classification = CharField(max_length=128, blank=True)
+    eye_colors = CharField(max_length=255, blank=True)
+    hair_colors = CharField(max_length=255, blank=True)
+    people = ManyToManyField(People, default=None, related_name="species")
+    films = ManyToManyField(Films, default=None, related_name="species")
+    checksum = CharField(max_length=40, blank=True, default="",
+                         editable=False)
 
     class Meta:
         ordering = ["pk"]
+        verbose_name_plural = "species"
+
+
+class Vehicles(Model):
+    id = UUIDField(primary_key=True)
+    name = CharField(max_length=255)
+    description = TextField(blank=True)
+    vehicle_class = CharField(max_length=128, blank=True)
+    length = CharField(max_length=64, blank=True)
+    pilots = ManyToManyField(People, default=None, related_name="vehicles")
+    films = ManyToManyField(Films, default=None, related_name="vehicles")
+    checksum = CharField(max_length=40, blank=True, default="",
+                         editable=False)
+
+    class Meta:
+        ordering = ["pk"]
+
+
+class Lease(Model):
+    """
+    Named lock with limited lifetime (see `gh_films.pkg.gstudio.locks`)
+    """
+    name = CharField(max_length=128, primary_key=True)
+    token = CharField(max_length=32)
+    expires = DateTimeField()
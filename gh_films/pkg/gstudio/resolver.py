@@ -0,0 +1,98 @@
+import sys
+from typing import Any, Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+
+__all__ = ["UrlResolver", ]
+
+
+class UrlResolver(object):
+    """
+    Resolves urls of api entries (e.g. "https://host/films/<id>") into their
+    ids. Entries refer to each other by urls, and the same url is repeated
+    many times (e.g. every person refers to a few films out of the same
+    small set), thus results are memoized: the url is parsed once, and equal
+    urls are resolved into the same (interned) id object
+    """
+    # max number of memoized urls, the memo is cleared on overflow
+    MAX_SIZE = 1 << 18
+
+    def __init__(self, convert: Callable[[str], Any] = None,
+                 max_size: int = None):
+        """
+
+        :param convert: converter of raw ids (e.g. `uuid.UUID`) or None to
+                        keep them as strings. Urls which ids can't be
+                        converted (ValueError or TypeError) are resolved into
+                        None
+        :param max_size: max number of memoized urls or None to use default
+                         `MAX_SIZE`
+        """
+        self._convert = convert
+        self._max_size = max_size or self.MAX_SIZE
+        self._memo = {}
+
+    def __call__(self, url: str) -> Optional[Any]:
+        """
+        Returns id of the entry referred by given url
+
+        :param url:
+
+        :return: id or None if the url doesn't refer to any entry (e.g. it's
+                 the url of the whole collection)
+        """
+        try:
+            return self._memo[url]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable value (e.g. a nested list)
+            return None
+
+        entry_id = self._resolve(url)
+        if len(self._memo) >= self._max_size:
+            self._memo.clear()
+        self._memo[url] = entry_id
+        return entry_id
+
+    def resolve_many(self, urls: Iterable[str]) -> List[Any]:
+        """
+        Returns ids of entries referred by given urls (urls which don't refer
+        to any entry are skipped)
+
+        :param urls:
+
+        :return:
+        """
+        ids = []
+        for url in urls:
+            entry_id = self(url)
+            if entry_id is not None:
+                ids.append(entry_id)
+        return ids
+
+    def _resolve(self, url: str) -> Optional[Any]:
+        """
+        Parses the url which isn't memoized yet
+
+        :param url:
+
+        :return:
+        """
+        if not isinstance(url, str):
+            return None
+
+        # query and fragment are rare, thus the full parsing is skipped for
+        # plain urls
+        path = urlsplit(url).path if "?" in url or "#" in url else url
+        raw_id = path.rpartition("/")[2]
+        if not raw_id:
+            return None
+
+        if self._convert is None:
+            return sys.intern(raw_id)
+
+        try:
+            return self._convert(raw_id)
+        except (ValueError, TypeError):
+            return None
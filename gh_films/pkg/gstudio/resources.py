@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from typing import Dict, List, Any, Type, Tuple, Set, Iterable, Iterator
+from uuid import UUID
+
+from django.db.models import Model
+
+from gh_films.pkg.gstudio.models import Locations, Species, Vehicles
+from gh_films.pkg.gstudio.resolver import UrlResolver
+
+
+__all__ = ["Reference", "Resource", "register", "get_resources",
+           "get_resource", ]
+
+
+# Declarations of upstream resources which are synchronized by the generic
+# engine: all of them are requested by the same (concurrent) round of
+# requests and written by the same code path. Films and people aren't here,
+# because their relations are merged by `GhibliApi` and drive the summary
+
+
+# resources refer to the same records many times, thus urls are parsed once
+_resolve_uuid = UrlResolver(UUID)
+
+
+class Reference(object):
+    """
+    URL-reference(s) of api record to records of another resource, stored
+    as many-to-many relation of the model
+    """
+    def __init__(self, api_key: str, field: str):
+        """
+
+        :param api_key: key of the api record which keeps url (or list of
+                        urls) of referenced records
+        :param field: name of the model's many-to-many field
+        """
+        self.api_key = api_key
+        self.field = field
+
+    @staticmethod
+    def get_ids(value: Any) -> Set[UUID]:
+        """
+        Extracts ids of referenced records from urls. Urls without valid id
+        (e.g. url of the whole collection) are skipped
+
+        :param value: url, list of urls or None
+
+        :return:
+        """
+        if not value:
+            return set()
+        if isinstance(value, str):
+            value = [value]
+
+        return set(_resolve_uuid.resolve_many(value))
+
+
+class Resource(object):
+    """
+    Declaration of upstream resource: its endpoint, model, mapping between
+    api keys and model's fields and references to other resources
+    """
+    def __init__(self, endpoint: str, model: Type[Model],
+                 mapping: Dict[str, str] = None,
+                 references: Iterable[Reference] = ()):
+        """
+
+        :param endpoint: name of API's endpoint (e.g. "species")
+        :param model: model class to store records
+        :param mapping: {"field_name": "api_key", ...} for fields which names
+                        differ from api's keys
+        :param references: references to records of other resources
+        """
+        self.endpoint = endpoint
+        self.model = model
+        self.mapping = mapping or {}
+        self.references = tuple(references)
+
+    def iter_records(self, api_data: Iterable[Dict[str, Any]],
+                     links: Dict[str, Dict[Any, Set[UUID]]]
+                     ) -> Iterator[Dict[str, Any]]:
+        """
+        Renames keys of api records to model's fields and collects their
+        references while records are being consumed
+
+        :param api_data: iterable of api records
+        :param links: {"field": {record_id: {referenced_id, ...}}, ...} to
+                      update in-place
+
+        :return: iterator over records ready to be written
+        """
+        for ref in self.references:
+            links.setdefault(ref.field, {})
+
+        for api_record in api_data:
+            for field, api_key in self.mapping.items():
+                api_record[field] = api_record.get(api_key)
+
+            record_id = api_record.get("id")
+            for ref in self.references:
+                links[ref.field][record_id] = ref.get_ids(
+                    api_record.get(ref.api_key))
+
+            yield api_record
+
+    def get_through(self, field: str) -> Tuple[Type[Model], str, str]:
+        """
+        Returns intermediate model of the many-to-many field and names of its
+        columns
+
+        :param field: name of the many-to-many field
+
+        :return: (through_model, own_column, referenced_column)
+        """
+        m2m = self.model._meta.get_field(field)
+        through = m2m.remote_field.through
+        return (through,
+                through._meta.get_field(m2m.m2m_field_name()).attname,
+                through._meta.get_field(m2m.m2m_reverse_field_name()).attname)
+
+
+_registry = OrderedDict()
+
+
+def register(resource: Resource) -> Resource:
+    """
+    Adds the resource to the registry
+
+    :param resource:
+
+    :return: given resource
+    """
+    _registry[resource.endpoint] = resource
+    return resource
+
+
+def get_resources() -> List[Resource]:
+    """
+    Returns registered resources in order of registration
+
+    :return:
+    """
+    return list(_registry.values())
+
+
+def get_resource(endpoint: str) -> Resource:
+    """
+    Returns registered resource by its endpoint
+
+    :param endpoint:
+
+    :return:
+
+    :raise KeyError: if there's no such resource
+    """
+    return _registry[endpoint]
+
+
+register(Resource("locations", Locations, references=[
+    Reference("residents", "residents"),
+    Reference("films", "films"),
+]))
+
+register(Resource("species", Species, references=[
+    Reference("people", "people"),
+    Reference("films", "films"),
+]))
+
+register(Resource("vehicles", Vehicles, references=[
+    Reference("pilot", "pilots"),
+    Reference("films", "films"),
+]))
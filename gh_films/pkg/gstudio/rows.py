@@ -0,0 +1,146 @@
+import logging
+from functools import lru_cache
+from typing import Dict, Type, Any, Optional, Callable
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, CharField, TextField
+from django.db.models.base import ModelState
+from django.db.models.signals import pre_init, post_init
+
+
+__all__ = ["RowBuilder", "get_row_builder", ]
+
+
+def _get_none() -> None:
+    return None
+
+
+def _memoize(to_python: Callable) -> Callable:
+    """
+    Caches results of conversion for fields with limited set of values
+
+    :param to_python: original converter
+
+    :return:
+    """
+    cache = {}
+
+    def _to_python(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = to_python(value)
+            return result
+        except TypeError:
+            # unhashable value
+            return to_python(value)
+
+    return _to_python
+
+
+class RowBuilder(object):
+    """
+    Builds model's instances from api records. Mapping between api keys and
+    model's fields is calculated once on creation, thus the builder is
+    supposed to be reused for all records of the model
+    """
+    def __init__(self, model: Type[Model], mapping: Dict[str, str] = None,
+                 logger=None):
+        """
+
+        :param model: model class to build instances of
+        :param mapping: {"field_name": "api_key", ...} for fields which names
+                        differ from api's keys
+        :param logger: a logger instance or None to use default python's logger
+        """
+        self._model = model
+        self._model_name = str(model._meta.verbose_name)
+        self._logger = logger or logging.getLogger("gstudio.rows.RowBuilder")
+
+        mapping = mapping or {}
+        self._fields = []
+        self._attnames = []
+
+        for field in model._meta.concrete_fields:
+            # there's no default value for required fields
+            if field.has_default():
+                default = field.get_default
+            elif field.null:
+                default = _get_none
+            else:
+                default = None
+
+            if field.choices:
+                to_python = _memoize(field.to_python)
+            elif type(field) in (CharField, TextField):
+                # strings (the most common case) don't need any conversion
+                to_python = None
+            else:
+                to_python = field.to_python
+
+            self._attnames.append(field.attname)
+            self._fields.append((field.name, mapping.get(field.name,
+                                                         field.name),
+                                 to_python, default))
+
+        # model's constructor is bypassed when nobody listens its signals
+        self._fast_init = not (pre_init.has_listeners(model) or
+                               post_init.has_listeners(model))
+
+    def __call__(self, api_data: Dict[str, Any]) -> Optional[Model]:
+        """
+        Returns new model's instance which fields are populated by api data
+
+        :param api_data:
+
+        :return: model's instance or None if api data isn't valid
+        """
+        values = []
+        get = api_data.get
+
+        for name, api_key, to_python, default in self._fields:
+            value = get(api_key)
+            if value is None:
+                if default is None:
+                    self._logger.warning(
+                        f'Can\'t store {self._model_name} #{get("id")} due '
+                        f'to missed "{name}" field')
+                    return None
+
+                values.append(default())
+                continue
+
+            if to_python is None:
+                if value.__class__ is not str:
+                    value = str(value)
+                values.append(value)
+                continue
+
+            try:
+                values.append(to_python(value))
+            except ValidationError as err:
+                self._logger.warning(
+                    f'Can\'t store {self._model_name} #{get("id")} due to '
+                    f'error: "{str(err)}"')
+                return None
+
+        if not self._fast_init:
+            return self._model(*values)
+
+        instance = Model.__new__(self._model)
+        instance._state = ModelState()
+        instance.__dict__.update(zip(self._attnames, values))
+        return instance
+
+
+@lru_cache(maxsize=None)
+def get_row_builder(model: Type[Model], logger=None) -> RowBuilder:
+    """
+    Returns cached row builder of given model
+
+    :param model:
+    :param logger: a logger instance or None to use default python's logger
+
+    :return:
+    """
+    return RowBuilder(model, logger=logger)
@@ -0,0 +1,93 @@
+import time
+import uuid
+from typing import Dict, Any
+
+from django.conf import settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+
+
+__all__ = ["get_interval", "get_state", "save_state", "is_alive",
+           "new_chain", ]
+
+
+# In the adaptive mode (see `GSTUDIO_SYNC_ADAPTIVE` setting) every run of the
+# "update_movies" task schedules the next one. The delay between runs grows
+# exponentially while upstream data isn't changed and drops to the base
+# interval once a change is seen. The chain of runs is identified by a token,
+# thus runs of other (stale or duplicated) chains are dropped
+
+_STATE_KEY = "gstudio.sync.schedule"
+
+# limits the exponent, the interval is capped by the ceiling anyway
+_MAX_BACKOFF_STEPS = 32
+
+
+def get_interval(unchanged: int) -> float:
+    """
+    Returns delay (seconds) before the next sync
+
+    :param unchanged: number of consecutive syncs without changes
+
+    :return:
+    """
+    base = settings.GSTUDIO_SYNC_INTERVAL
+    steps = unchanged - settings.GSTUDIO_SYNC_BACKOFF_AFTER + 1
+    if steps <= 0:
+        return base
+
+    steps = min(steps, _MAX_BACKOFF_STEPS)
+    return min(base * settings.GSTUDIO_SYNC_BACKOFF_FACTOR ** steps,
+               settings.GSTUDIO_SYNC_MAX_INTERVAL)
+
+
+def new_chain() -> str:
+    """
+    Returns token of a new chain of runs
+
+    :return:
+    """
+    return uuid.uuid4().hex
+
+
+def get_state() -> Dict[str, Any]:
+    """
+    Returns state of the schedule
+
+    :return: {"chain": token, "unchanged": n, "interval": seconds,
+              "due": timestamp of the next run} or empty dict if there's no
+             scheduled runs
+    """
+    return get_cache().get(_STATE_KEY) or {}
+
+
+def save_state(chain: str, unchanged: int) -> Dict[str, Any]:
+    """
+    Stores state of the schedule after the run of given chain
+
+    :param chain: token of the chain
+    :param unchanged: number of consecutive syncs without changes
+
+    :return: new state (see `get_state`)
+    """
+    interval = get_interval(unchanged)
+    state = {"chain": chain, "unchanged": unchanged, "interval": interval,
+             "due": time.time() + interval}
+    get_cache().set(_STATE_KEY, state, None)
+    return state
+
+
+def is_alive(state: Dict[str, Any]) -> bool:
+    """
+    Checks whether the chain of runs is alive, i.e. its next run isn't
+    overdue (the base interval is given to the queue to deliver the run)
+
+    :param state: state of the schedule (see `get_state`)
+
+    :return:
+    """
+    due = state.get("due")
+    if due is None:
+        return False
+
+    return time.time() < due + settings.GSTUDIO_SYNC_INTERVAL
@@ -0,0 +1,200 @@
+import re
+from typing import Dict, List, Tuple, Any
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from gh_films.pkg.gstudio.models import Films
+
+
+__all__ = ["SEARCH_TABLE", "BaseSearch", "BasicSearch", "SqliteSearch",
+           "PostgresSearch", "get_search", "get_terms", ]
+
+
+# Full-text search over titles and descriptions of films. The index is a
+# separate table (created by the migration "0007_search" if the DB supports
+# it) kept up to date by the "update_movies" task: rows of changed films are
+# rewritten only (see `tasks.update_search`). Without the index, films are
+# searched by substrings (a full scan)
+
+SEARCH_TABLE = "gstudio_films_search"
+_TABLE = f"\"{SEARCH_TABLE}\""
+
+# max number of terms of a single query
+_MAX_TERMS = 16
+
+# SQLite doesn't allow more than 999 variables in a single query
+_DELETE_BATCH_SIZE = 500
+
+# (film_id, checksum, title, description)
+_Row = Tuple[Any, str, str, str]
+
+
+def get_terms(query: str) -> List[str]:
+    """
+    Splits the query into words. Everything else (operators, quotes etc) is
+    dropped, thus user's input can't break syntax of search queries
+
+    :param query:
+
+    :return:
+    """
+    return re.findall(r"\w+", query or "")[:_MAX_TERMS]
+
+
+class BaseSearch(object):
+    """
+    Search backend
+    """
+    # whether the backend keeps an index which is updated by the sync
+    indexed = True
+
+    def filter(self, queryset: QuerySet, terms: List[str]) -> QuerySet:
+        """
+        Restricts queryset of films to ones which title or description
+        contains all terms (as prefixes of words)
+
+        :param queryset: queryset of films
+        :param terms: see `get_terms`
+
+        :return:
+        """
+        raise NotImplementedError()
+
+    def get_stored(self) -> Dict[Any, str]:
+        """
+        Returns checksums of films (see `Films.checksum`) at the time they
+        were indexed
+
+        :return: {film_id: checksum, ...}
+        """
+        pk_field = Films._meta.pk
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT film_id, checksum FROM {_TABLE}")
+            return {pk_field.to_python(film_id): checksum
+                    for film_id, checksum in cursor.fetchall()}
+
+    def write(self, inserted: List[_Row], updated: List[_Row],
+              deleted: List[Any]) -> None:
+        """
+        Writes changes of the index (it's supposed to be called in a
+        transaction)
+
+        :param inserted: films to add: ((id, checksum, title, description),
+                         ...)
+        :param updated: indexed films which were changed
+        :param deleted: ids of films to remove from the index
+        """
+        raise NotImplementedError()
+
+    def _delete(self, ids: List[Any]) -> None:
+        with connection.cursor() as cursor:
+            for idx in range(0, len(ids), _DELETE_BATCH_SIZE):
+                batch = [self._prep_id(i)
+                         for i in ids[idx:idx + _DELETE_BATCH_SIZE]]
+                cursor.execute(
+                    f"DELETE FROM {_TABLE} WHERE film_id IN "
+                    f"({', '.join(['%s'] * len(batch))})", batch)
+
+    @staticmethod
+    def _prep_id(film_id: Any) -> Any:
+        # ids are compared with the primary key column by the DB, thus they
+        # are stored in its format (e.g. UUID is char(32) on SQLite)
+        return Films._meta.pk.get_db_prep_value(film_id, connection)
+
+
+class BasicSearch(BaseSearch):
+    """
+    Fallback: searches by substrings without any index
+    """
+    indexed = False
+
+    def filter(self, queryset: QuerySet, terms: List[str]) -> QuerySet:
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) |
+                                       Q(description__icontains=term))
+        return queryset
+
+    def get_stored(self) -> Dict[Any, str]:
+        return {}
+
+    def write(self, inserted: List[_Row], updated: List[_Row],
+              deleted: List[Any]) -> None:
+        pass
+
+
+class SqliteSearch(BaseSearch):
+    """
+    SQLite FTS5 virtual table: (film_id UNINDEXED, checksum UNINDEXED, title,
+    description)
+    """
+    def filter(self, queryset: QuerySet, terms: List[str]) -> QuerySet:
+        match = " ".join(f"\"{term}\"*" for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT film_id FROM {_TABLE} WHERE {_TABLE} "
+            f"MATCH %s", [match]))
+
+    def write(self, inserted: List[_Row], updated: List[_Row],
+              deleted: List[Any]) -> None:
+        # FTS5 tables don't have unique keys, thus changed rows are replaced.
+        # film_id isn't indexed, thus they are deleted by batches
+        self._delete(deleted + [row[0] for row in updated])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {_TABLE} (film_id, checksum, title, "
+                f"description) VALUES (%s, %s, %s, %s)",
+                [(self._prep_id(i), c, t, d)
+                 for i, c, t, d in inserted + updated])
+
+
+class PostgresSearch(BaseSearch):
+    """
+    PostgreSQL table of tsvector documents with GIN index: (film_id primary
+    key, checksum, document). Titles are weighted higher than descriptions
+    """
+    config = "english"
+
+    def filter(self, queryset: QuerySet, terms: List[str]) -> QuerySet:
+        query = " & ".join(f"{term}:*" for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT film_id FROM {_TABLE} WHERE document @@ "
+            f"to_tsquery(%s, %s)", [self.config, query]))
+
+    def write(self, inserted: List[_Row], updated: List[_Row],
+              deleted: List[Any]) -> None:
+        self._delete(deleted)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {_TABLE} (film_id, checksum, document) "
+                f"VALUES (%s, %s, setweight(to_tsvector(%s, %s), 'A') || "
+                f"setweight(to_tsvector(%s, %s), 'B')) "
+                f"ON CONFLICT (film_id) DO UPDATE SET "
+                f"checksum = EXCLUDED.checksum, document = EXCLUDED.document",
+                [(self._prep_id(i), c, self.config, t, self.config, d)
+                 for i, c, t, d in inserted + updated])
+
+
+_backends = {}
+
+
+def get_search() -> BaseSearch:
+    """
+    Returns search backend of the default DB: the index if its table exists,
+    otherwise `BasicSearch`
+
+    :return:
+    """
+    key = (connection.vendor, connection.settings_dict["NAME"])
+    backend = _backends.get(key)
+    if backend is None:
+        backend_cls = {
+            "sqlite": SqliteSearch,
+            "postgresql": PostgresSearch,
+        }.get(connection.vendor)
+        if backend_cls is None or \
+                SEARCH_TABLE not in connection.introspection.table_names():
+            backend_cls = BasicSearch
+        backend = _backends[key] = backend_cls()
+
+    return backend
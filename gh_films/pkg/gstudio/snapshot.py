@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Tuple, Union, List
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from gh_films.pkg.gstudio import compression
+from gh_films.pkg.gstudio.dataset import get_version
+from gh_films.version import VERSION
+
+
+__all__ = ["SNAPSHOT_PAGES", "MANIFEST_NAME", "SUFFIXES", "get_encodings",
+           "get_manifest", "get_file", "publish", "unpublish", ]
+
+
+# Static snapshot of pages which depend on the dataset only: the page of films
+# and exports of JSON API. It's published into `GSTUDIO_SNAPSHOT_DIR` by the
+# "update_movies" task once the dataset is changed, thus a web server (e.g.
+# nginx) may serve these urls without the application. Every url is a
+# directory with the index file ("index.html" or "index.json") and its
+# precompressed variants (".gz" and ".br" if "brotli" package is installed).
+# Files are written into temporary files and renamed, thus readers never see
+# partially written ones. The manifest is written last: views serve the
+# snapshot while its version is the current version of the dataset and
+# render pages live otherwise
+
+# ((url name, class of the view), ...), see `views.SnapshotMixin`
+SNAPSHOT_PAGES = (
+    ("films", "gh_films.pkg.gstudio.views.FilmsView"),
+    ("api-films-export", "gh_films.pkg.gstudio.api_views.FilmsExportView"),
+    ("api-people-export",
+     "gh_films.pkg.gstudio.api_views.PeopleExportView"),
+)
+
+MANIFEST_NAME = "snapshot.json"
+
+# {"encoding": suffix of the file, ...} of encodings which are supported by
+# static files of web servers
+SUFFIXES = OrderedDict([("gzip", ".gz"), ("br", ".br")])
+
+# {"path": ((mtime, size), manifest), ...} of the current process
+_manifests = {}
+
+_logger = logging.getLogger("gstudio.snapshot")
+
+
+def get_encodings() -> List[str]:
+    """
+    Returns encodings of precompressed variants which are available (see
+    `gh_films.pkg.gstudio.compression`)
+
+    :return:
+    """
+    return [name for name in compression.get_encodings() if name in SUFFIXES]
+
+
+class _AtomicFile(object):
+    """
+    File which is written into a temporary file of the same directory and
+    replaces the target by rename on commit
+    """
+    def __init__(self, path: str):
+        """
+
+        :param path: path of the target file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=".",
+                                              suffix=".tmp")
+        self._fp = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._fp.write(data)
+
+    def commit(self) -> None:
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+        # temporary files are readable by the owner only
+        os.chmod(self._tmp_path, 0o644)
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self) -> None:
+        self._fp.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            # it's committed already
+            pass
+
+
+def _write(path: str, chunks: Iterable[Union[str, bytes]]) -> int:
+    """
+    Writes the file and its precompressed variants at once
+
+    :param path: path of the file
+    :param chunks: content of the file
+
+    :return: size (bytes) of the file
+    """
+    files = [(_AtomicFile(path), None)]
+    try:
+        for encoding in get_encodings():
+            files.append((_AtomicFile(path + SUFFIXES[encoding]),
+                          compression.get_encoder(encoding, best=True)))
+
+        size = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            size += len(chunk)
+            for fp, encoder in files:
+                fp.write(encoder.compress(chunk) if encoder else chunk)
+
+        for fp, encoder in files:
+            if encoder:
+                fp.write(encoder.flush())
+        for fp, _ in files:
+            fp.commit()
+    except BaseException:
+        for fp, _ in files:
+            fp.discard()
+        raise
+
+    # variants of encodings which aren't available anymore are stale
+    written = {fp.path for fp, _ in files}
+    _remove(path + suffix for suffix in SUFFIXES.values()
+            if path + suffix not in written)
+    return size
+
+
+def _remove(paths: Iterable[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _get_manifest_path() -> Optional[str]:
+    directory = settings.GSTUDIO_SNAPSHOT_DIR
+    return os.path.join(directory, MANIFEST_NAME) if directory else None
+
+
+def get_manifest() -> Optional[Dict[str, Any]]:
+    """
+    Returns the manifest of the published snapshot. It's read once per change
+    of the file
+
+    :return: {"version": version of the dataset,
+              "app_version": version of the application,
+              "published": timestamp,
+              "pages": {"url": {"path": path relative to the directory,
+                                "content_type": "...", "bytes": n,
+                                "encodings": ["gzip", ...]}, ...}}
+              or None if there's no snapshot
+    """
+    path = _get_manifest_path()
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = _manifests.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with open(path, "r") as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+    _manifests[path] = (key, manifest)
+    return manifest
+
+
+def _is_current(manifest: Optional[Dict[str, Any]], version: int) -> bool:
+    # pages of another release may differ even for the same dataset
+    return manifest is not None and manifest.get("version") == version and \
+        manifest.get("app_version") == VERSION
+
+
+def get_file(url: str, version: int,
+             accept_encoding: str = "") -> Optional[Tuple[str, str, str]]:
+    """
+    Returns the file of the page if the snapshot is published for given
+    version of the dataset. The precompressed variant is chosen by
+    "Accept-Encoding" header
+
+    :param url: path of the page (e.g. `request.path`)
+    :param version: current version of the dataset
+    :param accept_encoding: "Accept-Encoding" header of the request
+
+    :return: (path of the file, content type, encoding or None) or None
+    """
+    manifest = get_manifest()
+    if not _is_current(manifest, version):
+        return None
+
+    page = manifest["pages"].get(url)
+    if page is None:
+        return None
+
+    path = os.path.join(settings.GSTUDIO_SNAPSHOT_DIR, page["path"])
+    encoding = compression.negotiate(
+        accept_encoding, [name for name in compression.get_encodings()
+                          if name in page["encodings"]])
+    if encoding is not None:
+        path += SUFFIXES[encoding]
+
+    return path, page["content_type"], encoding
+
+
+def publish(force: bool = False) -> Dict[str, int]:
+    """
+    Renders pages of the snapshot (see `SNAPSHOT_PAGES`) and writes them with
+    the manifest into `GSTUDIO_SNAPSHOT_DIR` directory
+
+    :param force: whether to publish the snapshot even if it's current
+
+    :return: {"pages": n, "files": n, "bytes": n} (files include
+             precompressed variants, bytes don't)
+    """
+    stats = {"pages": 0, "files": 0, "bytes": 0}
+    manifest_path = _get_manifest_path()
+    if not manifest_path:
+        return stats
+
+    # the dataset is changed by the sync task only, i.e. the caller
+    version = get_version()
+    if not force and _is_current(get_manifest(), version):
+        return stats
+
+    encodings = get_encodings()
+    pages = OrderedDict()
+    for url_name, view_path in SNAPSHOT_PAGES:
+        url = reverse(url_name)
+        content_type, chunks = import_string(view_path).render_snapshot()
+        extension = ".html" if content_type.startswith("text/html") \
+            else ".json"
+        path = os.path.join(url.strip("/"), f"index{extension}")
+
+        size = _write(os.path.join(settings.GSTUDIO_SNAPSHOT_DIR, path),
+                      chunks)
+        pages[url] = {"path": path, "content_type": content_type,
+                      "bytes": size, "encodings": encodings}
+        stats["pages"] += 1
+        stats["files"] += 1 + len(encodings)
+        stats["bytes"] += size
+
+    manifest = _AtomicFile(manifest_path)
+    try:
+        manifest.write(json.dumps({
+            "version": version, "app_version": VERSION,
+            "published": time.time(), "pages": pages,
+        }, indent=2).encode("utf-8"))
+        manifest.commit()
+    except BaseException:
+        manifest.discard()
+        raise
+
+    _logger.info(f"Snapshot of dataset version {version} is published: "
+                 f"{stats}")
+    return stats
+
+
+def unpublish() -> None:
+    """
+    Removes the snapshot, thus pages are rendered live until it's published
+    again. The manifest is removed first, thus views stop serving the
+    snapshot before its files are removed. Failures are logged only
+    """
+    manifest_path = _get_manifest_path()
+    if not manifest_path:
+        return
+
+    manifest = get_manifest()
+    paths = [manifest_path]
+    if manifest:
+        for page in manifest.get("pages", {}).values():
+            path = os.path.join(settings.GSTUDIO_SNAPSHOT_DIR, page["path"])
+            paths.append(path)
+            paths.extend(path + suffix for suffix in SUFFIXES.values())
+
+    try:
+        _remove(paths)
+    except OSError as err:
+        _logger.warning(f"Can't remove snapshot due to \"{str(err)}\"")
@@ -0,0 +1,318 @@
+import json
+import sys
+import threading
+import time
+from hashlib import sha1
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from random import Random
+from socketserver import ThreadingMixIn
+from typing import List, Dict, Tuple, Optional, Any
+from uuid import UUID
+
+
+__all__ = ["StubServer", "generate_dataset", "mutate_dataset", "FAULT_STATUS",
+           "FAULT_RESET", "FAULT_STALL", ]
+
+
+# A local emulation of the Ghibli API. It's used by tests and benchmarks to
+# avoid any interaction with the real server
+
+
+# kinds of faults (see `StubServer.inject`)
+FAULT_STATUS = "status"
+FAULT_RESET = "reset"
+FAULT_STALL = "stall"
+
+_GENDERS = ("Male", "Female", "NA", )
+_COLORS = ("Black", "Brown", "Blue", "Green", "Grey", "Red", "White", )
+
+
+def _uuid(rnd: Random) -> str:
+    return str(UUID(int=rnd.getrandbits(128), version=4))
+
+
+def generate_dataset(films: int, people: int, base_url: str = "",
+                     seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Generates synthetic data in the Ghibli API format
+
+    :param films: number of films
+    :param people: number of people
+    :param base_url: the base url used by references between entries
+    :param seed: seed of random generator, the same seed gives the same data
+
+    :return: (films, people)
+    """
+    rnd = Random(seed)
+
+    films_data = []
+    for idx in range(films):
+        film_id = _uuid(rnd)
+        films_data.append({
+            "id": film_id,
+            "title": f"Film #{idx}",
+            "description": f"Description of the film #{idx} " * 8,
+            "director": f"Director #{rnd.randrange(max(films // 4, 1))}",
+            "producer": f"Producer #{rnd.randrange(max(films // 4, 1))}",
+            "release_date": str(rnd.randint(1986, 2020)),
+            "rt_score": str(rnd.randint(0, 100)),
+            "people": [f"{base_url}/people/"],
+            "url": f"{base_url}/films/{film_id}",
+        })
+
+    people_data = []
+    for idx in range(people):
+        person_id = _uuid(rnd)
+        p_films = rnd.sample(films_data, min(rnd.randint(1, 3), films))
+        people_data.append({
+            "id": person_id,
+            "name": f"Person #{idx}",
+            "gender": rnd.choice(_GENDERS),
+            "age": str(rnd.randint(1, 100)),
+            "eye_color": rnd.choice(_COLORS),
+            "hair_color": rnd.choice(_COLORS),
+            "films": [f["url"] for f in p_films],
+            "species": f"{base_url}/species/{_uuid(rnd)}",
+            "url": f"{base_url}/people/{person_id}",
+        })
+
+    return films_data, people_data
+
+
+def mutate_dataset(films: List[Dict], people: List[Dict], rate: float,
+                   seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Emulates upstream changes: given share of films and people is modified
+    (a half of changed people also moves to another film). Given data isn't
+    changed
+
+    :param films: sequence of films (see `generate_dataset`)
+    :param people: sequence of people (see `generate_dataset`)
+    :param rate: share of changed entries (0..1)
+    :param seed: seed of random generator, the same seed gives the same
+                 changes
+
+    :return: (films, people)
+    """
+    rnd = Random(seed)
+
+    films_data = [dict(f) for f in films]
+    for film in rnd.sample(films_data, int(len(films_data) * rate)):
+        film["rt_score"] = str((int(film["rt_score"]) + 1) % 101)
+        film["description"] = f"Changed {film['description']}"
+
+    people_data = [dict(p) for p in people]
+    changed = rnd.sample(people_data, int(len(people_data) * rate))
+    for idx, person in enumerate(changed):
+        person["eye_color"] = rnd.choice(_COLORS)
+        person["age"] = str(int(person["age"]) + 1)
+        if idx % 2 and films_data:
+            person["films"] = person["films"][1:] + [
+                rnd.choice(films_data)["url"]]
+
+    return films_data, people_data
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients disconnect on timeouts (e.g. of stalled responses)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "GhibliStub/1.0"
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count_hit(self.path.strip("/"))
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        fault, value = stub.take_fault()
+        if fault == FAULT_STATUS:
+            self.send_error(value)
+            return
+        if fault == FAULT_RESET:
+            # the connection is closed without any response
+            self.close_connection = True
+            return
+        if fault == FAULT_STALL:
+            time.sleep(value)
+
+        body, etag = stub.get_body(self.path.strip("/"))
+        if body is None:
+            self.send_error(404)
+            return
+
+        if stub.etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if stub.etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(object):
+    """
+    HTTP server that serves synthetic "films" and "people" endpoints in
+    a background thread
+    """
+    def __init__(self, films: int = 20, people: int = 50, latency: float = 0,
+                 etag: bool = True, host: str = "127.0.0.1", port: int = 0,
+                 seed: int = 0):
+        """
+
+        :param films: number of films
+        :param people: number of people
+        :param latency: delay (in seconds) before each response
+        :param etag: whether to support ETag/If-None-Match validators
+        :param host: interface to listen
+        :param port: port to listen or 0 to select any free port
+        :param seed: seed of the synthetic data generator
+        """
+        self.latency = latency
+        self.etag = etag
+
+        self._server = _ThreadingHTTPServer((host, port), _Handler)
+        self._server.stub = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self._faults = []
+        self._hits = {}
+
+        self.set_data(*generate_dataset(films, people, self.url, seed))
+
+    def __enter__(self) -> "StubServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """
+        The base url of the server (e.g. "http://127.0.0.1:8080")
+
+        :return:
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_data(self, films: List[Dict], people: List[Dict],
+                 extra: Dict[str, List[Dict]] = None) -> None:
+        """
+        Replaces served data
+
+        :param films: sequence of films
+        :param people: sequence of people
+        :param extra: {"endpoint": [entry, ...], ...} of other endpoints
+        """
+        endpoints = dict(extra or {}, films=films, people=people)
+
+        bodies = {}
+        for endpoint, data in endpoints.items():
+            body = json.dumps(data).encode("utf-8")
+            bodies[endpoint] = body, f'"{sha1(body).hexdigest()}"'
+
+        with self._lock:
+            self._bodies = bodies
+
+    def get_body(self, endpoint: str) -> Tuple[bytes, str]:
+        """
+        Returns served body of given endpoint
+
+        :param endpoint: name of the endpoint (e.g. "films")
+
+        :return: (body, etag) or (None, None) for unknown endpoint
+        """
+        with self._lock:
+            return self._bodies.get(endpoint, (None, None))
+
+    def inject(self, fault: str, count: int = 1, value: Any = None) -> None:
+        """
+        Makes the server to fail next requests (of any endpoint). Faults are
+        applied in order of injection
+
+        :param fault: kind of the fault: `FAULT_STATUS` to respond with the
+                      error status (503 by default), `FAULT_RESET` to close
+                      the connection without response or `FAULT_STALL` to
+                      delay the response by `value` seconds (1 by default)
+        :param count: number of requests to fail
+        :param value: parameter of the fault
+        """
+        if value is None:
+            value = 503 if fault == FAULT_STATUS else 1
+
+        with self._lock:
+            self._faults.extend([(fault, value)] * count)
+
+    def take_fault(self) -> Tuple[Optional[str], Any]:
+        """
+        Returns the fault to apply to the current request
+
+        :return: (fault, value) or (None, None) if the request shouldn't fail
+        """
+        with self._lock:
+            if not self._faults:
+                return None, None
+            return self._faults.pop(0)
+
+    def count_hit(self, endpoint: str) -> None:
+        """
+        Counts the request of given endpoint
+
+        :param endpoint: name of the endpoint (e.g. "films")
+        """
+        with self._lock:
+            self._hits[endpoint] = self._hits.get(endpoint, 0) + 1
+
+    @property
+    def hits(self) -> Dict[str, int]:
+        """
+        Number of requests per endpoint
+
+        :return: {"endpoint": n, ...}
+        """
+        with self._lock:
+            return dict(self._hits)
+
+    def reset(self) -> None:
+        """
+        Drops injected faults and counters of requests
+        """
+        with self._lock:
+            self._faults = []
+            self._hits = {}
+
+    def start(self) -> None:
+        """
+        Starts serving in the background thread
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the server and releases its socket
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
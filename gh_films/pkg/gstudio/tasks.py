@@ -1,13 +1,26 @@
-from typing import Union, Dict, Type, List
+import json
+import time
+from hashlib import sha1
+from typing import Union, Dict, Type, List, Any, Set, Iterable
 
+from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.db import transaction, Error
-from django.db.models.expressions import BaseExpression
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from requests import RequestException, Session
 
+from gh_films.pkg.gstudio import schedule, snapshot
+from gh_films.pkg.gstudio.dataset import bump_version
 from gh_films.pkg.gstudio.ghibli_api import GhibliApi
-from gh_films.pkg.gstudio.models import People, Films
+from gh_films.pkg.gstudio.locks import get_lease
+from gh_films.pkg.gstudio.metrics import SyncMetrics, emit
+from gh_films.pkg.gstudio.resources import Resource, get_resources
+from gh_films.pkg.gstudio.models import People, Films, FilmsSummary
+from gh_films.pkg.gstudio.rows import get_row_builder
+from gh_films.pkg.gstudio.search import get_search
+from gh_films.pkg.gstudio.transport import get_session
 
 
 __all__ = ["update_movies", ]
@@ -15,6 +28,9 @@ __all__ = ["update_movies", ]
 
 _logger = get_task_logger(__name__)
 
+# SQLite doesn't allow more than 999 variables in a single query
+_DELETE_BATCH_SIZE = 500
+
 
 def _populate_fields(model: Union[Type[Films], Type[People]],
                      api_data: Dict[str, str]) -> Union[Films, People, None]:
@@ -24,89 +40,750 @@ def _populate_fields(model: Union[Type[Films], Type[People]],
     :param model:
     :param api_data:
 
+    :return: model's instance or None if api data isn't valid
+    """
+    return get_row_builder(model, _logger)(api_data)
+
+
+def _get_checksum_fields(model: Union[Type[Films], Type[People]]) -> List[str]:
+    """
+    Returns names of fields which are used to calculate checksum of records
+
+    :param model:
+
     :return:
     """
-    instance_data = {}
-    for field in model._meta.get_fields():
-        if not field.is_relation:
-            instance_data[field.name] = api_data.get(field.name)
+    fields = settings.GSTUDIO_CHECKSUM_FIELDS.get(model._meta.label_lower)
+    if fields:
+        return list(fields)
 
-    try:
-        return model(**instance_data)
-    except ValidationError as err:
-        _logger.warning(f'Can\'t store {str(model._meta.verbose_name)} '
-                        f'#{api_data["id"]} due to error: "{str(err)}')
+    return [f.name for f in model._meta.concrete_fields
+            if not f.primary_key and f.name != "checksum"]
 
 
-def update(model: Union[Type[Films], Type[People]],
-           api_data: List[Dict[str, str]]) -> None:
+def _checksum(api_data: Dict[str, str], fields: List[str]) -> str:
     """
-    Inserts new records into given model
+    Calculates checksum of the api record using given subset of its fields
 
-    :param model: model class to update records
     :param api_data:
+    :param fields: names of fields to include into checksum
 
     :return:
     """
+    values = json.dumps([api_data.get(f) for f in fields],
+                        separators=(",", ":"), default=str)
+    return sha1(values.encode("utf-8")).hexdigest()
+
+
+def _write_chunk(model: Union[Type[Films], Type[People]],
+                 chunk: List[Union[Films, People]],
+                 update_fields: List[str]) -> Dict[str, Any]:
+    """
+    Writes the chunk of instances in a separate transaction. Only new records
+    and records which checksum was changed are written
+
+    :param model: model class of the instances
+    :param chunk: instances with calculated checksum
+    :param update_fields: names of fields to update in changed records
+
+    :return: {"records": n, "inserted": n, "updated": n, "unchanged": n,
+              "seconds": duration}
+    """
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        stored = dict(model.objects.filter(
+            pk__in=[i.pk for i in chunk]).values_list("pk", "checksum"))
+
+        new, changed = [], []
+        for db_instance in chunk:
+            stored_checksum = stored.get(db_instance.pk)
+            if stored_checksum is None:
+                new.append(db_instance)
+            elif stored_checksum != db_instance.checksum:
+                changed.append(db_instance)
+
+        if new:
+            model.objects.bulk_create(new, ignore_conflicts=True)
+        if changed:
+            model.objects.bulk_update(changed, update_fields)
+
+    return {"records": len(chunk), "inserted": len(new),
+            "updated": len(changed),
+            "unchanged": len(chunk) - len(new) - len(changed),
+            "seconds": time.perf_counter() - started}
+
+
+def _delete_missing(model: Union[Type[Films], Type[People]],
+                    seen: Set[Any]) -> int:
+    """
+    Deletes records which primary keys aren't in the given set
+
+    :param model: model class to delete records
+    :param seen: primary keys of records received from api
+
+    :return: number of deleted records
+    """
+    # empty (or completely invalid) api data must not wipe the table
+    if not seen:
+        return 0
+
+    missing = [pk for pk in model.objects.values_list(
+        "pk", flat=True).iterator() if pk not in seen]
+
+    with transaction.atomic():
+        for idx in range(0, len(missing), _DELETE_BATCH_SIZE):
+            model.objects.filter(
+                pk__in=missing[idx:idx + _DELETE_BATCH_SIZE]).delete()
+
+    return len(missing)
+
+
+def update(model: Union[Type[Films], Type[People]],
+           api_data: Iterable[Dict[str, str]],
+           delete_missing: bool = None,
+           batch_size: int = None) -> Dict[str, Any]:
+    """
+    Synchronizes records of given model with api data. New records are
+    inserted, records which checksum differs from api data are updated and,
+    optionally, records missed in api data are deleted.
+
+    Api data is consumed lazily and written by chunks (each one in its own
+    transaction), thus it may be a generator of any size.
+
+    :param model: model class to update records
+    :param api_data: iterable of api records
+    :param delete_missing: whether to delete records missed in api data or
+                           None to use `GSTUDIO_SYNC_DELETE_MISSING` setting
+    :param batch_size: max number of records in a chunk or None to use
+                       `GSTUDIO_SYNC_BATCH_SIZE` setting
+
+    :return: {"received": n, "inserted": n, "updated": n, "unchanged": n,
+              "rejected": n, "failed": n, "deleted": n,
+              "write_seconds": time spent by writing of chunks,
+              "chunks": [{"records": n, "inserted": n, ...}, ...]}
+    """
+    stats = dict.fromkeys(("received", "inserted", "updated", "unchanged",
+                           "rejected", "failed", "deleted"), 0)
+    stats["write_seconds"] = 0.0
+    stats["chunks"] = []
+
+    if delete_missing is None:
+        delete_missing = settings.GSTUDIO_SYNC_DELETE_MISSING
+    batch_size = batch_size or settings.GSTUDIO_SYNC_BATCH_SIZE
+
     model_name = model._meta.verbose_name
-    if not api_data:
-        _logger.info(f"No {model_name} received.")
-        return
+    checksum_fields = _get_checksum_fields(model)
+    update_fields = [f.name for f in model._meta.concrete_fields
+                     if not f.primary_key]
+
+    def _flush(chunk: List[Union[Films, People]]) -> None:
+        try:
+            chunk_stats = _write_chunk(model, chunk, update_fields)
+        except Error as err:
+            _logger.warning(f"Can't update {model_name} records due to "
+                            f"\"{str(err)}\"")
+            stats["failed"] += len(chunk)
+            return
+
+        for key in ("inserted", "updated", "unchanged"):
+            stats[key] += chunk_stats[key]
+        stats["write_seconds"] += chunk_stats["seconds"]
+        stats["chunks"].append(chunk_stats)
+        _logger.debug(f"Chunk #{len(stats['chunks'])} of {model_name}: "
+                      f"{chunk_stats}")
 
-    batch = []
-    for api_record in api_data:
+    seen = set()
+    chunk = []
+    for api_record in api_data or ():
+        stats["received"] += 1
         db_instance = _populate_fields(model, api_record)
-        if db_instance:
-            batch.append(db_instance)
+        if not db_instance:
+            stats["rejected"] += 1
+            continue
 
-    try:
-        model.objects.bulk_create(batch, ignore_conflicts=True)
-    except (BaseExpression, Error, ) as err:
-        _logger.warning(f"Can't update {model_name} records due to "
-                        f"\"{str(err)}\"")
+        db_instance.checksum = _checksum(api_record, checksum_fields)
+        chunk.append(db_instance)
+        if delete_missing:
+            seen.add(db_instance.pk)
+
+        if len(chunk) >= batch_size:
+            _flush(chunk)
+            chunk = []
+
+    if chunk:
+        _flush(chunk)
+
+    if not stats["received"]:
+        _logger.info(f"No {model_name} received.")
+        return stats
+
+    # primary keys of rejected records are unknown, thus their stored
+    # records can't be told apart from missed ones
+    if delete_missing and (stats["failed"] or stats["rejected"]):
+        _logger.warning(f"Missed {model_name} records aren't deleted, "
+                        f"because some of received ones aren't written.")
+    elif delete_missing:
+        try:
+            stats["deleted"] = _delete_missing(model, seen)
+        except Error as err:
+            _logger.warning(f"Can't delete missed {model_name} records due "
+                            f"to \"{str(err)}\"")
+
+    return stats
 
 
-def update_relations(api: GhibliApi) -> None:
+def update_relations(api: GhibliApi) -> Dict[str, int]:
     """
-    Actualize many-to-many relations between films and people
+    Actualize many-to-many relations between films and people. Only the
+    difference between stored and received relations of received people is
+    written. Relations of films and people which aren't stored are skipped
 
     :param api:
+
+    :return: {"added": number_of_new_links, "removed": number_of_old_links,
+              "failed": number_of_links_which_write_failed}
     """
-    batch = []
+    stats = {"added": 0, "removed": 0, "failed": 0}
+    if not api.people:
+        _logger.info("No relations received.")
+        return stats
 
-    film_ids = set()
+    through = Films.people.through
+    to_uuid = Films._meta.pk.to_python
 
+    received_films = {}
     for person in api.people:
-        person_id = person["id"]
-        for film_id in person["films"]:
-            film_ids.add(film_id)
-            batch.append(Films.people.through(films_id=film_id,
-                                              people_id=person_id))
+        try:
+            person_id = to_uuid(person["id"])
+            person_films = {to_uuid(film_id) for film_id in person["films"]}
+        except ValidationError as err:
+            _logger.warning(f'Can\'t store relations of person '
+                            f'#{person["id"]} due to error: "{str(err)}"')
+            continue
+
+        received_films[person_id] = person_films
+
+    # sets are used instead of "pk__in" lookups, because SQLite doesn't
+    # allow more than 999 variables in a single query
+    people = {pk for pk in People.objects.values_list(
+        "pk", flat=True).iterator() if pk in received_films}
+    referenced = set().union(*received_films.values())
+    films = {pk for pk in Films.objects.values_list(
+        "pk", flat=True).iterator() if pk in referenced}
+
+    received = {(film_id, person_id) for person_id in people
+                for film_id in received_films[person_id] if film_id in films}
+
+    stored = {}
+    for pk, film_id, person_id in through.objects.values_list(
+            "pk", "films_id", "people_id").iterator():
+        if person_id in people:
+            stored[(film_id, person_id)] = pk
+
+    added = received.difference(stored)
+    removed = [pk for pair, pk in stored.items() if pair not in received]
+    if not added and not removed:
+        return stats
 
     try:
         with transaction.atomic():
-            Films.people.through.objects.filter(films_id__in=film_ids).delete()
-            Films.people.through.objects.bulk_create(batch,
-                                                     ignore_conflicts=True)
-    except (BaseExpression, Error, ) as err:
+            for idx in range(0, len(removed), _DELETE_BATCH_SIZE):
+                through.objects.filter(
+                    pk__in=removed[idx:idx + _DELETE_BATCH_SIZE]).delete()
+
+            through.objects.bulk_create(
+                [through(films_id=film_id, people_id=person_id)
+                 for film_id, person_id in added],
+                ignore_conflicts=True)
+    except Error as err:
         _logger.warning(f"Can't update films-people relations due to "
                         f"\"{str(err)}\"")
+        stats["failed"] = len(added) + len(removed)
+        return stats
+
+    stats.update(added=len(added), removed=len(removed))
+    return stats
+
+
+def update_links(resource: Resource, field: str,
+                 links: Dict[Any, Set[Any]]) -> Dict[str, int]:
+    """
+    Actualize many-to-many relation of the resource's records. Only the
+    difference between stored and received links of received records is
+    written. Links to records which aren't stored are skipped
+
+    :param resource:
+    :param field: name of the many-to-many field
+    :param links: {record_id: {referenced_id, ...}, ...} received from api
+
+    :return: {"added": number_of_new_links, "removed": number_of_old_links,
+              "failed": number_of_links_which_write_failed}
+    """
+    stats = {"added": 0, "removed": 0, "failed": 0}
+    model = resource.model
+    through, own_column, ref_column = resource.get_through(field)
+    related_model = model._meta.get_field(field).related_model
+    to_pk = model._meta.pk.to_python
+
+    received_links = {}
+    for record_id, ref_ids in links.items():
+        try:
+            received_links[to_pk(record_id)] = ref_ids
+        except ValidationError:
+            continue
+
+    if not received_links:
+        return stats
+
+    # sets are used instead of "pk__in" lookups, because SQLite doesn't
+    # allow more than 999 variables in a single query
+    owners = {pk for pk in model.objects.values_list(
+        "pk", flat=True).iterator() if pk in received_links}
+    referenced = set().union(*received_links.values())
+    related = {pk for pk in related_model.objects.values_list(
+        "pk", flat=True).iterator() if pk in referenced}
+
+    received = {(own_id, ref_id) for own_id in owners
+                for ref_id in received_links[own_id] if ref_id in related}
+
+    stored = {}
+    for pk, own_id, ref_id in through.objects.values_list(
+            "pk", own_column, ref_column).iterator():
+        if own_id in owners:
+            stored[(own_id, ref_id)] = pk
+
+    added = received.difference(stored)
+    removed = [pk for pair, pk in stored.items() if pair not in received]
+    if not added and not removed:
+        return stats
+
+    try:
+        with transaction.atomic():
+            for idx in range(0, len(removed), _DELETE_BATCH_SIZE):
+                through.objects.filter(
+                    pk__in=removed[idx:idx + _DELETE_BATCH_SIZE]).delete()
+
+            through.objects.bulk_create(
+                [through(**{own_column: own_id, ref_column: ref_id})
+                 for own_id, ref_id in added],
+                ignore_conflicts=True)
+    except Error as err:
+        _logger.warning(f"Can't update {resource.endpoint} {field} "
+                        f"relations due to \"{str(err)}\"")
+        stats["failed"] = len(added) + len(removed)
+        return stats
+
+    stats.update(added=len(added), removed=len(removed))
+    return stats
+
+
+def update_resource(resource: Resource,
+                    api_data: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Synchronizes records of the registered resource (see
+    `gh_films.pkg.gstudio.resources`) and their references with api data
+
+    :param resource:
+    :param api_data: iterable of api records
+
+    :return: stats of `update` with {"links": {"field": stats of
+             `update_links`, ...}}
+    """
+    links = {}
+    stats = update(resource.model, resource.iter_records(api_data, links))
+    stats["links"] = {field: update_links(resource, field, field_links)
+                      for field, field_links in links.items()}
+    return stats
+
+
+def update_summary() -> Dict[str, int]:
+    """
+    Actualize the read-only projection of films with names of their people
+    (see `FilmsSummary`). Only changed rows are written
+
+    :return: {"inserted": n, "updated": n, "deleted": n, "failed": n}
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "failed": 0}
+
+    people = {}
+    for film_id, name in Films.people.through.objects.values_list(
+            "films_id", "people__name").order_by("films_id", "people__name"):
+        people.setdefault(film_id, []).append(name)
+
+    stored = {pk: (title, names) for pk, title, names in
+              FilmsSummary.objects.order_by().values_list("pk", "title",
+                                                          "people")}
+
+    new, changed = [], []
+    for film_id, title in Films.objects.order_by().values_list("pk",
+                                                               "title"):
+        summary = FilmsSummary(film_id=film_id, title=title,
+                               people=people.get(film_id, []))
+        current = stored.pop(film_id, None)
+        if current is None:
+            new.append(summary)
+        elif current != (summary.title, summary.people):
+            changed.append(summary)
+
+    # the rest of stored rows belong to films which don't exist anymore
+    missing = list(stored)
+    if not new and not changed and not missing:
+        return stats
+
+    try:
+        with transaction.atomic():
+            FilmsSummary.objects.bulk_create(new)
+            FilmsSummary.objects.bulk_update(changed, ["title", "people"])
+            for idx in range(0, len(missing), _DELETE_BATCH_SIZE):
+                FilmsSummary.objects.filter(
+                    pk__in=missing[idx:idx + _DELETE_BATCH_SIZE]).delete()
+    except Error as err:
+        _logger.warning(f"Can't update films summary due to \"{str(err)}\"")
+        stats["failed"] = len(new) + len(changed) + len(missing)
+        return stats
+
+    stats.update(inserted=len(new), updated=len(changed),
+                 deleted=len(missing))
+    return stats
+
+
+def update_search() -> Dict[str, int]:
+    """
+    Actualize the full-text index of films (see `gh_films.pkg.gstudio.search`).
+    Only films which checksum differs from the indexed one are rewritten
+
+    :return: {"inserted": n, "updated": n, "deleted": n, "failed": n}
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "failed": 0}
+    search = get_search()
+    if not search.indexed:
+        return stats
+
+    stored = search.get_stored()
+    new, changed = [], []
+    for film_id, checksum in Films.objects.order_by().values_list(
+            "pk", "checksum"):
+        current = stored.pop(film_id, None)
+        if current is None:
+            new.append(film_id)
+        elif current != checksum:
+            changed.append(film_id)
+
+    # the rest of indexed films don't exist anymore
+    missing = list(stored)
+    if not new and not changed and not missing:
+        return stats
+
+    def _load(ids):
+        # texts are loaded for new and changed films only
+        rows = []
+        for idx in range(0, len(ids), _DELETE_BATCH_SIZE):
+            rows.extend(Films.objects.filter(
+                pk__in=ids[idx:idx + _DELETE_BATCH_SIZE]).values_list(
+                "pk", "checksum", "title", "description"))
+        return rows
+
+    try:
+        with transaction.atomic():
+            search.write(_load(new), _load(changed), missing)
+    except Error as err:
+        _logger.warning(f"Can't update search index due to \"{str(err)}\"")
+        stats["failed"] = len(new) + len(changed) + len(missing)
+        return stats
+
+    stats.update(inserted=len(new), updated=len(changed),
+                 deleted=len(missing))
+    return stats
+
+
+def update_snapshot() -> Dict[str, int]:
+    """
+    Publishes the static snapshot of pages (see
+    `gh_films.pkg.gstudio.snapshot`) if it's missing or stale. The snapshot
+    which can't be published is removed, thus pages of the previous version
+    of the dataset aren't served
+
+    :return: {"pages": n, "files": n, "bytes": n}
+    """
+    try:
+        return snapshot.publish()
+    except (OSError, Error) as err:
+        _logger.warning(f"Can't publish snapshot due to \"{str(err)}\"")
+        snapshot.unpublish()
+        return {"pages": 0, "files": 0, "bytes": 0}
+
+
+def _sync(metrics: SyncMetrics, api_cls: Type[GhibliApi] = None,
+          session: Session = None, validators: Any = None,
+          stream: bool = None) -> Dict[str, Any]:
+    """
+    Fetches films and people from api and writes their changes into the DB
+
+    :param metrics: collector of durations of phases and counters
+    :param api_cls: class of the api client or None to use `GhibliApi`
+                    (e.g. the client of the stub server in benchmarks)
+    :param session: HTTP session or None to use the session of the process
+    :param validators: storage of validators or None to use the cache of
+                       `GSTUDIO_VALIDATORS_CACHE` setting
+    :param stream: whether to parse responses incrementally or None to use
+                   `GSTUDIO_STREAM_API` setting
+
+    :return: {"people": number_received_people,
+              "films": number_received_films,
+              "changed": whether the dataset was changed}
+    """
+    if session is None:
+        # the session is shared by runs of the task in the worker process,
+        # thus connections to upstream are kept alive between them
+        session = get_session(retries=settings.GSTUDIO_HTTP_RETRIES,
+                              backoff=settings.GSTUDIO_HTTP_BACKOFF,
+                              pool_size=settings.GSTUDIO_HTTP_POOL_SIZE)
+    if validators is None:
+        validators = caches[settings.GSTUDIO_VALIDATORS_CACHE]
+    if stream is None:
+        stream = settings.GSTUDIO_STREAM_API
+    api_cls = api_cls or GhibliApi
+
+    resources = get_resources()
+    with metrics.phase("api"):
+        api = api_cls(_logger, validators=validators, stream=stream,
+                      session=session,
+                      timeout=settings.GSTUDIO_HTTP_TIMEOUT,
+                      extra_endpoints=[r.endpoint for r in resources])
+    for name, seconds in api.timings.items():
+        metrics.set_timing(f"api_{name}", seconds)
+
+    if api.not_modified:
+        _logger.info("Upstream data isn't modified. Nothing to update.")
+        metrics.incr("not_modified")
+        return {"people": 0, "films": 0, "changed": False}
+
+    # people must be consumed before films to merge them in streaming mode
+    all_stats = {}
+    for name, model, api_data in (("people", People, api.iter_people()),
+                                  ("films", Films, api.iter_films())):
+        with metrics.phase(name):
+            all_stats[name] = update(model, api_data)
+
+    with metrics.phase("relations"):
+        relations_stats = update_relations(api)
+    metrics.add_stats("relations", relations_stats)
+
+    # validators of endpoints which data isn't written completely are
+    # discarded, thus the data is refetched and written again by the next run
+    failed = set()
+    if relations_stats["failed"] or any(all_stats[name]["failed"]
+                                        for name in api_cls.ENDPOINTS):
+        failed.update(api_cls.ENDPOINTS)
+
+    # other resources refer to films and people, thus they are written after
+    for resource in resources:
+        try:
+            with metrics.phase(resource.endpoint):
+                all_stats[resource.endpoint] = stats = update_resource(
+                    resource, api.iter_endpoint(resource.endpoint))
+        except (ValueError, RequestException) as err:
+            _logger.warning(f"Can't update {resource.endpoint} due to "
+                            f"\"{str(err)}\"")
+            failed.add(resource.endpoint)
+            metrics.incr(f"{resource.endpoint}_errors")
+            continue
+        if stats["failed"] or any(field_stats["failed"] for field_stats
+                                  in stats["links"].values()):
+            failed.add(resource.endpoint)
+
+    links_stats = [relations_stats]
+    for name, stats in all_stats.items():
+        metrics.add_stats(name, stats)
+        metrics.set_timing(f"{name}_write", stats["write_seconds"])
+        for field, field_stats in stats.get("links", {}).items():
+            metrics.add_stats(f"{name}_{field}", field_stats)
+            links_stats.append(field_stats)
+
+    changed = bool(
+        any(stats["added"] or stats["removed"] for stats in links_stats) or
+        any(stats[key] for stats in all_stats.values()
+            for key in ("inserted", "updated", "deleted")))
+
+    # derived data is reconciled by every run which fetched the data, thus
+    # it's repaired by the refetch after its own failure as well
+    derived_stats = []
+    with metrics.phase("summary"):
+        derived_stats.append(update_summary())
+    with metrics.phase("search"):
+        derived_stats.append(update_search())
+    for name, stats in zip(("summary", "search"), derived_stats):
+        metrics.add_stats(name, stats)
+        if stats["failed"]:
+            failed.update(api_cls.ENDPOINTS)
+        if any(stats[key] for key in ("inserted", "updated", "deleted")):
+            changed = True
+    if changed:
+        bump_version()
+
+    for endpoint in sorted(failed):
+        api.discard_validators(endpoint)
+    if failed:
+        _logger.warning(f"Data of {', '.join(sorted(failed))} isn't "
+                        f"written completely. It will be refetched by the "
+                        f"next run.")
+    api.save_validators()
+    metrics.incr("downloaded_bytes", sum(api.downloaded.values()))
+
+    result = {"changed": changed}
+    result.update((name, stats["received"])
+                  for name, stats in all_stats.items())
+    return result
+
+
+def _skipped(**kwargs) -> Dict[str, Any]:
+    """
+    Returns result of the skipped run of the task
+
+    :param kwargs: extra fields of the result
+
+    :return:
+    """
+    result = {"people": 0, "films": 0, "changed": False, "skipped": True,
+              "lock_wait": 0.0, "duration": 0.0}
+    result.update(kwargs)
+    return result
+
+
+def _run(metrics: SyncMetrics) -> Dict[str, Any]:
+    """
+    Performs the sync under the lock
+
+    :param metrics: collector of durations of phases and counters
+
+    :return: see `update_movies`
+    """
+    lease = get_lease("update_movies")
+
+    started = time.perf_counter()
+    acquired = lease.acquire(settings.GSTUDIO_SYNC_LOCK_WAIT)
+    lock_wait = time.perf_counter() - started
+    metrics.set_timing("lock_wait", lock_wait)
+
+    if not acquired:
+        _logger.info(f"Another sync is in progress (waited "
+                     f"{lock_wait:.3f}s). Skipped.")
+        metrics.incr("skipped")
+        return _skipped(lock_wait=lock_wait)
+
+    started = time.perf_counter()
+    try:
+        result = _sync(metrics)
+        # the snapshot is checked by every run, thus it's published even if
+        # the dataset isn't changed (e.g. the directory is just configured or
+        # the snapshot is made by the previous release)
+        if settings.GSTUDIO_SNAPSHOT_DIR:
+            with metrics.phase("snapshot"):
+                metrics.add_stats("snapshot", update_snapshot())
+    finally:
+        if not lease.release():
+            _logger.warning("The sync lock has expired before the end of "
+                            "the sync. Consider increasing of "
+                            "GSTUDIO_SYNC_LOCK_TTL setting.")
+    duration = time.perf_counter() - started
+    metrics.set_timing("sync", duration)
+
+    _logger.info(f"Sync is completed in {duration:.3f}s (lock wait "
+                 f"{lock_wait:.3f}s).")
+    result.update(skipped=False, lock_wait=lock_wait, duration=duration)
+    return result
+
+
+def _run_adaptive(metrics: SyncMetrics, chain: str = None) -> Dict[str, Any]:
+    """
+    Performs the sync and schedules the next one (see
+    `gh_films.pkg.gstudio.schedule`)
+
+    :param metrics: collector of durations of phases and counters
+    :param chain: token of the chain of runs or None if the run is started by
+                  celery beat
+
+    :return: see `update_movies`
+    """
+    state = schedule.get_state()
+    if chain is None:
+        # runs started by celery beat restart the chain if it's broken only
+        # (e.g. the worker was restarted or the cache was flushed)
+        if schedule.is_alive(state):
+            metrics.incr("skipped")
+            return _skipped(interval=state["interval"])
+        chain = schedule.new_chain()
+        _logger.info("Adaptive sync schedule is started.")
+    elif chain != state.get("chain", chain):
+        _logger.info("Adaptive sync schedule is replaced by a new one. "
+                     "Stale run is dropped.")
+        metrics.incr("skipped")
+        return _skipped()
+
+    unchanged = state.get("unchanged", 0)
+    result = None
+    try:
+        result = _run(metrics)
+    finally:
+        # the failed or skipped run doesn't affect the backoff
+        if result is not None and not result["skipped"]:
+            unchanged = 0 if result["changed"] else unchanged + 1
+
+        state = schedule.save_state(chain, unchanged)
+        update_movies.apply_async(kwargs={"chain": chain},
+                                  countdown=state["interval"])
+
+    _logger.info(f"Next sync is scheduled in {state['interval']}s "
+                 f"({unchanged} unchanged syncs in a row).")
+    metrics.set_timing("interval", state["interval"])
+    result.update(interval=state["interval"])
+    return result
 
 
 @shared_task
-def update_movies() -> Dict[str, int]:
+def update_movies(chain: str = None) -> Dict[str, Any]:
     """
-    Updates local copy list of movies (with people)
+    Updates local copy list of movies (with people). Only a single run of the
+    task is performed at a time, overlapped runs are skipped (see
+    `GSTUDIO_SYNC_LOCK_*` settings).
 
-    :return: {"people": number_new_people, "films": number_new_films}
+    In the adaptive mode (see `GSTUDIO_SYNC_ADAPTIVE` setting) the task
+    schedules itself: the interval between runs grows while upstream data
+    isn't changed. Runs started by celery beat only restart the broken
+    schedule then.
+
+    Durations of phases and counters of the run are emitted through sinks
+    listed by `GSTUDIO_METRICS_SINKS` setting.
+
+    The static snapshot of pages is published at the end of the run (see
+    `GSTUDIO_SNAPSHOT_DIR` setting).
+
+    :param chain: token of the adaptive schedule (it's passed by the task
+                  to itself)
+
+    :return: {"people": number_received_people,
+              "films": number_received_films,
+              "changed": whether the dataset was changed,
+              "skipped": whether the sync was skipped,
+              "lock_wait": time (seconds) spent to acquire the lock,
+              "duration": time (seconds) of the sync,
+              "interval": delay (seconds) before the next sync (in the
+                          adaptive mode only),
+              "metrics": {"timings": {"phase": seconds, ...},
+                          "counters": {"name": n, ...}}}
     """
-    # known issues: current implementation updates (inserts) new entries only.
-    # This function can't track changes in already saved records due to
-    # limitations of public Ghibli API
-    api = GhibliApi(_logger)
-    update(People, api.people)
-    update(Films, api.films)
-    update_relations(api)
+    metrics = SyncMetrics()
+    try:
+        if settings.GSTUDIO_SYNC_ADAPTIVE:
+            result = _run_adaptive(metrics, chain)
+        else:
+            result = _run(metrics)
+    except Exception:
+        metrics.incr("errors")
+        emit(metrics.as_dict())
+        raise
 
-    return {"people": len(api.people) if api.people else 0,
-            "films": len(api.films) if api.films else 0}
+    result["metrics"] = metrics.as_dict()
+    emit(result["metrics"])
+    return result
@@ -0,0 +1,85 @@
+import os
+import random
+import threading
+from itertools import takewhile
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+__all__ = ["JitteredRetry", "create_session", "get_session", ]
+
+
+# statuses of responses which are worth to retry
+RETRY_STATUSES = (500, 502, 503, 504, )
+
+
+class JitteredRetry(Retry):
+    """
+    Retry policy with exponential backoff randomized by "equal jitter": the
+    delay before n-th retry is a random value between the half and the whole
+    of `backoff_factor * 2 ** (n - 1)`. Thus retries of many clients failed
+    at the same time don't hit the server simultaneously
+    """
+    def get_backoff_time(self) -> float:
+        consecutive_errors = len(list(takewhile(
+            lambda x: x.redirect_location is None, reversed(self.history))))
+        if not consecutive_errors:
+            return 0
+
+        backoff = min(self.BACKOFF_MAX, self.backoff_factor *
+                      (2 ** (consecutive_errors - 1)))
+        return random.uniform(backoff / 2, backoff)
+
+
+def create_session(retries: int = 3, backoff: float = 0.5,
+                   pool_size: int = 10) -> Session:
+    """
+    Creates HTTP session which retries failed connections and responses with
+    5xx statuses
+
+    :param retries: max number of retries of a single request
+    :param backoff: base delay (seconds) between retries
+    :param pool_size: max number of kept-alive connections per host. It's
+                      supposed to be not less than number of threads that
+                      use the session concurrently
+
+    :return:
+    """
+    retry = JitteredRetry(total=retries, connect=retries, read=retries,
+                          status=retries, status_forcelist=RETRY_STATUSES,
+                          backoff_factor=backoff, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                          max_retries=retry)
+
+    session = Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(retries: int = 3, backoff: float = 0.5,
+                pool_size: int = 10) -> Session:
+    """
+    Returns HTTP session (see `create_session`) shared by the current
+    process, thus kept-alive connections are reused between runs of tasks.
+    Sessions aren't inherited by forked processes
+
+    :param retries: max number of retries of a single request
+    :param backoff: base delay (seconds) between retries
+    :param pool_size: max number of kept-alive connections per host
+
+    :return:
+    """
+    key = (os.getpid(), retries, backoff, pool_size)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = create_session(retries, backoff,
+                                                      pool_size)
+        return session
@@ -1,7 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import FilmsView
+from .views import FilmsView, AsyncFilmsView, SyncMetricsView
+from .api_views import FilmsListView, FilmsDetailView, FilmsExportView, \
+    PeopleListView, PeopleDetailView, PeopleExportView, AsyncFilmsListView, \
+    AsyncFilmsDetailView, AsyncPeopleListView, AsyncPeopleDetailView
+
+
+# async versions of the read path are used by ASGI servers
+films_view, films_list_view, film_view, people_list_view, person_view = (
+    (AsyncFilmsView, AsyncFilmsListView, AsyncFilmsDetailView,
+     AsyncPeopleListView, AsyncPeopleDetailView)
+    if settings.GSTUDIO_ASYNC_VIEWS else
+    (FilmsView, FilmsListView, FilmsDetailView, PeopleListView,
+     PeopleDetailView))
 
 
 urlpatterns = [
-    path("", FilmsView.as_view(), name="films"),
+    path("", films_view.as_view(), name="films"),
+    path("metrics/sync", SyncMetricsView.as_view(), name="sync-metrics"),
+    path("api/films", films_list_view.as_view(), name="api-films"),
+    path("api/films/export", FilmsExportView.as_view(),
+         name="api-films-export"),
+    path("api/films/<uuid:pk>", film_view.as_view(), name="api-film"),
+    path("api/people", people_list_view.as_view(), name="api-people"),
+    path("api/people/export", PeopleExportView.as_view(),
+         name="api-people-export"),
+    path("api/people/<uuid:pk>", person_view.as_view(), name="api-person"),
 ]
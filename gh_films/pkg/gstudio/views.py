@@ -1,15 +1,322 @@
-from django.views.generic.base import TemplateView
+import time
+from datetime import datetime
+from functools import update_wrapper
+from hashlib import sha1
+from typing import Tuple, Iterator, Union
 
-from gh_films.pkg.gstudio.models import Films
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, \
+    FileResponse
+from django.template.loader import render_to_string
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.generic.base import TemplateView, View
 
+from gh_films.pkg.gstudio.compression import negotiate, is_compressible, \
+    compress, encode_response
+from gh_films.pkg.gstudio.dataset import get_cache, get_state
+from gh_films.pkg.gstudio.filters import FilterError, get_filters, \
+    filter_films
+from gh_films.pkg.gstudio.metrics import render_prometheus
+from gh_films.pkg.gstudio.middleware import count_queries
+from gh_films.pkg.gstudio.models import Films, FilmsSummary
+from gh_films.pkg.gstudio.snapshot import get_file
+from gh_films.pkg.gstudio.web_metrics import render_web_metrics
+from gh_films.version import VERSION
 
-__all__ = ["FilmsView", ]
 
+__all__ = ["FilmsView", "AsyncFilmsView", "SyncMetricsView", "MetricsView",
+           "DatasetCacheMixin", "SnapshotMixin", "AsyncViewMixin",
+           "dataset_condition", ]
 
-class FilmsView(TemplateView):
+
+def _get_dataset_state(request) -> Tuple[int, datetime]:
+    """
+    Returns state of the dataset (see `get_state`) which is requested once
+    per request
+
+    :param request:
+
+    :return: (version, modified)
+    """
+    try:
+        return request.gstudio_dataset_state
+    except AttributeError:
+        request.gstudio_dataset_state = get_state()
+        return request.gstudio_dataset_state
+
+
+def _get_etag(request, *args, **kwargs) -> str:
+    # the application's version is a part of ETag because representation of
+    # the same data may differ between releases
+    return f"{VERSION}-{_get_dataset_state(request)[0]}"
+
+
+def _get_last_modified(request, *args, **kwargs) -> datetime:
+    return _get_dataset_state(request)[1]
+
+
+# answers conditional requests by the dataset version (without any access to
+# the DB), thus it's supposed to wrap views which depend on the dataset only
+dataset_condition = condition(etag_func=_get_etag,
+                              last_modified_func=_get_last_modified)
+
+
+class DatasetCacheMixin(object):
+    """
+    Caches whole responses of GET requests until the dataset is changed by
+    the sync task (see `gh_films.pkg.gstudio.dataset`). Compressed content
+    is cached per encoding as well (see `gh_films.pkg.gstudio.compression`),
+    thus a page is compressed once per dataset version
+    """
+    cache_prefix = "gstudio.page"
+
+    def get_cache_key(self) -> str:
+        """
+        Returns cache key of the current request
+
+        :return:
+        """
+        path = self.request.get_full_path().encode("utf-8")
+        return f"{self.cache_prefix}:{sha1(path).hexdigest()}"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_cache_key()
+        version = _get_dataset_state(request)[0]
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        encoded_key = f"{key}:{encoding}"
+
+        # both entries are requested at once, the compressed one is missed
+        # until the first request which accepts its encoding
+        cached = cache.get_many([key, encoded_key] if encoding else [key],
+                                version=version)
+        # result of the lookup is measured by `MetricsMiddleware`
+        request.gstudio_page_cache = "hit" if cached else "miss"
+        if encoded_key in cached:
+            content, content_type = cached[encoded_key]
+            response = HttpResponse(content_type=content_type)
+            encode_response(response, encoding, content)
+            return response
+        if key in cached:
+            content, content_type = cached[key]
+            response = HttpResponse(content, content_type=content_type)
+            if is_compressible(response):
+                # the identity varies by the header as well
+                patch_vary_headers(response, ("Accept-Encoding", ))
+                if encoding:
+                    self._encode(response, encoding, encoded_key, version)
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        def _store(resp):
+            cache.set(key, (resp.content, resp["Content-Type"]),
+                      settings.GSTUDIO_PAGE_CACHE_TIMEOUT, version=version)
+            if is_compressible(resp):
+                patch_vary_headers(resp, ("Accept-Encoding", ))
+                if encoding:
+                    self._encode(resp, encoding, encoded_key, version)
+
+        if getattr(response, "is_rendered", True):
+            _store(response)
+        else:
+            response.add_post_render_callback(_store)
+
+        return response
+
+    @staticmethod
+    def _encode(response, encoding: str, key: str, version: int) -> None:
+        """
+        Compresses the response by the best level and caches the result
+
+        :param response: response which content is cached already
+        :param encoding:
+        :param key: cache key of the compressed content
+        :param version: version of the dataset
+        """
+        content = compress(response.content, encoding, best=True)
+        get_cache().set(key, (content, response["Content-Type"]),
+                        settings.GSTUDIO_PAGE_CACHE_TIMEOUT, version=version)
+        encode_response(response, encoding, content)
+
+
+class SnapshotMixin(object):
+    """
+    Serves the page from the static snapshot (see
+    `gh_films.pkg.gstudio.snapshot`) while it's published for the current
+    version of the dataset. Requests with query parameters and requests
+    without the current snapshot are processed by the view itself
+    """
+    snapshot_content_type = "text/html; charset=utf-8"
+
+    @classmethod
+    def render_snapshot(cls) -> Tuple[str, Iterator[Union[str, bytes]]]:
+        """
+        Renders the page the same way as for GET request without parameters
+
+        :return: (content type, iterator of pieces of the content)
+        """
+        view = cls()
+        view.setup(HttpRequest())
+        return cls.snapshot_content_type, view.iter_snapshot()
+
+    def iter_snapshot(self) -> Iterator[Union[str, bytes]]:
+        """
+        Returns content of the page for the snapshot
+
+        :return:
+        """
+        raise NotImplementedError()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in ("GET", "HEAD") and not request.GET:
+            found = get_file(request.path, _get_dataset_state(request)[0],
+                             request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            if found is not None:
+                path, content_type, encoding = found
+                try:
+                    fp = open(path, "rb")
+                except OSError:
+                    # the snapshot is being removed or replaced by a broken
+                    # one, thus the page is rendered live
+                    pass
+                else:
+                    # served pages are measured by `MetricsMiddleware`
+                    request.gstudio_page_cache = "snapshot"
+                    response = FileResponse(fp)
+                    # FileResponse of Django 3.1 guesses type of HTML files
+                    # by their names and marks them as named files
+                    response["Content-Type"] = content_type
+                    del response["Content-Disposition"]
+                    if encoding is not None:
+                        response["Content-Encoding"] = encoding
+                        patch_vary_headers(response, ("Accept-Encoding", ))
+                    return response
+
+        return super().dispatch(request, *args, **kwargs)
+
+
+class AsyncViewMixin(object):
+    """
+    Makes the view native for ASGI servers (see `GSTUDIO_ASYNC_VIEWS`
+    setting). Django 3.1 has neither async ORM nor async cache, thus the
+    whole request (conditional checks, cached pages, queries and rendering)
+    is processed by a single call in the thread pool. Otherwise ASGI handler
+    runs every sync view in the same thread, i.e. one request at a time
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        # Django 3.1 detects async views by their functions only
+        async def async_view(request, *args, **kwargs):
+            return await sync_to_async(view, thread_sensitive=False)(
+                request, *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return async_view
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Processes the request by the sync view in a thread of the pool.
+        Connections to the DB belong to threads, thus they're closed the same
+        way as after sync requests (see `CONN_MAX_AGE` setting)
+        """
+        close_old_connections()
+        try:
+            with count_queries(request):
+                response = super().dispatch(request, *args, **kwargs)
+                if isinstance(response, SimpleTemplateResponse):
+                    response = self._render(request, response)
+            return response
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def _render(request, response: SimpleTemplateResponse) -> HttpResponse:
+        """
+        Renders the template in the current thread, otherwise ASGI handler
+        renders it (and calls template middleware) in the shared thread
+
+        :return: rendered response without template
+        """
+        started = time.perf_counter()
+        response.render()
+        request.gstudio_render_seconds = time.perf_counter() - started
+
+        rendered = HttpResponse(response.content,
+                                status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+
+@method_decorator(dataset_condition, name="dispatch")
+class FilmsView(SnapshotMixin, DatasetCacheMixin, TemplateView):
+    """
+    Page of films which may be filtered by query parameters (see
+    `gh_films.pkg.gstudio.filters`). The page without filters is a part of
+    the static snapshot
+    """
     template_name = "films.html"
 
+    def get(self, request, *args, **kwargs):
+        try:
+            self.filters = get_filters(request.GET)
+        except FilterError as err:
+            return HttpResponseBadRequest(str(err))
+
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data()
-        context["films"] = Films.objects.prefetch_related().all()
+        # films with names of their people are precomputed by the sync task
+        summary = FilmsSummary.objects
+        if self.filters:
+            summary = summary.filter(
+                film__in=filter_films(Films.objects.all(), self.filters))
+        context["films"] = summary.values("title", "people")
+        context["filters"] = self.filters
         return context
+
+    def iter_snapshot(self) -> Iterator[str]:
+        self.filters = {}
+        yield render_to_string(self.get_template_names(),
+                               self.get_context_data())
+
+
+class AsyncFilmsView(AsyncViewMixin, FilmsView):
+    pass
+
+
+class SyncMetricsView(View):
+    """
+    Exposes metrics of the latest sync in Prometheus text format (they are
+    stored by `gh_films.pkg.gstudio.metrics.PrometheusSink`)
+    """
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_prometheus(),
+                            content_type="text/plain; version=0.0.4; "
+                                         "charset=utf-8")
+
+
+class MetricsView(View):
+    """
+    Exposes metrics of web requests of all processes (see
+    `gh_films.pkg.gstudio.web_metrics`) and of the latest sync in Prometheus
+    text format. Access to it is supposed to be restricted by the proxy
+    """
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_web_metrics() + render_prometheus(),
+                            content_type="text/plain; version=0.0.4; "
+                                         "charset=utf-8")
@@ -0,0 +1,285 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from glob import glob
+from typing import Dict, Any, Iterable, Tuple, List
+
+from django.conf import settings
+
+
+__all__ = ["DURATION_BUCKETS", "QUERIES_BUCKETS", "METRICS", "Recorder",
+           "get_recorder", "format_labels", "merge", "collect",
+           "render_web_metrics", ]
+
+
+# Metrics of web requests (see `gh_films.pkg.gstudio.middleware`). Every
+# process keeps its own values in memory and periodically dumps them into its
+# own file of the directory shared by all processes (see
+# `GSTUDIO_WEB_METRICS_DIR` setting), and the metrics endpoint sums the
+# files. Thus there's no state shared between processes, and a request costs
+# a few updates of dicts only
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0)
+QUERIES_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+# {"name": (type, description, buckets of histogram), ...}
+METRICS = OrderedDict([
+    ("gstudio_http_requests_total",
+     ("counter", "Number of requests.", None)),
+    ("gstudio_http_request_duration_seconds",
+     ("histogram", "Duration of requests (until the first byte of streaming "
+                   "responses).", DURATION_BUCKETS)),
+    ("gstudio_http_db_queries",
+     ("histogram", "Number of DB queries per request.", QUERIES_BUCKETS)),
+    ("gstudio_http_db_duration_seconds",
+     ("histogram", "Duration of DB queries per request.", DURATION_BUCKETS)),
+    ("gstudio_http_template_render_seconds",
+     ("histogram", "Duration of rendering of templates.", DURATION_BUCKETS)),
+    ("gstudio_http_page_cache_total",
+     ("counter",
+      "Lookups of cached pages by result (hit, miss or snapshot).", None)),
+])
+
+# values: {"name": {"labels": value, ...}, ...}, where value of histogram is
+# [count of bucket, ..., count of +Inf bucket, sum] (counts aren't cumulative)
+_Values = Dict[str, Dict[str, Any]]
+
+_logger = logging.getLogger("gstudio.metrics")
+
+
+def format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """
+    Returns labels in Prometheus text format (without braces)
+
+    :param labels: ((name, value), ...)
+
+    :return: e.g. 'view="films",method="GET"'
+    """
+    def _escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"") \
+            .replace("\n", "\\n")
+
+    return ",".join(f"{name}=\"{_escape(value)}\"" for name, value in labels)
+
+
+class Recorder(object):
+    """
+    Keeps metrics of the current process
+    """
+    def __init__(self, directory: str = "", flush_interval: float = 1):
+        """
+
+        :param directory: directory shared by all processes or empty string
+                          to keep metrics in memory only (a single process)
+        :param flush_interval: min interval (seconds) between dumps of
+                               metrics into the file
+        """
+        self._path = os.path.join(directory, f"web-{os.getpid()}.json") \
+            if directory else None
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._values = {}
+        self._flushed = time.monotonic()
+        self._dirty = False
+
+        if self._path:
+            # the file is left by a dead process with the same pid, its values
+            # are continued thus counters don't go back
+            try:
+                with open(self._path, "r") as fp:
+                    self._values = json.load(fp)
+            except (OSError, ValueError):
+                pass
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def record(self, increments: Iterable[Tuple[str, str, float]] = (),
+               observations: Iterable[Tuple[str, str, float]] = ()) -> None:
+        """
+        Updates metrics by results of a single request
+
+        :param increments: ((counter_name, labels, value), ...)
+        :param observations: ((histogram_name, labels, value), ...)
+        """
+        with self._lock:
+            for name, labels, value in increments:
+                series = self._values.setdefault(name, {})
+                series[labels] = series.get(labels, 0) + value
+
+            for name, labels, value in observations:
+                buckets = METRICS[name][2]
+                series = self._values.setdefault(name, {})
+                counts = series.get(labels)
+                if counts is None:
+                    counts = series[labels] = [0] * (len(buckets) + 2)
+                counts[bisect_left(buckets, value)] += 1
+                counts[-1] += value
+
+            self._dirty = True
+
+        if self._path and \
+                time.monotonic() - self._flushed >= self._flush_interval:
+            self.flush()
+
+    def snapshot(self) -> _Values:
+        """
+        Returns a copy of metrics of the process
+
+        :return:
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._values))
+
+    def flush(self) -> None:
+        """
+        Dumps metrics into the file of the process (atomically, thus readers
+        never see a partially written file). It's skipped if another thread
+        is dumping them already. Failures are logged only, because metrics
+        must not break requests
+        """
+        if not self._path or not self._flush_lock.acquire(blocking=False):
+            return
+
+        try:
+            with self._lock:
+                if not self._dirty:
+                    return
+                content = json.dumps(self._values)
+                self._dirty = False
+                self._flushed = time.monotonic()
+
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as fp:
+                fp.write(content)
+            os.replace(tmp_path, self._path)
+        except OSError as err:
+            _logger.warning(f"Can't dump metrics into \"{self._path}\" due "
+                            f"to \"{str(err)}\"")
+        finally:
+            self._flush_lock.release()
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder() -> Recorder:
+    """
+    Returns recorder of the current process configured by
+    `GSTUDIO_WEB_METRICS_DIR` and `GSTUDIO_WEB_METRICS_FLUSH_INTERVAL`
+    settings. Recorders aren't inherited by forked processes
+
+    :return:
+    """
+    directory = settings.GSTUDIO_WEB_METRICS_DIR
+    key = (os.getpid(), directory)
+    with _recorders_lock:
+        recorder = _recorders.get(key)
+        if recorder is None:
+            recorder = _recorders[key] = Recorder(
+                directory, settings.GSTUDIO_WEB_METRICS_FLUSH_INTERVAL)
+            atexit.register(recorder.flush)
+        return recorder
+
+
+def merge(values: Iterable[_Values]) -> _Values:
+    """
+    Sums metrics of many processes
+
+    :param values:
+
+    :return:
+    """
+    result = {}
+    for item in values:
+        for name, series in item.items():
+            if name not in METRICS:
+                # the metric was removed by newer release
+                continue
+
+            merged = result.setdefault(name, {})
+            for labels, value in series.items():
+                if isinstance(value, list):
+                    current = merged.get(labels)
+                    if current is None or len(current) != len(value):
+                        merged[labels] = list(value)
+                    else:
+                        merged[labels] = [a + b for a, b in
+                                          zip(current, value)]
+                else:
+                    merged[labels] = merged.get(labels, 0) + value
+    return result
+
+
+def collect() -> _Values:
+    """
+    Returns metrics of all processes: files of the shared directory or
+    metrics of the current process only if there's no such directory
+
+    :return:
+    """
+    recorder = get_recorder()
+    if not recorder.path:
+        return recorder.snapshot()
+
+    recorder.flush()
+
+    values = []
+    for path in sorted(glob(os.path.join(os.path.dirname(recorder.path),
+                                         "web-*.json"))):
+        try:
+            with open(path, "r") as fp:
+                values.append(json.load(fp))
+        except (OSError, ValueError):
+            # the file is removed by cleanup of the directory
+            continue
+    return merge(values)
+
+
+def _render_histogram(name: str, series: Dict[str, List[float]],
+                      buckets: Tuple[float, ...]) -> List[str]:
+    lines = []
+    for labels, counts in sorted(series.items()):
+        prefix = f"{labels}," if labels else ""
+        total = 0
+        for bound, count in zip(buckets + ("+Inf", ), counts):
+            total += count
+            lines.append(f"{name}_bucket{{{prefix}le=\"{bound}\"}} {total}")
+        lines.append(f"{name}_sum{{{labels}}} {counts[-1]}")
+        lines.append(f"{name}_count{{{labels}}} {total}")
+    return lines
+
+
+def render_web_metrics() -> str:
+    """
+    Renders metrics of web requests of all processes in Prometheus text
+    exposition format
+
+    :return:
+    """
+    values = collect()
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        series = values.get(name)
+        if not series:
+            continue
+
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            lines.extend(_render_histogram(name, series, buckets))
+        else:
+            lines.extend(f"{name}{{{labels}}} {value}"
+                         for labels, value in sorted(series.items()))
+
+    return "\n".join(lines) + "\n" if lines else ""
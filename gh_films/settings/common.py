@@ -42,11 +42,14 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'django.contrib.staticfiles',
-    'gh_films.pkg.gstudio',
+    'gh_films.pkg.gstudio.apps.GStudioConfig',
 ]
 
 MIDDLEWARE = [
+    'gh_films.pkg.gstudio.middleware.MetricsMiddleware',
+    'gh_films.pkg.gstudio.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -108,9 +111,149 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_BEAT_SCHEDULE = {
     # the time gap  between updating remote and local data should be less than
-    # 1 minute
+    # 1 minute (in the adaptive mode the gap is limited by
+    # `GSTUDIO_SYNC_MAX_INTERVAL` setting, see below)
     "update-movies-every-55-seconds": {
         "task": "gh_films.pkg.gstudio.tasks.update_movies",
         "schedule": 55.0,
     }
 }
+
+
+# Caches
+# the cache is shared by celery workers and web server processes (on the same
+# host), see `GSTUDIO_CACHE` below. Use a shared server (e.g. Redis) if they
+# are run on several hosts
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+    }
+}
+
+
+# Gstudio
+# alias of the cache (see `CACHES`) used to keep validators (ETag,
+# Last-Modified etc) of upstream responses between runs of the
+# "update_movies" task. It's supposed to be shared between all celery workers
+# (it's verified by the "gstudio.E001" system check)
+GSTUDIO_VALIDATORS_CACHE = "default"
+
+# alias of the cache (see `CACHES`) used to keep version of the dataset and
+# rendered pages. It's supposed to be shared between celery workers and web
+# server processes, otherwise pages aren't invalidated after the sync (it's
+# verified by the "gstudio.E001" system check)
+GSTUDIO_CACHE = "default"
+
+# max lifetime (seconds) of cached pages or None to keep them until the
+# dataset is changed
+GSTUDIO_PAGE_CACHE_TIMEOUT = None
+
+# subsets of fields (per model) used to calculate checksum of upstream records
+# to detect their changes. All fields are used for models not listed here
+GSTUDIO_CHECKSUM_FIELDS = {
+    "gstudio.people": ["name", "gender", "age", "eye_color", "hair_color"],
+    "gstudio.films": ["title", "description", "director", "producer",
+                      "release_date", "rt_score"],
+}
+
+# whether to delete local records which were removed from upstream
+GSTUDIO_SYNC_DELETE_MISSING = False
+
+# max number of records written by a single transaction during the sync
+GSTUDIO_SYNC_BATCH_SIZE = 500
+
+# whether to parse upstream responses incrementally (while downloading) to
+# keep memory usage of celery workers low on large catalogs
+GSTUDIO_STREAM_API = False
+
+# (connect, read) timeouts (seconds) of requests to upstream
+GSTUDIO_HTTP_TIMEOUT = (5, 30)
+
+# max number of retries of failed requests to upstream (connection errors,
+# timeouts and 5xx statuses) and the base delay (seconds) between them. The
+# delay grows exponentially with random jitter
+GSTUDIO_HTTP_RETRIES = 3
+GSTUDIO_HTTP_BACKOFF = 0.5
+
+# max number of kept-alive connections to upstream per worker process
+GSTUDIO_HTTP_POOL_SIZE = 10
+
+# url of the Redis server which keeps the lock preventing concurrent runs of
+# the "update_movies" task (e.g. overlapped runs of celery beat or manual
+# runs). The lock is kept in the DB if it's empty
+GSTUDIO_SYNC_LOCK_URL = ""
+
+# lifetime (seconds) of the lock. It's supposed to be longer than any run of
+# the task, otherwise the lock expires and the next run isn't prevented
+GSTUDIO_SYNC_LOCK_TTL = 600
+
+# max time (seconds) to wait for the lock held by the another run. The task
+# is skipped if the lock isn't acquired in time
+GSTUDIO_SYNC_LOCK_WAIT = 0
+
+# whether the "update_movies" task schedules itself adaptively: once
+# `GSTUDIO_SYNC_BACKOFF_AFTER` syncs in a row don't find any changes, the
+# interval between syncs grows from `GSTUDIO_SYNC_INTERVAL` by
+# `GSTUDIO_SYNC_BACKOFF_FACTOR` times per sync up to
+# `GSTUDIO_SYNC_MAX_INTERVAL`; it drops to the base value after a change.
+# The ceiling is the max delay between changes of upstream and local data
+# (freshness), thus it keeps the 1 minute gap by default; a higher one saves
+# requests to upstream at the cost of the gap. Celery beat only restarts the
+# broken schedule (e.g. after restart of the worker) in this mode
+GSTUDIO_SYNC_ADAPTIVE = False
+GSTUDIO_SYNC_INTERVAL = 15
+GSTUDIO_SYNC_MAX_INTERVAL = 55
+GSTUDIO_SYNC_BACKOFF_AFTER = 3
+GSTUDIO_SYNC_BACKOFF_FACTOR = 2
+
+# sinks of metrics of the "update_movies" task (durations of phases, numbers
+# of records, downloaded bytes and DB queries), e.g.
+# "gh_films.pkg.gstudio.metrics.StatsdSink" to send them to statsd server or
+# "gh_films.pkg.gstudio.metrics.PrometheusSink" to expose them by
+# "/movies/metrics/sync" url
+GSTUDIO_METRICS_SINKS = [
+    "gh_films.pkg.gstudio.metrics.LoggingSink",
+]
+
+# (host, port) of statsd-compatible server and prefix of metrics' names
+GSTUDIO_STATSD_ADDRESS = ("localhost", 8125)
+GSTUDIO_STATSD_PREFIX = "gstudio.sync"
+
+# directory shared by all web server processes (WSGI/ASGI workers) to
+# collect metrics of requests exposed by "/metrics" url. Every process dumps
+# its metrics into its own file at most once per
+# `GSTUDIO_WEB_METRICS_FLUSH_INTERVAL` seconds. The directory is supposed to
+# be cleaned before start of the server (e.g. to be a tmpfs) and to be
+# writable by its processes. Metrics are kept per process if it's empty
+GSTUDIO_WEB_METRICS_DIR = ""
+GSTUDIO_WEB_METRICS_FLUSH_INTERVAL = 1
+
+# whether the page and JSON API (except of exports) are served by async
+# views. It's supposed to be enabled for ASGI servers only: each request is
+# processed by a single call in the thread pool instead of the thread shared
+# by all sync views. Under WSGI async views only add an event loop per request
+GSTUDIO_ASYNC_VIEWS = False
+
+# encodings of responses in order of preference (see
+# `gh_films.pkg.gstudio.compression`): "br" and "zstd" are used only if
+# "brotli" and "zstandard" packages are installed. Responses smaller than
+# `GSTUDIO_COMPRESSION_MIN_SIZE` bytes aren't compressed
+GSTUDIO_COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+GSTUDIO_COMPRESSION_MIN_SIZE = 200
+
+# directory of the static snapshot of the page of films and exports of JSON
+# API (with precompressed ".gz" and ".br" variants, the latter requires
+# "brotli" package). The "update_movies" task publishes it once the dataset
+# is changed, thus the web server may serve these urls from it (e.g. nginx
+# `try_files`) while views serve it when it's current and render pages live
+# otherwise. The directory is supposed to be writable by celery workers and
+# readable by web server processes. The snapshot isn't published if it's empty
+GSTUDIO_SNAPSHOT_DIR = ""
+
+# default and max number of entries per page of JSON API
+GSTUDIO_API_PAGE_SIZE = 100
+GSTUDIO_API_MAX_PAGE_SIZE = 1000
+
+# number of entries loaded by a single query while exporting via JSON API
+GSTUDIO_API_EXPORT_CHUNK_SIZE = 500
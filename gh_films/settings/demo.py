@@ -17,4 +17,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+    }
+}
+
 CELERY_BROKER_URL = "redis://localhost:6379"
+GSTUDIO_SYNC_LOCK_URL = CELERY_BROKER_URL
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from gh_films.pkg.gstudio.views import AsyncFilmsView
+from gh_films.pkg.gstudio.api_views import AsyncFilmsListView, \
+    AsyncFilmsDetailView, AsyncPeopleDetailView
+
+
+__all__ = ["urlpatterns", ]
+
+
+# the read path with async views (see `GSTUDIO_ASYNC_VIEWS` setting)
+urlpatterns = [
+    path("movies/", AsyncFilmsView.as_view(), name="films"),
+    path("movies/api/films", AsyncFilmsListView.as_view(), name="api-films"),
+    path("movies/api/films/<uuid:pk>", AsyncFilmsDetailView.as_view(),
+         name="api-film"),
+    path("movies/api/people/<uuid:pk>", AsyncPeopleDetailView.as_view(),
+         name="api-person"),
+]
@@ -0,0 +1,130 @@
+import re
+from typing import Dict, Set, Iterable, Union, Tuple, Any
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+
+__all__ = ["QueryPlanMixin", "explain", "get_scans", ]
+
+
+# access to tables in plans of SQLite ("SCAN|SEARCH [TABLE] <table> ...") and
+# PostgreSQL ("Seq Scan on <table>", "Index Scan using <index> on <table>")
+_SQLITE_ACCESS = re.compile(r"\b(SCAN|SEARCH)(?: TABLE)? (\w+)(.*)")
+_POSTGRES_ACCESS = re.compile(
+    r"\b(Seq Scan|Index Scan|Index Only Scan|Bitmap Heap Scan)"
+    r"(?: using \w+)? on (\w+)")
+
+# aliases of tables in subqueries (e.g. `FROM "gstudio_films" U0`)
+_ALIAS = re.compile(r"\b(?:FROM|JOIN) \"(\w+)\" (\w+)")
+
+
+def explain(sql: str, params: Iterable[Any] = None) -> str:
+    """
+    Returns plan of the query. Sequential scans are disabled on PostgreSQL,
+    because they're cheaper for tiny tables of tests, thus only queries
+    which can't use any index are planned with them
+
+    :param sql:
+    :param params: parameters of the query or None for interpolated query
+
+    :return: plan as text (a line per node)
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}",
+                       params)
+        return "\n".join(" ".join(str(col) for col in row)
+                         for row in cursor.fetchall())
+
+
+def get_scans(plan: str, sql: str = "") -> Dict[str, Set[str]]:
+    """
+    Returns kinds of access to tables by the plan
+
+    :param plan: see `explain`
+    :param sql: the query to resolve aliases of tables
+
+    :return: {"table": {"index", "covering" or "full", ...}, ...}, where
+             "covering" is a search by the index without access to the table
+    """
+    aliases = {alias: table for table, alias in _ALIAS.findall(sql)}
+    scans = {}
+    for line in plan.splitlines():
+        if connection.vendor == "postgresql":
+            match = _POSTGRES_ACCESS.search(line)
+            if not match:
+                continue
+            kind = {"Seq Scan": "full",
+                    "Index Only Scan": "covering"}.get(match.group(1),
+                                                       "index")
+        else:
+            # "SCAN <table> USING COVERING INDEX" reads the whole index,
+            # "SCAN <table> VIRTUAL TABLE INDEX 0:M1" is a lookup of FTS
+            match = _SQLITE_ACCESS.search(line)
+            if not match:
+                continue
+            rest = match.group(3)
+            if match.group(1) == "SCAN":
+                kind = "index" if "VIRTUAL TABLE INDEX" in rest and \
+                    rest.partition(":")[2].strip() else "full"
+            elif "COVERING INDEX" in rest:
+                kind = "covering"
+            else:
+                kind = "index"
+        table = aliases.get(match.group(2), match.group(2))
+        scans.setdefault(table, set()).add(kind)
+    return scans
+
+
+class QueryPlanMixin(object):
+    """
+    Assertions of query plans for `TestCase`
+    """
+    def assertIndexScans(self, query: Union[QuerySet, Tuple[str, Any]],
+                         tables: Iterable[str] = None,
+                         covering: bool = False) -> None:
+        """
+        Asserts that tables are accessed by the query via indexes only
+
+        :param query: queryset or (sql, params)
+        :param tables: names of tables to check or None to check all
+        :param covering: whether tables shouldn't be accessed at all (all
+                         columns are read from indexes)
+        """
+        if isinstance(query, QuerySet):
+            query = query.query.sql_with_params()
+
+        plan = explain(*query)
+        scans = get_scans(plan, query[0])
+        self.assertTrue(scans, f"Unknown format of plan:\n{plan}")
+
+        for table in (tables or scans):
+            self.assertIn(table, scans, f"{table} isn't accessed:\n{plan}")
+            self.assertNotIn("full", scans[table],
+                             f"{table} is scanned fully:\n{plan}")
+            if covering:
+                self.assertSetEqual({"covering"}, scans[table],
+                                    f"{table} is accessed:\n{plan}")
+
+    def assertRequestIndexScans(self, url: str, tables: Iterable[str]):
+        """
+        Asserts that queries made by the request access tables via indexes
+        only (queries which don't refer to them aren't checked)
+
+        :param url:
+        :param tables: names of tables to check
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(200, self.client.get(url).status_code)
+
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+
+            checked = [t for t in tables if f'"{t}"' in sql]
+            if checked:
+                self.assertIndexScans((sql, None), checked)
@@ -83,3 +83,64 @@ class TestRelations(TestCase):
         relations_qs = Films.people.through.objects.all()
         result = {(str(r.films_id), str(r.people_id)) for r in relations_qs}
         self.assertSequenceEqual(expected, result)
+
+    @unpack
+    @data(*_fx_relations)
+    def test_unchanged_relations_should_not_be_written(self, api_data, _):
+        api = MagicMock(people=api_data)
+        update_relations(api)
+
+        # people, films and stored relations are read only
+        with self.assertNumQueries(3):
+            stats = update_relations(api)
+
+        self.assertDictEqual({"added": 0, "removed": 0, "failed": 0}, stats)
+
+    @unpack
+    @data(*_fx_relations)
+    def test_only_difference_should_be_written(self, api_data, expected):
+        update_relations(MagicMock(people=api_data))
+
+        # the first person leaves the second film
+        changed = [dict(p, films=list(p["films"])) for p in api_data]
+        removed_film = changed[0]["films"].pop()
+        stats = update_relations(MagicMock(people=changed))
+
+        self.assertDictEqual({"added": 0, "removed": 1, "failed": 0}, stats)
+
+        relations_qs = Films.people.through.objects.all()
+        result = {(str(r.films_id), str(r.people_id)) for r in relations_qs}
+        self.assertSetEqual(
+            expected - {(removed_film, changed[0]["id"])}, result)
+
+    @unpack
+    @data(*_fx_relations)
+    def test_last_link_of_film_should_be_removed(self, api_data, expected):
+        update_relations(MagicMock(people=api_data))
+
+        # nobody else refers to the first film
+        changed = [dict(p, films=list(p["films"])) for p in api_data]
+        removed_film = changed[0]["films"].pop(0)
+        stats = update_relations(MagicMock(people=changed))
+
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(Films.people.through.objects.filter(
+            films_id=removed_film).exists())
+
+    @unpack
+    @data(*_fx_relations)
+    def test_links_to_unknown_records_should_be_skipped(self, api_data,
+                                                        expected):
+        unknown = "0440483e-ca0e-4120-8c50-4c8cd9b965d6"
+        changed = [dict(p, films=list(p["films"]) + [unknown])
+                   for p in api_data]
+        changed.append({"id": "5fdfb320-2a02-49a7-94ff-5ca418cae602",
+                        "films": [_fx_films[0]["id"]]})
+
+        stats = update_relations(MagicMock(people=changed))
+
+        relations_qs = Films.people.through.objects.all()
+        result = {(str(r.films_id), str(r.people_id)) for r in relations_qs}
+        self.assertSetEqual(expected, result)
+        self.assertEqual(len(expected), stats["added"])
+        self.assertEqual(0, stats["failed"])
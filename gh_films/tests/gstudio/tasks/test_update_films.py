@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from ddt import ddt, data, unpack
 
@@ -104,11 +106,78 @@ class TestUpdateFilms(TestCase):
 
     @unpack
     @data(*_fx_valid_films_for_update)
-    def test_saved_items_should_be_unchanged(self, api_data, stored, expected):
+    def test_saved_items_should_be_updated(self, api_data, stored, expected):
         Films.objects.create(**stored)
         update(Films, api_data)
 
         saved_films_qs = Films.objects.filter(pk__in=expected)
         self.assertEqual(len(expected), saved_films_qs.count())
         new_film = Films.objects.get(pk=stored["id"])
-        self.assertEqual(new_film.title, stored["title"])
+        self.assertEqual(new_film.title, api_data[1]["title"])
+
+    @unpack
+    @data(*_fx_valid_films)
+    def test_unchanged_items_should_be_skipped(self, api_data, expected_ids):
+        update(Films, api_data)
+        stats = update(Films, api_data)
+
+        self.assertEqual(len(expected_ids), stats["unchanged"])
+        self.assertEqual(0, stats["inserted"] + stats["updated"])
+
+    @unpack
+    @data(*_fx_valid_films)
+    def test_invalid_items_should_be_rejected(self, api_data, expected_ids):
+        stats = update(Films, api_data)
+
+        self.assertEqual(len(expected_ids), stats["inserted"])
+        self.assertEqual(len(api_data) - len(expected_ids), stats["rejected"])
+
+    @unpack
+    @data(*_fx_valid_films_for_update)
+    def test_missing_items_should_be_deleted(self, api_data, stored, expected):
+        Films.objects.create(**stored)
+        stats = update(Films, [f for f in api_data if f["id"] in expected],
+                       delete_missing=True)
+
+        self.assertEqual(1, stats["deleted"])
+        self.assertFalse(Films.objects.filter(pk=stored["id"]).exists())
+
+    @unpack
+    @data(*_fx_valid_films_for_update)
+    def test_missing_items_should_be_kept(self, api_data, stored, expected):
+        Films.objects.create(**stored)
+        update(Films, [f for f in api_data if f["id"] in expected],
+               delete_missing=False)
+
+        self.assertTrue(Films.objects.filter(pk=stored["id"]).exists())
+
+    @unpack
+    @data(*_fx_valid_films_for_update)
+    def test_items_should_be_kept_if_any_is_rejected(self, api_data, stored,
+                                                     expected):
+        Films.objects.create(**stored)
+        invalid = dict(stored, rt_score="unknown")
+        stats = update(Films, [f for f in api_data if f["id"] in expected] +
+                       [invalid], delete_missing=True)
+
+        self.assertEqual(1, stats["rejected"])
+        self.assertEqual(0, stats["deleted"])
+        self.assertTrue(Films.objects.filter(pk=stored["id"]).exists())
+
+    @unpack
+    @data(*_fx_valid_films)
+    def test_generator_should_be_written_by_chunks(self, api_data, expected):
+        stats = update(Films, (f for f in api_data), batch_size=1)
+
+        self.assertEqual(len(expected), Films.objects.count())
+        self.assertEqual(len(expected), len(stats["chunks"]))
+        self.assertTrue(all(c["records"] == 1 for c in stats["chunks"]))
+
+    @unpack
+    @data(*_fx_valid_films)
+    def test_each_chunk_should_be_written_by_transaction(self, api_data, _):
+        with patch("gh_films.pkg.gstudio.tasks.transaction") as trx:
+            update(Films, api_data, batch_size=1)
+            # records without release date are rejected before writing
+            chunks = len([r for r in api_data if "release_date" in r])
+            self.assertEqual(chunks, trx.atomic.call_count)
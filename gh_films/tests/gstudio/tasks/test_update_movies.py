@@ -1,33 +1,56 @@
+import json
 from unittest.mock import MagicMock, patch, ANY, call
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.db import Error
+from django.test import TestCase, override_settings
 
+from gh_films.pkg.gstudio import tasks
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.ghibli_api import GhibliApi
+from gh_films.pkg.gstudio.locks import get_lease
 from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.stub import StubServer
 from gh_films.pkg.gstudio.tasks import update_movies
 
-__all__ = ["TestUpdateMovies", ]
+__all__ = ["TestUpdateMovies", "TestUpdateMoviesUnchanged",
+           "TestUpdateMoviesNotModified", "TestUpdateMoviesLocked",
+           "TestUpdateMoviesAdaptive", "TestUpdateMoviesFailedWrite",
+           "TestUpdateMoviesInvalidBody", ]
 
 
+@override_settings(GSTUDIO_SYNC_LOCK_URL="")
 class TestUpdateMovies(TestCase):
     def setUp(self) -> None:
         path = "gh_films.pkg.gstudio.tasks"
 
-        self._api = MagicMock()
+        self._api = MagicMock(not_modified=False)
         self._api_cls = MagicMock(return_value=self._api)
         self._mk_update = MagicMock()
         self._mk_update_relations = MagicMock()
         self._logger = MagicMock()
+        self._mk_bump_version = MagicMock()
+        self._mk_update_summary = MagicMock()
+        self._mk_update_search = MagicMock()
+        self._mk_update_snapshot = MagicMock()
+        self._mk_emit = MagicMock()
 
         self._patchers = [
             patch(path + ".GhibliApi", self._api_cls),
             patch(path + ".update", self._mk_update),
             patch(path + ".update_relations", self._mk_update_relations),
             patch(path + "._logger", self._logger),
+            patch(path + ".bump_version", self._mk_bump_version),
+            patch(path + ".update_summary", self._mk_update_summary),
+            patch(path + ".update_search", self._mk_update_search),
+            patch(path + ".update_snapshot", self._mk_update_snapshot),
+            patch(path + ".emit", self._mk_emit),
         ]
 
         for item in self._patchers:
             item.start()
-        update_movies()
+        self._result = update_movies()
 
     def tearDown(self) -> None:
         for item in self._patchers:
@@ -37,15 +60,341 @@ class TestUpdateMovies(TestCase):
         self._api_cls.assert_called_once()
 
     def test_custom_logger_should_be_passed_into_api_instance(self):
-        self._api_cls.assert_called_once_with(self._logger)
+        self._api_cls.assert_called_once_with(self._logger, validators=ANY,
+                                              stream=ANY, session=ANY,
+                                              timeout=ANY,
+                                              extra_endpoints=ANY)
 
     def test_update_people_should_be_invoked(self):
-        calls = [call(People, self._api.people), ANY]
+        calls = [call(People, self._api.iter_people()), ANY]
         self._mk_update.assert_has_calls(calls, True)
 
     def test_update_films_should_be_invoked(self):
-        calls = [call(Films, self._api.films), ANY]
+        calls = [call(Films, self._api.iter_films()), ANY]
         self._mk_update.assert_has_calls(calls, True)
 
     def test_update_relations_should_be_invoked(self):
         self._mk_update_relations.assert_called_once_with(self._api)
+
+    def test_validators_should_be_saved_after_update(self):
+        self._api.save_validators.assert_called_once_with()
+
+    def test_dataset_version_should_be_bumped_after_changes(self):
+        self._mk_bump_version.assert_called_once_with()
+
+    def test_summary_should_be_updated_after_changes(self):
+        self._mk_update_summary.assert_called_once_with()
+
+    def test_search_index_should_be_updated_after_changes(self):
+        self._mk_update_search.assert_called_once_with()
+
+    def test_snapshot_should_not_be_published_without_directory(self):
+        self._mk_update_snapshot.assert_not_called()
+
+    def test_lock_metrics_should_be_reported(self):
+        self.assertFalse(self._result["skipped"])
+        self.assertGreaterEqual(self._result["lock_wait"], 0)
+        self.assertGreaterEqual(self._result["duration"], 0)
+
+    def test_metrics_should_be_reported(self):
+        metrics = self._result["metrics"]
+        self.assertIn("api", metrics["timings"])
+        self.assertIn("relations", metrics["timings"])
+        self.assertIn("relations_queries", metrics["counters"])
+
+    def test_metrics_should_be_emitted(self):
+        self._mk_emit.assert_called_once_with(self._result["metrics"])
+
+    def test_lock_should_be_released_after_sync(self):
+        self.assertTrue(get_lease("update_movies").acquire())
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="")
+class TestUpdateMoviesUnchanged(TestCase):
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+
+        stats = {"received": 1, "inserted": 0, "updated": 0, "deleted": 0,
+                 "failed": 0, "write_seconds": 0.0}
+        self._mk_bump_version = MagicMock()
+
+        self._patchers = [
+            patch(path + ".GhibliApi",
+                  MagicMock(return_value=MagicMock(not_modified=False))),
+            patch(path + ".update", MagicMock(return_value=stats)),
+            patch(path + ".update_relations",
+                  MagicMock(return_value={"added": 0, "removed": 0,
+                                          "failed": 0})),
+            patch(path + ".bump_version", self._mk_bump_version),
+        ]
+
+        for item in self._patchers:
+            item.start()
+        update_movies()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def test_dataset_version_should_not_be_bumped(self):
+        self._mk_bump_version.assert_not_called()
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="",
+                   GSTUDIO_SNAPSHOT_DIR="/var/www/gstudio")
+class TestUpdateMoviesNotModified(TestCase):
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+
+        self._api = MagicMock(not_modified=True)
+        self._mk_update = MagicMock()
+        self._mk_update_relations = MagicMock()
+        self._mk_update_snapshot = MagicMock(
+            return_value={"pages": 3, "files": 6, "bytes": 100})
+
+        self._patchers = [
+            patch(path + ".GhibliApi", MagicMock(return_value=self._api)),
+            patch(path + ".update", self._mk_update),
+            patch(path + ".update_relations", self._mk_update_relations),
+            patch(path + ".update_snapshot", self._mk_update_snapshot),
+        ]
+
+        for item in self._patchers:
+            item.start()
+        self._result = update_movies()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def test_update_should_be_skipped(self):
+        self._mk_update.assert_not_called()
+
+    def test_update_relations_should_be_skipped(self):
+        self._mk_update_relations.assert_not_called()
+
+    def test_nothing_should_be_reported_as_received(self):
+        self.assertEqual(0, self._result["people"])
+        self.assertEqual(0, self._result["films"])
+
+    def test_missing_snapshot_should_be_published(self):
+        self._mk_update_snapshot.assert_called_once_with()
+        self.assertEqual(3, self._result["metrics"]["counters"][
+            "snapshot_pages"])
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="", GSTUDIO_SYNC_LOCK_WAIT=0)
+class TestUpdateMoviesLocked(TestCase):
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+
+        self._api_cls = MagicMock()
+        self._patchers = [
+            patch(path + ".GhibliApi", self._api_cls),
+        ]
+
+        for item in self._patchers:
+            item.start()
+
+        # another run of the task is in progress
+        self._lease = get_lease("update_movies")
+        self._lease.acquire()
+        self._result = update_movies()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def test_sync_should_be_skipped(self):
+        self._api_cls.assert_not_called()
+
+    def test_skip_should_be_reported(self):
+        self.assertTrue(self._result["skipped"])
+        self.assertEqual(0, self._result["people"])
+        self.assertEqual(0, self._result["films"])
+
+    def test_lock_of_another_run_should_be_kept(self):
+        self.assertTrue(self._lease.release())
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="", GSTUDIO_SYNC_ADAPTIVE=True,
+                   GSTUDIO_SYNC_INTERVAL=10, GSTUDIO_SYNC_MAX_INTERVAL=100,
+                   GSTUDIO_SYNC_BACKOFF_AFTER=2,
+                   GSTUDIO_SYNC_BACKOFF_FACTOR=2)
+class TestUpdateMoviesAdaptive(TestCase):
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+        get_cache().clear()
+
+        self._mk_sync = MagicMock(return_value={"people": 1, "films": 1,
+                                                "changed": False})
+        self._mk_apply_async = MagicMock()
+
+        self._patchers = [
+            patch(path + "._sync", self._mk_sync),
+            patch.object(update_movies, "apply_async", self._mk_apply_async),
+        ]
+
+        for item in self._patchers:
+            item.start()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def _get_chain(self) -> str:
+        return self._mk_apply_async.call_args[1]["kwargs"]["chain"]
+
+    def test_run_by_beat_should_start_schedule(self):
+        result = update_movies()
+
+        self._mk_sync.assert_called_once_with(ANY)
+        self._mk_apply_async.assert_called_once_with(kwargs={"chain": ANY},
+                                                     countdown=10)
+        self.assertEqual(10, result["interval"])
+
+    def test_run_by_beat_should_be_skipped_while_schedule_is_alive(self):
+        update_movies()
+        self._mk_sync.reset_mock()
+
+        result = update_movies()
+
+        self._mk_sync.assert_not_called()
+        self.assertTrue(result["skipped"])
+
+    def test_interval_should_grow_while_data_is_unchanged(self):
+        update_movies()
+        for _ in range(3):
+            update_movies(chain=self._get_chain())
+
+        self.assertListEqual(
+            [10, 20, 40, 80],
+            [c[1]["countdown"] for c in self._mk_apply_async.call_args_list])
+
+    def test_interval_should_drop_after_change(self):
+        update_movies()
+        for _ in range(3):
+            update_movies(chain=self._get_chain())
+
+        self._mk_sync.return_value = {"people": 1, "films": 1,
+                                      "changed": True}
+        result = update_movies(chain=self._get_chain())
+
+        self.assertEqual(10, result["interval"])
+
+    def test_run_of_stale_chain_should_be_dropped(self):
+        update_movies()
+        self._mk_sync.reset_mock()
+        self._mk_apply_async.reset_mock()
+
+        result = update_movies(chain="stale")
+
+        self.assertTrue(result["skipped"])
+        self._mk_sync.assert_not_called()
+        self._mk_apply_async.assert_not_called()
+
+    def test_failed_run_should_be_rescheduled(self):
+        self._mk_sync.side_effect = RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            update_movies()
+
+        self._mk_apply_async.assert_called_once_with(kwargs={"chain": ANY},
+                                                     countdown=10)
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="", GSTUDIO_SYNC_ADAPTIVE=False)
+class TestUpdateMoviesFailedWrite(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls._server = StubServer(films=5, people=20)
+        cls._server.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._server.stop()
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+        caches[settings.GSTUDIO_VALIDATORS_CACHE].clear()
+        get_cache().clear()
+        self._server.reset()
+
+        api_cls = type("StubGhibliApi", (GhibliApi, ),
+                       {"BASE_URL": self._server.url})
+        self._patchers = [
+            patch(path + ".GhibliApi", api_cls),
+            patch(path + ".get_resources", MagicMock(return_value=[])),
+        ]
+
+        for item in self._patchers:
+            item.start()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def test_failed_chunk_should_be_refetched_by_next_run(self):
+        write_chunk = tasks._write_chunk
+
+        def _write_films_failed(model, chunk, update_fields):
+            if model is Films:
+                raise Error("database is locked")
+            return write_chunk(model, chunk, update_fields)
+
+        with patch.object(tasks, "_write_chunk", _write_films_failed):
+            update_movies()
+        self.assertEqual(0, Films.objects.count())
+
+        result = update_movies()
+        self.assertEqual(5, result["films"])
+        self.assertEqual(5, Films.objects.count())
+
+        # validators are saved after the successful run
+        self.assertEqual(0, update_movies()["films"])
+
+
+@override_settings(GSTUDIO_SYNC_LOCK_URL="", GSTUDIO_SYNC_ADAPTIVE=False,
+                   GSTUDIO_STREAM_API=False)
+class TestUpdateMoviesInvalidBody(TestCase):
+    def setUp(self) -> None:
+        path = "gh_films.pkg.gstudio.tasks"
+        caches[settings.GSTUDIO_VALIDATORS_CACHE].clear()
+        get_cache().clear()
+
+        self._session = MagicMock(headers={})
+        self._patchers = [
+            patch(path + ".get_session",
+                  MagicMock(return_value=self._session)),
+            patch(path + ".get_resources", MagicMock(return_value=[])),
+        ]
+
+        for item in self._patchers:
+            item.start()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    @staticmethod
+    def _response(body: bytes) -> MagicMock:
+        return MagicMock(status_code=200, content=body,
+                         headers={"ETag": "v1"},
+                         json=lambda: json.loads(body))
+
+    def test_invalid_body_should_be_refetched_unconditionally(self):
+        self._session.get.side_effect = lambda url, **kwargs: \
+            self._response(b"[" if url.endswith("films") else b"[]")
+        update_movies()
+
+        self._session.get.reset_mock()
+        self._session.get.side_effect = lambda url, **kwargs: \
+            self._response(b"[]")
+        update_movies()
+
+        headers = {c[0][0].rsplit("/", 1)[-1]: c[1]["headers"]
+                   for c in self._session.get.call_args_list}
+        self.assertDictEqual({}, headers["films"])
+        self.assertIn("If-None-Match", headers["people"])
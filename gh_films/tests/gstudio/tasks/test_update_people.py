@@ -78,11 +78,21 @@ class TestUpdatePeople(TestCase):
 
     @unpack
     @data(*_fx_valid_people_for_update)
-    def test_saved_items_should_be_unchanged(self, api_dat, stored, expected):
+    def test_saved_items_should_be_updated(self, api_dat, stored, expected):
         People.objects.create(**stored)
-        update(People, api_dat)
+        stats = update(People, api_dat)
 
         saved_people_qs = People.objects.filter(pk__in=expected)
         self.assertEqual(len(expected), saved_people_qs.count())
         new_person = People.objects.get(pk=stored["id"])
-        self.assertEqual(new_person.age, stored["age"])
+        self.assertEqual(new_person.age, api_dat[1]["age"])
+        self.assertEqual(1, stats["updated"])
+
+    @unpack
+    @data(*_fx_valid_people)
+    def test_unchanged_items_should_be_skipped(self, api_people, expected_ids):
+        update(People, api_people)
+        stats = update(People, api_people)
+
+        self.assertEqual(len(expected_ids), stats["unchanged"])
+        self.assertEqual(0, stats["inserted"] + stats["updated"])
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from gh_films.pkg.gstudio.models import Films, People, Gender, Species
+from gh_films.pkg.gstudio.resources import get_resource
+from gh_films.pkg.gstudio.tasks import update_resource
+
+
+__all__ = ["TestUpdateResource", ]
+
+
+_fx_film_ids = ("78d74675-c365-441e-9fb1-fe2f9188bde4",
+                "9411138d-306b-48fe-8cc6-54316d82f6a7", )
+_fx_person_ids = ("78d74675-c365-441e-9fb1-fe1f9188bde4",
+                  "9411138d-306b-48fe-8cc6-54b16d82f6a7", )
+_fx_species_id = "af3910a6-429f-4c74-9ad5-dfe1c4aa04f2"
+
+
+def _get_species(films=(), people=(), name="Human") -> dict:
+    return {
+        "id": _fx_species_id, "name": name, "classification": "Mammal",
+        "eye_colors": "Black, Blue", "hair_colors": "Black, Blonde",
+        "films": [f"https://api/films/{i}" for i in films],
+        "people": [f"https://api/people/{i}" for i in people],
+        "url": f"https://api/species/{_fx_species_id}",
+    }
+
+
+class TestUpdateResource(TestCase):
+    def setUp(self) -> None:
+        Films.objects.bulk_create([
+            Films(id=film_id, title="foo", description="bar",
+                  director="baz", producer="qux", release_date=1999,
+                  rt_score=50)
+            for film_id in _fx_film_ids])
+        People.objects.bulk_create([
+            People(id=person_id, name="foo", gender=Gender.MALE, age="1",
+                   eye_color="gray", hair_color="blue")
+            for person_id in _fx_person_ids])
+        self._resource = get_resource("species")
+
+    def _get_links(self, field: str) -> set:
+        through, own, ref = self._resource.get_through(field)
+        return {str(i) for i in through.objects.values_list(ref, flat=True)}
+
+    def test_records_should_be_saved(self):
+        stats = update_resource(self._resource, [_get_species()])
+
+        self.assertEqual(1, stats["inserted"])
+        self.assertEqual("Human", Species.objects.get().name)
+
+    def test_links_should_be_saved(self):
+        stats = update_resource(self._resource, [
+            _get_species(_fx_film_ids, _fx_person_ids[:1])])
+
+        self.assertSetEqual(set(_fx_film_ids), self._get_links("films"))
+        self.assertSetEqual(set(_fx_person_ids[:1]),
+                            self._get_links("people"))
+        self.assertEqual(2, stats["links"]["films"]["added"])
+
+    def test_outdated_links_should_be_removed(self):
+        update_resource(self._resource, [_get_species(_fx_film_ids)])
+        stats = update_resource(self._resource,
+                                [_get_species(_fx_film_ids[1:])])
+
+        self.assertSetEqual(set(_fx_film_ids[1:]), self._get_links("films"))
+        self.assertDictEqual({"added": 0, "removed": 1, "failed": 0},
+                             stats["links"]["films"])
+
+    def test_links_to_unknown_records_should_be_skipped(self):
+        unknown = "0440483e-ca0e-4120-8c50-4c8cd9b965d6"
+        update_resource(self._resource, [_get_species([unknown])])
+        self.assertSetEqual(set(), self._get_links("films"))
+
+    def test_unchanged_data_should_not_be_written(self):
+        update_resource(self._resource, [_get_species(_fx_film_ids)])
+
+        with patch.object(Species.films.through.objects,
+                          "bulk_create") as bulk_create:
+            stats = update_resource(self._resource,
+                                    [_get_species(_fx_film_ids)])
+
+        bulk_create.assert_not_called()
+        self.assertEqual(1, stats["unchanged"])
+
+    def test_links_of_rejected_records_should_be_skipped(self):
+        record = _get_species(_fx_film_ids)
+        del record["name"]
+
+        with patch("gh_films.pkg.gstudio.tasks._logger"):
+            update_resource(self._resource, [record])
+
+        self.assertSetEqual(set(), self._get_links("films"))
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from django.db import Error
+from django.test import TestCase
+
+from gh_films.pkg.gstudio.models import Films
+from gh_films.pkg.gstudio.search import get_search, BasicSearch
+from gh_films.pkg.gstudio.tasks import update_search
+
+
+__all__ = ["TestUpdateSearch", ]
+
+
+_fx_films = (
+    {"id": "78d74675-c365-441e-9fb1-fe2f9188bde4",
+     "title": "Castle in the Sky",
+     "description": "A girl with a magic crystal", "director": "Hayao",
+     "producer": "Isao", "release_date": 1986, "rt_score": 95,
+     "checksum": "a"},
+    {"id": "9411138d-306b-48fe-8cc6-54316d82f6a7", "title": "Grave",
+     "description": "Two orphans try to survive", "director": "Isao",
+     "producer": "Toru", "release_date": 1988, "rt_score": 97,
+     "checksum": "b"},
+)
+
+
+def _search(query: str) -> list:
+    return sorted(get_search().filter(Films.objects.all(), query.split())
+                  .values_list("title", flat=True))
+
+
+class TestUpdateSearch(TestCase):
+    def setUp(self) -> None:
+        Films.objects.bulk_create([Films(**f) for f in _fx_films])
+        self._stats = update_search()
+
+    def test_new_films_should_be_indexed(self):
+        self.assertDictEqual({"inserted": 2, "updated": 0, "deleted": 0,
+                              "failed": 0}, self._stats)
+        self.assertListEqual(["Castle in the Sky"], _search("crystal"))
+
+    def test_unchanged_films_should_not_be_written(self):
+        with self.assertNumQueries(2):
+            stats = update_search()
+
+        self.assertDictEqual({"inserted": 0, "updated": 0, "deleted": 0,
+                              "failed": 0}, stats)
+
+    def test_changed_films_should_be_reindexed(self):
+        Films.objects.filter(title="Grave").update(
+            description="Fireflies", checksum="c")
+
+        self.assertEqual(1, update_search()["updated"])
+        self.assertListEqual(["Grave"], _search("fireflies"))
+        self.assertListEqual([], _search("orphans"))
+
+    def test_films_changed_without_checksum_should_be_kept(self):
+        # descriptions aren't read unless checksums differ
+        Films.objects.filter(title="Grave").update(description="Fireflies")
+
+        self.assertEqual(0, update_search()["updated"])
+        self.assertListEqual(["Grave"], _search("orphans"))
+
+    def test_deleted_films_should_be_removed(self):
+        Films.objects.filter(title="Grave").delete()
+
+        self.assertEqual(1, update_search()["deleted"])
+        self.assertListEqual([], _search("orphans"))
+
+    def test_failed_write_should_be_skipped(self):
+        Films.objects.filter(title="Grave").update(checksum="c")
+        with patch.object(type(get_search()), "write", side_effect=Error()):
+            stats = update_search()
+
+        self.assertEqual(0, stats["updated"])
+        self.assertEqual(1, stats["failed"])
+
+    def test_nothing_should_be_written_without_index(self):
+        Films.objects.filter(title="Grave").update(checksum="c")
+        with patch("gh_films.pkg.gstudio.tasks.get_search",
+                   return_value=BasicSearch()):
+            with self.assertNumQueries(0):
+                update_search()
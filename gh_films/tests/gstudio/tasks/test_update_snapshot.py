@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.db import Error
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.snapshot import get_manifest, MANIFEST_NAME
+from gh_films.pkg.gstudio.tasks import update_snapshot
+
+
+__all__ = ["TestUpdateSnapshot", ]
+
+
+class TestUpdateSnapshot(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self._dir = tempfile.mkdtemp()
+        self._settings = override_settings(GSTUDIO_SNAPSHOT_DIR=self._dir)
+        self._settings.enable()
+
+    def tearDown(self) -> None:
+        self._settings.disable()
+        shutil.rmtree(self._dir)
+
+    def test_snapshot_should_be_published(self):
+        stats = update_snapshot()
+
+        self.assertEqual(3, stats["pages"])
+        self.assertIsNotNone(get_manifest())
+
+    def test_stale_snapshot_should_be_removed_after_failure(self):
+        update_snapshot()
+
+        # the dataset is changed, but the page can't be rendered
+        with patch("gh_films.pkg.gstudio.snapshot.get_version",
+                   return_value=0), \
+                patch("gh_films.pkg.gstudio.views.FilmsSummary.objects.values",
+                      side_effect=Error()):
+            stats = update_snapshot()
+
+        self.assertEqual(0, stats["pages"])
+        self.assertFalse(os.path.exists(os.path.join(self._dir,
+                                                     MANIFEST_NAME)))
+        self.assertIsNone(get_manifest())
@@ -0,0 +1,70 @@
+from django.test import TestCase
+
+from gh_films.pkg.gstudio.models import Films, People, FilmsSummary
+from gh_films.pkg.gstudio.tasks import update_summary
+
+
+__all__ = ["TestUpdateSummary"]
+
+
+_fx_films = (
+    {
+        "id": "78d74675-c365-441e-9fb1-fe2f9188bde4", "title": "foo",
+        "description": "some long text here", "director": "first last",
+        "producer": "some name here", "release_date": "1999", "rt_score": 33,
+    },
+    {
+        "id": "9411138d-306b-48fe-8cc6-54316d82f6a7", "title": "bar",
+        "description": "another long text here", "director": "first1 lt3",
+        "producer": "another name here", "release_date": "1989",
+        "rt_score": "25",
+    },
+)
+
+_fx_people = (
+    {"id": "78d74675-c365-441e-9fb1-fe1f9188bde4", "name": "Zeniba",
+     "gender": "Female", "age": "young", "eye_color": "gray",
+     "hair_color": "blue", },
+    {"id": "43793794-57ff-483b-b3dd-40b9c4828b59", "name": "Haku",
+     "gender": "Male", "age": 12, "eye_color": "green",
+     "hair_color": "red", }
+)
+
+
+class TestUpdateSummary(TestCase):
+    def setUp(self) -> None:
+        films = Films.objects.bulk_create([Films(**f) for f in _fx_films])
+        people = People.objects.bulk_create([People(**p) for p in _fx_people])
+        films[0].people.set(people)
+
+    def test_films_with_people_names_should_be_saved(self):
+        stats = update_summary()
+
+        result = {str(s.pk): (s.title, s.people)
+                  for s in FilmsSummary.objects.all()}
+        self.assertDictEqual({
+            _fx_films[0]["id"]: ("foo", ["Haku", "Zeniba"]),
+            _fx_films[1]["id"]: ("bar", []),
+        }, result)
+        self.assertEqual(2, stats["inserted"])
+
+    def test_unchanged_summary_should_not_be_written(self):
+        update_summary()
+
+        # films, people names and stored summary are read only
+        with self.assertNumQueries(3):
+            stats = update_summary()
+
+        self.assertDictEqual({"inserted": 0, "updated": 0, "deleted": 0,
+                              "failed": 0}, stats)
+
+    def test_changed_films_should_be_updated(self):
+        update_summary()
+        Films.objects.filter(pk=_fx_films[1]["id"]).update(title="baz")
+        Films.objects.get(pk=_fx_films[0]["id"]).people.clear()
+
+        stats = update_summary()
+
+        self.assertEqual(2, stats["updated"])
+        self.assertListEqual(
+            [], FilmsSummary.objects.get(pk=_fx_films[0]["id"]).people)
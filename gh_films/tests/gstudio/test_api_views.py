@@ -0,0 +1,230 @@
+import json
+from unittest.mock import patch
+from uuid import UUID
+
+from ddt import ddt, data, unpack
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.tasks import update_search
+
+
+__all__ = ["TestListView", "TestDetailView", "TestExportView",
+           "TestFilters", ]
+
+
+def _create_dataset(size: int) -> None:
+    """
+    Creates films and people with ids based on their numbers. Each film has
+    two people
+
+    :param size: number of films and people
+    """
+    films = [Films(id=UUID(int=idx + 1), title=f"film #{idx}",
+                   description="...", director=f"director #{idx % 3}",
+                   producer="", release_date=1990 + idx % 30, rt_score=50)
+             for idx in range(size)]
+    people = [People(id=UUID(int=idx + 1), name=f"person #{idx}",
+                     gender="Female", eye_color="", hair_color="")
+              for idx in range(size)]
+    through = Films.people.through
+    relations = [through(films_id=films[idx].id,
+                         people_id=people[(idx + shift) % size].id)
+                 for idx in range(size) for shift in (0, 1)]
+
+    Films.objects.bulk_create(films)
+    People.objects.bulk_create(people)
+    through.objects.bulk_create(relations)
+
+
+@ddt
+class TestListView(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_dataset(25)
+
+    def _get_all(self, url: str) -> list:
+        results = []
+        while url:
+            response = self.client.get(url).json()
+            results.extend(response["results"])
+            url = response["next"]
+        return results
+
+    @data("/movies/api/films", "/movies/api/people")
+    def test_all_pages_should_be_returned_once(self, url):
+        results = self._get_all(url + "?limit=10")
+
+        self.assertEqual(25, len(results))
+        self.assertEqual(25, len({r["id"] for r in results}))
+
+    def test_page_should_be_returned_by_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/movies/api/films?limit=5&after="
+                                       f"{UUID(int=10)}").json()
+
+        self.assertListEqual([str(UUID(int=i)) for i in range(11, 16)],
+                             [r["id"] for r in response["results"]])
+
+    def test_sparse_fields_should_be_returned(self):
+        response = self.client.get("/movies/api/films?fields=title").json()
+        self.assertSetEqual({"id", "title"}, set(response["results"][0]))
+
+    def test_people_should_be_embedded(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                "/movies/api/films?limit=1&embed=people").json()
+
+        self.assertListEqual(["person #0", "person #1"],
+                             [p["name"] for p in response["results"][0]
+                              ["people"]])
+
+    def test_relations_should_be_embedded_by_batches(self):
+        expected = self.client.get(
+            "/movies/api/films?limit=10&embed=people").json()
+        get_cache().clear()
+
+        with patch("gh_films.pkg.gstudio.api_views._QUERY_BATCH_SIZE", 4), \
+                self.assertNumQueries(1 + 3 + 3):
+            response = self.client.get(
+                "/movies/api/films?limit=10&embed=people").json()
+
+        self.assertDictEqual(expected, response)
+
+    def test_films_should_be_embedded_into_people(self):
+        response = self.client.get(
+            "/movies/api/people?limit=1&fields=name&embed=films").json()
+
+        self.assertListEqual(["film #0", "film #24"],
+                             sorted(f["title"] for f in response["results"][0]
+                                    ["films"]))
+
+    @data("limit=0", "limit=abc", "after=not-uuid", "fields=checksum",
+          "embed=species")
+    def test_invalid_params_should_be_rejected(self, params):
+        response = self.client.get(f"/movies/api/films?{params}")
+        self.assertEqual(400, response.status_code)
+
+    @data("/movies/api/films?limit=0", "/movies/api/films?embed=species",
+          f"/movies/api/films/{UUID(int=1)}?fields=checksum",
+          "/movies/api/films/export?fields=checksum")
+    def test_invalid_params_should_not_be_conditional(self, url):
+        response = self.client.get("/movies/api/films")
+        etag = response["ETag"]
+        last_modified = response["Last-Modified"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # ETag of the content itself is set by `ConditionalGetMiddleware`
+        self.assertEqual(400, response.status_code)
+        self.assertNotEqual(etag, response.get("ETag"))
+        self.assertNotIn("Last-Modified", response)
+
+
+class TestDetailView(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_dataset(3)
+
+    def test_film_should_be_returned(self):
+        response = self.client.get(
+            f"/movies/api/films/{UUID(int=2)}?embed=people").json()
+
+        self.assertEqual("film #1", response["title"])
+        self.assertEqual(2, len(response["people"]))
+
+    def test_person_should_be_returned(self):
+        response = self.client.get(f"/movies/api/people/{UUID(int=3)}").json()
+        self.assertEqual("person #2", response["name"])
+
+    def test_missed_entry_should_not_be_found(self):
+        response = self.client.get(f"/movies/api/films/{UUID(int=99)}")
+        self.assertEqual(404, response.status_code)
+
+
+@ddt
+class TestExportView(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_dataset(25)
+
+    @data(1, 7, 25, 100)
+    def test_all_entries_should_be_streamed(self, chunk_size):
+        with override_settings(GSTUDIO_API_EXPORT_CHUNK_SIZE=chunk_size):
+            response = self.client.get("/movies/api/films/export?embed=people")
+            self.assertTrue(response.streaming)
+            content = b"".join(response.streaming_content)
+
+        results = json.loads(content)
+        self.assertEqual(25, len(results))
+        self.assertTrue(all(len(r["people"]) == 2 for r in results))
+
+    def test_entries_should_be_loaded_by_chunks(self):
+        with override_settings(GSTUDIO_API_EXPORT_CHUNK_SIZE=10):
+            response = self.client.get("/movies/api/people/export")
+
+            # nothing is loaded before the response is consumed
+            with self.assertNumQueries(3):
+                b"".join(response.streaming_content)
+
+    def test_empty_dataset_should_be_streamed(self):
+        Films.objects.all().delete()
+        response = self.client.get("/movies/api/films/export")
+        self.assertListEqual([], json.loads(
+            b"".join(response.streaming_content)))
+
+
+@ddt
+class TestFilters(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_dataset(30)
+        Films.objects.filter(pk=UUID(int=5)).update(
+            description="A cat bus", rt_score=90)
+        update_search()
+
+    def _get_titles(self, url: str) -> list:
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        if response.streaming:
+            results = json.loads(b"".join(response.streaming_content))
+        else:
+            results = response.json()["results"]
+        return [r["title"] for r in results]
+
+    @data("/movies/api/films", "/movies/api/films/export")
+    def test_films_should_be_filtered(self, url):
+        self.assertListEqual(
+            ["film #0", "film #3", "film #6", "film #9"],
+            self._get_titles(f"{url}?director=director+%230"
+                             f"&release_date_max=1999"))
+        self.assertListEqual(
+            ["film #4"], self._get_titles(f"{url}?rt_score_min=60"))
+        self.assertListEqual(
+            ["film #4"],
+            self._get_titles(f"{url}?q=cat&release_date_min=1994"))
+        self.assertListEqual([], self._get_titles(f"{url}?producer=nobody"))
+
+    def test_filters_should_be_kept_by_next_page(self):
+        response = self.client.get(
+            "/movies/api/films?director=director+%231&limit=5").json()
+        self.assertIn("director=director+%231", response["next"])
+
+        response = self.client.get(response["next"]).json()
+        self.assertListEqual(["film #16", "film #19", "film #22", "film #25",
+                              "film #28"],
+                             [r["title"] for r in response["results"]])
+
+    @data(("/movies/api/films", "release_date_min=abc"),
+          ("/movies/api/films/export", "release_date_min=abc"),
+          ("/movies/api/films", "rt_score_min=99999999999999999999"),
+          ("/movies/api/films/export", "rt_score_min=99999999999999999999"))
+    @unpack
+    def test_invalid_filters_should_be_rejected(self, url, params):
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(f"{url}?{params}",
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(400, response.status_code)
+        self.assertNotEqual(etag, response.get("ETag"))
@@ -0,0 +1,107 @@
+import asyncio
+from uuid import UUID
+
+from django.test import TransactionTestCase, AsyncClient, override_settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.tasks import update_summary
+from gh_films.pkg.gstudio.views import AsyncFilmsView
+from gh_films.pkg.gstudio.web_metrics import get_recorder
+
+
+__all__ = ["TestAsyncViews", ]
+
+
+_fx_film_id = UUID("78d74675-c365-441e-9fb1-fe2f9188bde4")
+_fx_person_id = UUID("ba924631-068e-4436-b6de-f3283fa848f0")
+
+
+# views are run by threads of the pool, thus they don't see data of
+# transactions of `TestCase`
+@override_settings(ROOT_URLCONF="gh_films.tests.gstudio.async_urls",
+                   GSTUDIO_WEB_METRICS_DIR="")
+class TestAsyncViews(TransactionTestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        person = People.objects.create(
+            id=_fx_person_id, name="Totoro", gender="NA", age="",
+            eye_color="Grey", hair_color="Grey")
+        film = Films.objects.create(
+            id=_fx_film_id, title="My Neighbor Totoro", description="...",
+            director="Hayao Miyazaki", producer="Toru Hara",
+            release_date=1988, rt_score=93)
+        film.people.add(person)
+        update_summary()
+
+        self.async_client = AsyncClient()
+
+    def _get(self, url: str, **extra):
+        # `asyncio.run` isn't available in Python 3.6
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.async_client.get(url,
+                                                                 **extra))
+        finally:
+            loop.close()
+
+    def test_view_should_be_coroutine(self):
+        self.assertTrue(asyncio.iscoroutinefunction(AsyncFilmsView.as_view()))
+
+    def test_page_should_be_rendered(self):
+        response = self._get("/movies/")
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b"<td>My Neighbor Totoro</td>", response.content)
+        self.assertIn(b"Totoro", response.content)
+
+    def test_cached_page_should_be_served(self):
+        expected = self._get("/movies/").content
+        Films.objects.update(title="changed")
+        update_summary()
+
+        self.assertEqual(expected, self._get("/movies/").content)
+
+    def test_conditional_request_should_be_answered(self):
+        etag = self._get("/movies/")["ETag"]
+        # extra arguments are headers of ASGI requests in Django 3.1
+        response = self._get("/movies/", **{"If-None-Match": etag})
+
+        self.assertEqual(304, response.status_code)
+
+    def test_filters_should_be_applied(self):
+        response = self._get("/movies/?director=Isao+Takahata")
+        self.assertNotIn(b"My Neighbor Totoro", response.content)
+
+        response = self._get("/movies/?rt_score_min=high")
+        self.assertEqual(400, response.status_code)
+
+    def test_api_should_return_entries(self):
+        response = self._get("/movies/api/films?embed=people").json()
+        self.assertEqual(["Totoro"], [p["name"] for p in
+                                      response["results"][0]["people"]])
+
+        response = self._get(f"/movies/api/people/{_fx_person_id}"
+                             f"?embed=films").json()
+        self.assertEqual("My Neighbor Totoro", response["films"][0]["title"])
+
+    def test_invalid_params_should_be_rejected(self):
+        response = self._get("/movies/api/films?limit=0")
+        self.assertEqual(400, response.status_code)
+
+    def test_missed_entry_should_not_be_found(self):
+        response = self._get(f"/movies/api/films/{UUID(int=1)}")
+        self.assertEqual(404, response.status_code)
+
+    def test_request_should_be_measured(self):
+        self._get("/movies/")
+
+        values = get_recorder().snapshot()
+        counts = values["gstudio_http_db_queries"]['view="films"']
+        self.assertGreater(counts[-1], 0)
+        self.assertIn('view="films"',
+                      values["gstudio_http_template_render_seconds"])
+
+    def test_view_should_be_served_by_sync_handler(self):
+        response = self.client.get("/movies/")
+        self.assertIn(b"<td>My Neighbor Totoro</td>", response.content)
@@ -0,0 +1,38 @@
+from ddt import ddt, data
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio.checks import check_shared_caches
+
+
+__all__ = ["TestCheckSharedCaches", ]
+
+
+_fx_caches = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/tmp/gstudio",
+    },
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dummy": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+
+
+@ddt
+@override_settings(CACHES=_fx_caches, GSTUDIO_CACHE="default",
+                   GSTUDIO_VALIDATORS_CACHE="default")
+class TestCheckSharedCaches(TestCase):
+    def test_shared_caches_should_pass(self):
+        self.assertListEqual([], check_shared_caches())
+
+    @data("GSTUDIO_CACHE", "GSTUDIO_VALIDATORS_CACHE")
+    def test_local_cache_should_be_reported(self, name):
+        for alias in ("local", "dummy"):
+            with self.settings(**{name: alias}):
+                errors = check_shared_caches()
+
+            self.assertListEqual(["gstudio.E001"], [e.id for e in errors])
+            self.assertIn(name, errors[0].msg)
@@ -0,0 +1,217 @@
+import gzip
+import json
+from unittest import skipIf
+from unittest.mock import patch
+
+from ddt import ddt, data, unpack
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio import compression
+from gh_films.pkg.gstudio.compression import negotiate, compress, \
+    compress_sequence, get_encodings
+from gh_films.pkg.gstudio.dataset import get_cache, bump_version
+from gh_films.pkg.gstudio.models import Films
+from gh_films.pkg.gstudio.tasks import update_summary
+
+
+__all__ = ["TestNegotiate", "TestCompress", "TestCompressionMiddleware",
+           "TestCachedCompression", ]
+
+
+def _create_films(size: int) -> None:
+    Films.objects.bulk_create([
+        Films(id=f"78d74675-c365-441e-9fb1-{idx:012d}", title=f"Film #{idx}",
+              description="...", director="Hayao Miyazaki",
+              producer="Toru Hara", release_date=1988, rt_score=93)
+        for idx in range(size)])
+    update_summary()
+
+
+@ddt
+@override_settings(GSTUDIO_COMPRESSION_ENCODINGS=["br", "zstd", "gzip"])
+class TestNegotiate(TestCase):
+    @data(("", None),
+          ("gzip", "gzip"),
+          ("gzip, deflate", "gzip"),
+          ("GZIP;q=0.5", "gzip"),
+          ("gzip;q=0", None),
+          ("deflate", None),
+          ("*", "gzip"),
+          ("*, gzip;q=0", None),
+          ("identity", None),
+          ("gzip;q=abc", None))
+    @unpack
+    def test_encoding_should_be_chosen(self, header, expected):
+        with patch.object(compression, "brotli", None), \
+                patch.object(compression, "zstandard", None):
+            self.assertEqual(expected, negotiate(header))
+
+    def test_preference_of_server_should_win(self):
+        self.assertEqual("gzip", negotiate("gzip;q=0.1, br",
+                                           available=["gzip", "br"]))
+
+    def test_unavailable_encodings_should_be_skipped(self):
+        self.assertEqual("gzip", negotiate("br, gzip", available=["gzip"]))
+
+    @override_settings(GSTUDIO_COMPRESSION_ENCODINGS=[])
+    def test_compression_should_be_disabled_by_settings(self):
+        self.assertIsNone(negotiate("gzip"))
+
+
+class TestCompress(TestCase):
+    def test_content_should_be_compressed_by_gzip(self):
+        content = b"Totoro " * 100
+
+        for best in (False, True):
+            self.assertEqual(content, gzip.decompress(
+                compress(content, "gzip", best)))
+
+    def test_gzip_content_should_not_depend_on_time(self):
+        self.assertEqual(compress(b"Totoro", "gzip"),
+                         compress(b"Totoro", "gzip"))
+
+    def test_sequence_should_be_compressed(self):
+        content = [b"Totoro " * 10] * 10
+
+        self.assertEqual(b"".join(content), gzip.decompress(b"".join(
+            compress_sequence(iter(content), "gzip"))))
+
+    @skipIf(compression.brotli is None, "brotli isn't installed")
+    def test_content_should_be_compressed_by_brotli(self):
+        self.assertEqual(b"Totoro", compression.brotli.decompress(
+            compress(b"Totoro", "br", best=True)))
+
+    @skipIf(compression.zstandard is None, "zstandard isn't installed")
+    def test_content_should_be_compressed_by_zstd(self):
+        self.assertEqual(b"Totoro", compression.zstandard.ZstdDecompressor()
+                         .decompressobj().decompress(compress(b"Totoro",
+                                                              "zstd")))
+
+    def test_encodings_should_be_ordered_by_settings(self):
+        with override_settings(GSTUDIO_COMPRESSION_ENCODINGS=["gzip"]):
+            self.assertListEqual(["gzip"], list(get_encodings()))
+
+
+@override_settings(GSTUDIO_COMPRESSION_ENCODINGS=["gzip"])
+class TestCompressionMiddleware(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_films(20)
+
+    def test_page_should_be_compressed(self):
+        expected = self.client.get("/movies/").content
+        get_cache().clear()
+
+        response = self.client.get("/movies/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", response["Vary"])
+        self.assertEqual(str(len(response.content)),
+                         response["Content-Length"])
+        self.assertEqual(expected, gzip.decompress(response.content))
+
+    def test_etag_of_compressed_page_should_be_weak(self):
+        response = self.client.get("/movies/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response["ETag"].startswith("W/"))
+
+        response = self.client.get("/movies/", HTTP_ACCEPT_ENCODING="gzip",
+                                   HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(304, response.status_code)
+
+    def test_page_should_not_be_compressed_without_accept_encoding(self):
+        response = self.client.get("/movies/")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual("Accept-Encoding", response["Vary"])
+
+    def test_export_should_vary_by_accept_encoding(self):
+        response = self.client.get("/movies/api/films/export",
+                                   HTTP_ACCEPT_ENCODING="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual("Accept-Encoding", response["Vary"])
+
+    def test_export_should_be_streamed_compressed(self):
+        expected = json.loads(b"".join(self.client.get(
+            "/movies/api/films/export").streaming_content))
+
+        response = self.client.get("/movies/api/films/export",
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertListEqual(expected, json.loads(gzip.decompress(
+            b"".join(response.streaming_content))))
+
+    def test_small_responses_should_not_be_compressed(self):
+        response = self.client.get("/movies/api/films?limit=0",
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_metrics_should_be_compressed(self):
+        self.client.get("/movies/")
+
+        response = self.client.get("/metrics", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertIn(b"gstudio_http_requests_total",
+                      gzip.decompress(response.content))
+
+
+@override_settings(GSTUDIO_COMPRESSION_ENCODINGS=["gzip"])
+class TestCachedCompression(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        _create_films(20)
+
+    def _get(self, url: str, **kwargs):
+        with patch("gh_films.pkg.gstudio.views.compress",
+                   wraps=compression.compress) as mk_compress, \
+                patch("gh_films.pkg.gstudio.compression.compress",
+                      wraps=compression.compress) as mk_fast_compress:
+            response = self.client.get(url, **kwargs)
+        return response, mk_compress.call_count + mk_fast_compress.call_count
+
+    def test_page_should_be_compressed_once_per_dataset_version(self):
+        for url in ("/movies/", "/movies/api/films?limit=20"):
+            first, compressed = self._get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(1, compressed)
+
+            second, compressed = self._get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(0, compressed)
+            self.assertEqual("gzip", second["Content-Encoding"])
+            self.assertEqual(first.content, second.content)
+
+            bump_version()
+            _, compressed = self._get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(1, compressed)
+
+    def test_cached_page_should_be_compressed_by_best_level(self):
+        self.client.get("/movies/")
+
+        response = self.client.get("/movies/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(compress(gzip.decompress(response.content), "gzip",
+                                  best=True), response.content)
+
+    def test_cached_compressed_page_should_be_served_without_queries(self):
+        expected = self.client.get("/movies/",
+                                   HTTP_ACCEPT_ENCODING="gzip").content
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/movies/",
+                                       HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(expected, response.content)
+
+    def test_identity_should_be_served_from_same_cache(self):
+        expected = self.client.get("/movies/",
+                                   HTTP_ACCEPT_ENCODING="gzip").content
+
+        response = self.client.get("/movies/")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(expected), response.content)
+
+    def test_cached_identity_should_vary_by_accept_encoding(self):
+        for _ in range(2):
+            with self.modify_settings(MIDDLEWARE={
+                    "remove": "gh_films.pkg.gstudio.middleware."
+                              "CompressionMiddleware"}):
+                response = self.client.get("/movies/")
+
+            self.assertEqual("Accept-Encoding", response["Vary"])
@@ -1,3 +1,6 @@
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
@@ -6,9 +9,14 @@ from urllib.parse import urlparse
 from ddt import ddt, data, unpack
 
 from gh_films.pkg.gstudio.ghibli_api import GhibliApi
+from gh_films.pkg.gstudio.stub import StubServer, FAULT_STATUS, \
+    FAULT_RESET, FAULT_STALL, generate_dataset
+from gh_films.pkg.gstudio.transport import create_session
 
 
-__all__ = ["TestGhibliApi", ]
+__all__ = ["TestGhibliApi", "TestGhibliApiConditional",
+           "TestGhibliApiConcurrent", "TestGhibliApiStreaming",
+           "TestGhibliApiFaults", ]
 
 
 _fx_endpoints = ("films", "people", )
@@ -86,6 +94,29 @@ _fx_valid_films_full = (
 )
 
 
+class _ValidatorsStore(dict):
+    """
+    Emulates django's cache interface
+    """
+    def set(self, key: str, value: Dict, timeout=None) -> None:
+        self[key] = value
+
+
+def _rq_response(status_code: int = 200, body: bytes = b"[]",
+                 headers: Dict = None) -> MagicMock:
+    """
+    Emulates API's response
+
+    :param status_code:
+    :param body: raw body of the response
+    :param headers: response's headers
+
+    :return:
+    """
+    return MagicMock(status_code=status_code, content=body,
+                     headers=headers or {}, json=lambda: json.loads(body))
+
+
 def _get_endpoint(url: str) -> str:
     """
     Extracts API endpoint from url
@@ -105,10 +136,11 @@ def _rq_fake_json_response(return_values: Dict[str, list]) -> Callable:
 
     :return:
     """
-    def _fake_get(url: str) -> MagicMock:
+    def _fake_get(url: str, **kwargs) -> MagicMock:
         """
 
         :param url: ignored
+        :param kwargs: ignored
 
         :return: MagicMoc instance which json method return
                  required/expected data that depends on given URL
@@ -125,7 +157,7 @@ class TestGhibliApi(TestCase):
 
         path = "gh_films.pkg.gstudio.ghibli_api"
         self._patchers = [
-            patch(path + ".Session", MagicMock(return_value=self._rq)),
+            patch(path + ".get_session", MagicMock(return_value=self._rq)),
         ]
 
         for item in self._patchers:
@@ -166,3 +198,250 @@ class TestGhibliApi(TestCase):
     def test_people_field_in_films_list_should_be_updated(self, response, exp):
         self._rq.get.side_effect = _rq_fake_json_response(response)
         self.assertSequenceEqual(GhibliApi().films, exp)
+
+
+class TestGhibliApiConditional(TestCase):
+    def setUp(self) -> None:
+        self._rq = MagicMock()
+        self._store = _ValidatorsStore()
+
+        path = "gh_films.pkg.gstudio.ghibli_api"
+        self._patchers = [
+            patch(path + ".get_session", MagicMock(return_value=self._rq)),
+        ]
+
+        for item in self._patchers:
+            item.start()
+
+    def tearDown(self) -> None:
+        for item in self._patchers:
+            item.stop()
+
+    def _get_sent_headers(self) -> Dict[str, Dict]:
+        return {_get_endpoint(c[0][0]): c[1]["headers"]
+                for c in self._rq.get.call_args_list}
+
+    def test_validators_should_not_be_saved_before_confirmation(self):
+        self._rq.get.return_value = _rq_response(headers={"ETag": "v1"})
+        GhibliApi(validators=self._store)
+        self.assertDictEqual({}, self._store)
+
+    def test_validators_should_be_sent_with_next_request(self):
+        self._rq.get.return_value = _rq_response(
+            headers={"ETag": "v1", "Last-Modified": "yesterday"})
+        GhibliApi(validators=self._store).save_validators()
+
+        self._rq.get.reset_mock()
+        GhibliApi(validators=self._store)
+
+        for endpoint, headers in self._get_sent_headers().items():
+            self.assertEqual(headers.get("If-None-Match"), "v1", endpoint)
+            self.assertEqual(headers.get("If-Modified-Since"), "yesterday",
+                             endpoint)
+
+    def test_not_modified_response_should_be_reported(self):
+        self._rq.get.return_value = _rq_response(headers={"ETag": "v1"})
+        GhibliApi(validators=self._store).save_validators()
+
+        self._rq.get.return_value = _rq_response(304, b"")
+        api = GhibliApi(validators=self._store)
+
+        self.assertTrue(api.not_modified)
+        self.assertIsNone(api.films)
+        self.assertIsNone(api.people)
+
+    def test_same_body_should_be_reported_as_not_modified(self):
+        self._rq.get.return_value = _rq_response(body=b'[{"id": 1}]')
+        GhibliApi(validators=self._store).save_validators()
+
+        api = GhibliApi(validators=self._store)
+        self.assertTrue(api.not_modified)
+
+    def test_unmodified_endpoint_should_be_refetched_if_other_changed(self):
+        self._rq.get.return_value = _rq_response(headers={"ETag": "v1"})
+        GhibliApi(validators=self._store).save_validators()
+
+        people = b'[{"id": 1, "films": []}]'
+        films = b'[{"id": "f-1", "title": "foo"}]'
+
+        def _fake_get(url: str, headers: Dict, **kwargs) -> MagicMock:
+            if _get_endpoint(url) == "people":
+                return _rq_response(body=people, headers={"ETag": "v2"})
+            if headers:
+                return _rq_response(304, b"")
+            return _rq_response(body=films, headers={"ETag": "v1"})
+
+        self._rq.get.side_effect = _fake_get
+        api = GhibliApi(validators=self._store)
+
+        self.assertFalse(api.not_modified)
+        self.assertSequenceEqual(json.loads(people), api.people)
+        self.assertEqual("f-1", api.films[0]["id"])
+
+    def test_unmodified_extra_endpoint_should_not_be_refetched(self):
+        self._rq.get.return_value = _rq_response(headers={"ETag": "v1"})
+        GhibliApi(validators=self._store,
+                  extra_endpoints=["species"]).save_validators()
+        self._rq.get.reset_mock()
+
+        def _fake_get(url: str, headers: Dict, **kwargs) -> MagicMock:
+            if _get_endpoint(url) == "people":
+                return _rq_response(body=b'[{"id": 1, "films": []}]',
+                                    headers={"ETag": "v2"})
+            if headers:
+                return _rq_response(304, b"")
+            return _rq_response(body=b"[]", headers={"ETag": "v1"})
+
+        self._rq.get.side_effect = _fake_get
+        api = GhibliApi(validators=self._store, extra_endpoints=["species"])
+
+        self.assertFalse(api.not_modified)
+        self.assertDictEqual({"people": 1, "films": 2, "species": 1},
+                             Counter(_get_endpoint(c[0][0]) for c in
+                                     self._rq.get.call_args_list))
+        self.assertListEqual([], list(api.iter_endpoint("species")))
+
+
+@ddt
+class TestGhibliApiConcurrent(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._server = StubServer(films=5, people=20)
+        cls._server.start()
+        cls._api_cls = type("StubGhibliApi", (GhibliApi, ),
+                            {"BASE_URL": cls._server.url})
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._server.stop()
+
+    @data(None, 2)
+    def test_concurrent_result_should_be_same_as_sequential(self, workers):
+        expected = self._api_cls(max_workers=1)
+        api = self._api_cls(max_workers=workers)
+
+        self.assertSequenceEqual(expected.people, api.people)
+        self.assertSequenceEqual(expected.films, api.films)
+
+    @data(False, True)
+    def test_extra_endpoints_should_be_requested(self, stream):
+        species = [{"id": "1", "name": "Cat"}]
+        films, people = generate_dataset(5, 20, self._server.url)
+        self._server.set_data(films, people, {"species": species})
+
+        api = self._api_cls(stream=stream, extra_endpoints=["species"])
+
+        self.assertListEqual(species, list(api.iter_endpoint("species")))
+
+    def test_all_endpoints_should_be_requested_concurrently(self):
+        path = "gh_films.pkg.gstudio.ghibli_api.ThreadPoolExecutor"
+        with patch(path, wraps=ThreadPoolExecutor) as mk_executor:
+            self._api_cls(extra_endpoints=["species", "vehicles"])
+
+        mk_executor.assert_called_once_with(max_workers=4)
+
+    def test_people_should_be_merged_into_films(self):
+        api = self._api_cls()
+        merged = sum(len(f["people"]) for f in api.films)
+        expected = sum(len(p["films"]) for p in api.people)
+        self.assertEqual(expected, merged)
+
+
+class TestGhibliApiStreaming(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._server = StubServer(films=5, people=20)
+        cls._server.start()
+        cls._api_cls = type("StubGhibliApi", (GhibliApi, ),
+                            {"BASE_URL": cls._server.url,
+                             "STREAM_CHUNK_SIZE": 100})
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._server.stop()
+
+    def setUp(self) -> None:
+        self._expected = self._api_cls()
+        self._api = self._api_cls(stream=True)
+
+    def test_streamed_people_should_be_same_as_loaded(self):
+        self.assertListEqual(self._expected.people,
+                             list(self._api.iter_people()))
+
+    def test_people_ids_should_be_merged_into_streamed_films(self):
+        list(self._api.iter_people())
+        films = list(self._api.iter_films())
+
+        expected = [[p["id"] for p in f["people"]]
+                    for f in self._expected.films]
+        self.assertListEqual(expected, [f["people"] for f in films])
+
+    def test_people_relations_should_be_kept(self):
+        list(self._api.iter_people())
+
+        expected = [{"id": p["id"], "films": p["films"]}
+                    for p in self._expected.people]
+        self.assertListEqual(expected, self._api.people)
+
+    def test_streamed_films_should_not_be_kept(self):
+        list(self._api.iter_people())
+        list(self._api.iter_films())
+        self.assertIsNone(self._api.films)
+
+
+@ddt
+class TestGhibliApiFaults(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._server = StubServer(films=5, people=20)
+        cls._server.start()
+        cls._api_cls = type("StubGhibliApi", (GhibliApi, ),
+                            {"BASE_URL": cls._server.url})
+        cls._expected = cls._api_cls(session=create_session(retries=0))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._server.stop()
+
+    def setUp(self) -> None:
+        self._server.reset()
+        self._session = create_session(retries=2, backoff=0.01)
+
+    def tearDown(self) -> None:
+        self._session.close()
+
+    def _get_api(self) -> GhibliApi:
+        return self._api_cls(session=self._session, timeout=(1, 0.2),
+                             max_workers=1, logger=MagicMock())
+
+    @data((FAULT_STATUS, 503), (FAULT_STATUS, 502), (FAULT_RESET, None),
+          (FAULT_STALL, 0.5))
+    @unpack
+    def test_failed_requests_should_be_retried(self, fault, value):
+        self._server.inject(fault, 2, value)
+        api = self._get_api()
+
+        self.assertListEqual(self._expected.films, api.films)
+        self.assertEqual(4, sum(self._server.hits.values()))
+
+    def test_retries_should_be_limited(self):
+        self._server.inject(FAULT_STATUS, 3)
+        api = self._get_api()
+
+        self.assertIsNone(api.people)
+        self.assertEqual(3, self._server.hits["people"])
+
+    def test_client_errors_should_not_be_retried(self):
+        self._server.inject(FAULT_STATUS, 1, 404)
+        api = self._get_api()
+
+        self.assertIsNone(api.people)
+        self.assertEqual(1, self._server.hits["people"])
+
+    def test_timeout_should_be_reported_as_error(self):
+        self._server.inject(FAULT_STALL, 3, 0.5)
+        logger = MagicMock()
+        self._api_cls(session=self._session, timeout=(1, 0.2), max_workers=1,
+                      logger=logger)
+
+        logger.error.assert_called()
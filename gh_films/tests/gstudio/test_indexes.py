@@ -0,0 +1,69 @@
+from ddt import ddt, data
+from django.test import TestCase
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.tests.gstudio.query_plans import QueryPlanMixin
+
+
+__all__ = ["TestIndexes", "TestApiQueryPlans", ]
+
+
+_fx_film_id = "78d74675-c365-441e-9fb1-fe2f9188bde4"
+_fx_person_id = "ba924631-068e-4436-b6de-f3283fa848f0"
+
+_through = Films.people.through
+
+
+@ddt
+class TestIndexes(QueryPlanMixin, TestCase):
+    @data(
+        lambda: Films.objects.filter(title="My Neighbor Totoro"),
+        lambda: Films.objects.filter(director="Hayao Miyazaki"),
+        lambda: Films.objects.filter(director="Hayao Miyazaki",
+                                     release_date=1988),
+        lambda: Films.objects.filter(release_date__range=(1986, 1990)),
+        lambda: Films.objects.filter(producer="Toru Hara"),
+        lambda: Films.objects.filter(rt_score__range=(90, 100)),
+        lambda: People.objects.filter(name="Totoro"),
+        lambda: _through.objects.filter(films_id=_fx_film_id),
+        lambda: _through.objects.filter(people_id=_fx_person_id),
+    )
+    def test_lookup_should_use_index(self, get_queryset):
+        self.assertIndexScans(get_queryset())
+
+    def test_full_scan_should_be_detected(self):
+        with self.assertRaises(AssertionError):
+            self.assertIndexScans(Films.objects.filter(
+                description="..."))
+
+    def test_films_of_person_should_be_read_from_index_only(self):
+        sql, params = _through.objects.filter(
+            people_id=_fx_person_id).values_list(
+            "people_id", "films_id").query.sql_with_params()
+
+        self.assertIndexScans((sql, params), covering=True)
+
+
+@ddt
+class TestApiQueryPlans(QueryPlanMixin, TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        person = People.objects.create(
+            id=_fx_person_id, name="Totoro", gender="NA", age="",
+            eye_color="Grey", hair_color="Grey")
+        film = Films.objects.create(
+            id=_fx_film_id, title="My Neighbor Totoro", description="...",
+            director="Hayao Miyazaki", producer="Hayao Miyazaki",
+            release_date=1988, rt_score=93)
+        film.people.add(person)
+
+    @data(f"/movies/api/films/{_fx_film_id}?embed=people",
+          f"/movies/api/people/{_fx_person_id}?embed=films",
+          "/movies/api/films?q=totoro&embed=people",
+          "/movies/api/films?director=Hayao+Miyazaki&embed=people",
+          "/movies/?q=totoro&release_date_min=1980")
+    def test_requests_should_use_indexes(self, url):
+        self.assertRequestIndexScans(url, ["gstudio_films", "gstudio_people",
+                                           "gstudio_films_people",
+                                           "gstudio_films_search"])
@@ -0,0 +1,61 @@
+import json
+from unittest import TestCase
+
+from ddt import ddt, data, unpack
+
+from gh_films.pkg.gstudio.json_stream import iter_json_array
+
+
+__all__ = ["TestIterJsonArray", ]
+
+
+_fx_arrays = (
+    [],
+    [1, 22, 333],
+    [1.5e3, -2.25e-7, True, None, "x,]"],
+    [{"id": "é\"]", "films": [1, {"url": None}]}, [[]], {}],
+    [{"name": "Тоторо" * 20} for _ in range(10)],
+)
+
+_fx_chunk_sizes = (1, 2, 7, 4096, )
+
+_fx_invalid = (
+    b"", b"[", b"[1,2", b"[1,]", b"[1 2]", b"[1.]", b"{}", b"[1]x",
+    b"[\xd0]",
+)
+
+
+def _split(raw: bytes, size: int) -> list:
+    return [raw[idx:idx + size] for idx in range(0, len(raw), size)]
+
+
+@ddt
+class TestIterJsonArray(TestCase):
+    @data(*_fx_arrays)
+    def test_items_should_be_parsed(self, array):
+        raw = json.dumps(array, ensure_ascii=False).encode("utf-8")
+
+        for size in _fx_chunk_sizes:
+            result = list(iter_json_array(_split(raw, size)))
+            self.assertListEqual(array, result)
+
+    @data(*_fx_arrays)
+    def test_text_chunks_should_be_parsed(self, array):
+        raw = f" \n{json.dumps(array)}\n "
+        self.assertListEqual(array, list(iter_json_array([raw[:3], raw[3:]])))
+
+    @data(*_fx_invalid)
+    def test_invalid_array_should_raise_error(self, raw):
+        for size in (1, 100):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(_split(raw, size)))
+
+    @unpack
+    @data((b'[{"a": 1}, {"a": 2}, {"a"', 2))
+    def test_items_should_be_yielded_before_the_end(self, raw, expected):
+        items = []
+        with self.assertRaises(ValueError):
+            for item in iter_json_array([raw]):
+                items.append(item)
+
+        self.assertEqual(expected, len(items))
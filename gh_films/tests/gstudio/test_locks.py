@@ -0,0 +1,78 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now as tz_now
+
+from gh_films.pkg.gstudio.locks import DatabaseLease, RedisLease, get_lease
+from gh_films.pkg.gstudio.models import Lease
+
+
+__all__ = ["TestDatabaseLease", "TestGetLease", ]
+
+
+class TestDatabaseLease(TestCase):
+    def setUp(self) -> None:
+        self._lease = DatabaseLease("sync", 60)
+
+    def test_free_lease_should_be_acquired(self):
+        self.assertTrue(self._lease.acquire())
+        self.assertTrue(self._lease.acquired)
+
+    def test_busy_lease_should_not_be_acquired(self):
+        self._lease.acquire()
+        self.assertFalse(DatabaseLease("sync", 60).acquire())
+
+    def test_leases_of_different_names_should_not_conflict(self):
+        self._lease.acquire()
+        self.assertTrue(DatabaseLease("other", 60).acquire())
+
+    def test_released_lease_should_be_acquired_again(self):
+        self._lease.acquire()
+        self.assertTrue(self._lease.release())
+        self.assertTrue(DatabaseLease("sync", 60).acquire())
+
+    def test_expired_lease_should_be_taken_over(self):
+        self._lease.acquire()
+        Lease.objects.update(expires=tz_now() - timedelta(seconds=1))
+        self.assertTrue(DatabaseLease("sync", 60).acquire())
+
+    def test_lease_taken_over_should_not_be_released_by_previous_owner(self):
+        self._lease.acquire()
+        Lease.objects.update(expires=tz_now() - timedelta(seconds=1))
+        other = DatabaseLease("sync", 60)
+        other.acquire()
+
+        self.assertFalse(self._lease.release())
+        self.assertFalse(DatabaseLease("sync", 60).acquire())
+
+    def test_busy_lease_should_be_awaited(self):
+        self._lease.acquire()
+        other = DatabaseLease("sync", 60)
+        other.poll_interval = 0.01
+
+        with patch.object(other, "_try_acquire",
+                          side_effect=[False, False, True]) as try_acquire:
+            self.assertTrue(other.acquire(wait=1))
+
+        self.assertEqual(3, try_acquire.call_count)
+
+    def test_waiting_should_be_limited(self):
+        self._lease.acquire()
+        other = DatabaseLease("sync", 60)
+        other.poll_interval = 0.01
+        self.assertFalse(other.acquire(wait=0.05))
+
+    def test_not_acquired_lease_should_not_be_released(self):
+        self.assertFalse(self._lease.release())
+
+
+class TestGetLease(TestCase):
+    @override_settings(GSTUDIO_SYNC_LOCK_URL="")
+    def test_db_lease_should_be_used_without_redis(self):
+        self.assertIsInstance(get_lease("sync"), DatabaseLease)
+
+    @override_settings(GSTUDIO_SYNC_LOCK_URL="redis://localhost:6379/0")
+    def test_redis_lease_should_be_used_with_redis(self):
+        # connection to Redis is established lazily
+        self.assertIsInstance(get_lease("sync"), RedisLease)
@@ -0,0 +1,112 @@
+import socket
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.metrics import SyncMetrics, StatsdSink, \
+    PrometheusSink, LoggingSink, emit, render_prometheus
+from gh_films.pkg.gstudio.models import Films
+
+
+__all__ = ["TestSyncMetrics", "TestStatsdSink", "TestPrometheusSink",
+           "TestEmit", ]
+
+
+_fx_metrics = {"timings": {"fetch": 0.25, "people": 1.5},
+               "counters": {"people_inserted": 3, "downloaded_bytes": 1024}}
+
+
+class TestSyncMetrics(TestCase):
+    def setUp(self) -> None:
+        self._metrics = SyncMetrics()
+
+    def test_duration_of_phase_should_be_measured(self):
+        with self._metrics.phase("fetch"):
+            pass
+        self.assertGreaterEqual(self._metrics.timings["fetch"], 0)
+
+    def test_queries_of_phase_should_be_counted(self):
+        with self._metrics.phase("db"):
+            list(Films.objects.all())
+            Films.objects.count()
+
+        self.assertEqual(2, self._metrics.counters["db_queries"])
+
+    def test_phase_should_be_measured_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self._metrics.phase("fetch"):
+                raise RuntimeError()
+
+        self.assertIn("fetch", self._metrics.timings)
+
+    def test_numeric_stats_should_be_added_as_counters(self):
+        self._metrics.add_stats("people", {"inserted": 2, "seconds": 0.1,
+                                           "chunks": [], "failed": False})
+        self._metrics.add_stats("people", {"inserted": 3})
+
+        self.assertDictEqual({"people_inserted": 5}, self._metrics.counters)
+
+
+class TestStatsdSink(TestCase):
+    def setUp(self) -> None:
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.settimeout(1)
+
+    def tearDown(self) -> None:
+        self._server.close()
+
+    def test_metrics_should_be_sent(self):
+        StatsdSink(self._server.getsockname(), "sync").emit(_fx_metrics)
+        lines = self._server.recv(4096).decode("utf-8").split("\n")
+
+        self.assertListEqual(["sync.fetch:250.000|ms",
+                              "sync.people:1500.000|ms",
+                              "sync.downloaded_bytes:1024|c",
+                              "sync.people_inserted:3|c"], lines)
+
+    def test_metrics_should_be_split_into_packets(self):
+        sink = StatsdSink(self._server.getsockname(), "sync")
+        sink.MAX_PACKET_SIZE = 30
+        sink.emit(_fx_metrics)
+
+        packets = [self._server.recv(4096) for _ in range(4)]
+        self.assertTrue(all(len(p) <= 30 for p in packets))
+
+
+class TestPrometheusSink(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+
+    def test_nothing_should_be_rendered_before_sync(self):
+        self.assertEqual("", render_prometheus())
+
+    def test_latest_metrics_should_be_rendered(self):
+        PrometheusSink().emit(_fx_metrics)
+        text = render_prometheus()
+
+        self.assertIn('gstudio_sync_phase_seconds{phase="fetch"} 0.25', text)
+        self.assertIn('gstudio_sync_count{name="people_inserted"} 3', text)
+
+    def test_metrics_should_be_exposed_by_url(self):
+        PrometheusSink().emit(_fx_metrics)
+        response = self.client.get("/movies/metrics/sync")
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b"gstudio_sync_finished_seconds", response.content)
+
+
+class TestEmit(TestCase):
+    @override_settings(GSTUDIO_METRICS_SINKS=[
+        "gh_films.pkg.gstudio.metrics.StatsdSink",
+        "gh_films.pkg.gstudio.metrics.LoggingSink"],
+        GSTUDIO_STATSD_ADDRESS=("256.0.0.1", 8125))
+    def test_failed_sink_should_not_break_others(self):
+        with patch.object(LoggingSink, "emit") as logging_emit, \
+                patch("gh_films.pkg.gstudio.metrics._logger",
+                      MagicMock()) as logger:
+            emit(_fx_metrics)
+
+        logging_emit.assert_called_once_with(_fx_metrics)
+        logger.warning.assert_called_once()
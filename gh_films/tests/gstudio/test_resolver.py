@@ -0,0 +1,61 @@
+from unittest import TestCase
+from uuid import UUID
+
+from ddt import ddt, data, unpack
+
+from gh_films.pkg.gstudio.resolver import UrlResolver
+
+
+__all__ = ["TestUrlResolver", ]
+
+
+_fx_id = "2baf70d1-42bb-4437-b551-e5fed5a87abe"
+
+
+@ddt
+class TestUrlResolver(TestCase):
+    @data(
+        (f"https://api/films/{_fx_id}", _fx_id),
+        (f"https://api/films/{_fx_id}?fields=id", _fx_id),
+        (f"https://api/films/{_fx_id}#top", _fx_id),
+        (f"/films/{_fx_id}", _fx_id),
+        ("https://api/films/", None),
+        ("", None),
+        (None, None),
+        (["unhashable"], None),
+    )
+    @unpack
+    def test_id_should_be_extracted(self, url, expected):
+        self.assertEqual(expected, UrlResolver()(url))
+
+    def test_equal_urls_should_give_same_object(self):
+        resolve = UrlResolver()
+        first = resolve("https://api/films/" + "1" * 3)
+        second = resolve("https://api/films/" + "".join(["1"] * 3))
+        self.assertIs(first, second)
+
+    def test_ids_should_be_converted(self):
+        resolve = UrlResolver(UUID)
+        self.assertEqual(UUID(_fx_id), resolve(f"https://api/films/{_fx_id}"))
+
+    def test_invalid_ids_should_not_be_converted(self):
+        self.assertIsNone(UrlResolver(UUID)("https://api/films/123"))
+
+    def test_urls_should_be_memoized(self):
+        calls = []
+        resolve = UrlResolver(lambda raw: calls.append(raw) or raw)
+        for _ in range(3):
+            resolve("https://api/films/1")
+
+        self.assertListEqual(["1"], calls)
+
+    def test_memo_should_be_limited(self):
+        resolve = UrlResolver(max_size=2)
+        for idx in range(5):
+            resolve(f"https://api/films/{idx}")
+
+        self.assertLessEqual(len(resolve._memo), 2)
+
+    def test_unresolved_urls_should_be_skipped(self):
+        self.assertListEqual(["1", "2"], UrlResolver().resolve_many(
+            ["https://api/films/1", "https://api/films/", "/films/2"]))
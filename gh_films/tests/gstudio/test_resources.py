@@ -0,0 +1,74 @@
+from unittest import TestCase
+from uuid import UUID
+
+from ddt import ddt, data, unpack
+
+from gh_films.pkg.gstudio.models import Species, Vehicles
+from gh_films.pkg.gstudio.resources import Reference, Resource, \
+    get_resource, get_resources
+
+
+__all__ = ["TestReference", "TestResource", "TestRegistry", ]
+
+
+_fx_film_id = "2baf70d1-42bb-4437-b551-e5fed5a87abe"
+_fx_person_id = "fe93adf2-2f3a-4ec4-9f68-5422f1b87c01"
+
+
+@ddt
+class TestReference(TestCase):
+    @data(
+        (None, set()),
+        ("", set()),
+        (f"https://api/films/{_fx_film_id}", {UUID(_fx_film_id)}),
+        ([f"https://api/films/{_fx_film_id}",
+          f"https://api/people/{_fx_person_id}"],
+         {UUID(_fx_film_id), UUID(_fx_person_id)}),
+        # the url of the whole collection doesn't refer to any record
+        (["https://api/people/"], set()),
+        ([None, 12], set()),
+    )
+    @unpack
+    def test_ids_should_be_extracted_from_urls(self, value, expected):
+        self.assertSetEqual(expected, Reference.get_ids(value))
+
+
+class TestResource(TestCase):
+    def setUp(self) -> None:
+        self._resource = Resource("vehicles", Vehicles,
+                                  mapping={"vehicle_class": "class"},
+                                  references=[Reference("pilot", "pilots")])
+
+    def test_fields_should_be_mapped(self):
+        records = list(self._resource.iter_records(
+            [{"id": "1", "class": "Airship"}], {}))
+        self.assertEqual("Airship", records[0]["vehicle_class"])
+
+    def test_references_should_be_collected(self):
+        links = {}
+        list(self._resource.iter_records(
+            [{"id": "1", "pilot": f"https://api/people/{_fx_person_id}"},
+             {"id": "2"}], links))
+
+        self.assertDictEqual(
+            {"pilots": {"1": {UUID(_fx_person_id)}, "2": set()}}, links)
+
+    def test_through_model_should_be_found(self):
+        through, own, ref = self._resource.get_through("pilots")
+
+        self.assertIs(Vehicles.pilots.through, through)
+        self.assertEqual("vehicles_id", own)
+        self.assertEqual("people_id", ref)
+
+
+class TestRegistry(TestCase):
+    def test_resources_should_be_registered(self):
+        self.assertListEqual(["locations", "species", "vehicles"],
+                             [r.endpoint for r in get_resources()])
+
+    def test_resource_should_be_found_by_endpoint(self):
+        self.assertIs(Species, get_resource("species").model)
+
+    def test_unknown_resource_should_not_be_found(self):
+        with self.assertRaises(KeyError):
+            get_resource("unknown")
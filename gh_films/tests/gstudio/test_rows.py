@@ -0,0 +1,64 @@
+from unittest import TestCase
+from uuid import UUID
+
+from ddt import ddt, data
+
+from gh_films.pkg.gstudio.models import Films, People, Gender
+from gh_films.pkg.gstudio.rows import RowBuilder, get_row_builder
+
+
+__all__ = ["TestRowBuilder", ]
+
+
+_fx_film = {
+    "id": "78d74675-c365-441e-9fb1-fe2f9188bde4", "title": "foo",
+    "description": "some long text here", "director": "first last",
+    "producer": "some name here", "release_date": "1999", "rt_score": "33",
+    "people": ["lorem", "ipsum"], "dolor": "sit",
+}
+
+_fx_person = {
+    "id": "9411138d-306b-48fe-8cc6-54b16d82f6a7", "name": "Ghost",
+    "gender": "NA", "age": 999, "eye_color": "", "hair_color": "gray",
+    "films": [],
+}
+
+
+@ddt
+class TestRowBuilder(TestCase):
+    def test_api_values_should_be_converted(self):
+        film = RowBuilder(Films)(_fx_film)
+
+        self.assertEqual(UUID(_fx_film["id"]), film.pk)
+        self.assertEqual(1999, film.release_date)
+        self.assertEqual(33, film.rt_score)
+        self.assertEqual(_fx_film["title"], film.title)
+
+    def test_custom_field_should_be_converted(self):
+        person = RowBuilder(People)(_fx_person)
+
+        self.assertEqual(str(Gender.UNKNOWN), person.gender)
+        self.assertEqual("999", person.age)
+
+    def test_default_should_be_used_for_missed_value(self):
+        self.assertEqual("", RowBuilder(Films)(_fx_film).checksum)
+
+    @data("release_date", "id", "title")
+    def test_record_without_required_field_should_be_rejected(self, field):
+        api_data = dict(_fx_film)
+        del api_data[field]
+        self.assertIsNone(RowBuilder(Films)(api_data))
+
+    @data(("rt_score", "high"), ("id", "not-an-uuid"))
+    def test_record_with_invalid_value_should_be_rejected(self, item):
+        api_data = dict(_fx_film, **dict([item]))
+        self.assertIsNone(RowBuilder(Films)(api_data))
+
+    def test_mapping_should_be_used(self):
+        api_data = dict(_fx_film, name=_fx_film["title"])
+        del api_data["title"]
+        film = RowBuilder(Films, mapping={"title": "name"})(api_data)
+        self.assertEqual(_fx_film["title"], film.title)
+
+    def test_builder_should_be_cached(self):
+        self.assertIs(get_row_builder(Films), get_row_builder(Films))
@@ -0,0 +1,57 @@
+import time
+
+from ddt import ddt, data, unpack
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio import schedule
+from gh_films.pkg.gstudio.dataset import get_cache
+
+
+__all__ = ["TestGetInterval", "TestDefaultInterval", "TestScheduleState", ]
+
+
+@ddt
+@override_settings(GSTUDIO_SYNC_INTERVAL=10, GSTUDIO_SYNC_MAX_INTERVAL=100,
+                   GSTUDIO_SYNC_BACKOFF_AFTER=3,
+                   GSTUDIO_SYNC_BACKOFF_FACTOR=2)
+class TestGetInterval(TestCase):
+    @data((0, 10), (2, 10), (3, 20), (4, 40), (5, 80), (6, 100),
+          (10 ** 6, 100))
+    @unpack
+    def test_interval_should_grow_after_unchanged_syncs(self, unchanged,
+                                                        expected):
+        self.assertEqual(expected, schedule.get_interval(unchanged))
+
+
+class TestDefaultInterval(TestCase):
+    def test_interval_should_keep_one_minute_gap(self):
+        self.assertLess(schedule.get_interval(10 ** 6), 60)
+
+
+@override_settings(GSTUDIO_SYNC_INTERVAL=10, GSTUDIO_SYNC_BACKOFF_AFTER=3)
+class TestScheduleState(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+
+    def test_state_should_be_empty_initially(self):
+        self.assertDictEqual({}, schedule.get_state())
+
+    def test_state_should_be_saved(self):
+        schedule.save_state("chain", 1)
+        state = schedule.get_state()
+
+        self.assertEqual("chain", state["chain"])
+        self.assertEqual(1, state["unchanged"])
+        self.assertEqual(10, state["interval"])
+
+    def test_empty_schedule_should_not_be_alive(self):
+        self.assertFalse(schedule.is_alive({}))
+
+    def test_scheduled_chain_should_be_alive(self):
+        self.assertTrue(schedule.is_alive(schedule.save_state("chain", 0)))
+
+    def test_overdue_chain_should_not_be_alive(self):
+        self.assertFalse(schedule.is_alive({"due": time.time() - 11}))
+
+    def test_new_chains_should_differ(self):
+        self.assertNotEqual(schedule.new_chain(), schedule.new_chain())
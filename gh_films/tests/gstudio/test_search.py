@@ -0,0 +1,54 @@
+from ddt import ddt, data, unpack
+from django.db import connection
+from django.test import TestCase
+
+from gh_films.pkg.gstudio.models import Films
+from gh_films.pkg.gstudio.search import get_search, get_terms, \
+    BasicSearch, SqliteSearch
+from gh_films.pkg.gstudio.tasks import update_search
+
+
+__all__ = ["TestGetTerms", "TestSearch", ]
+
+
+@ddt
+class TestGetTerms(TestCase):
+    @data(("spirited away", ["spirited", "away"]),
+          ('"Totoro" OR NEAR(a*', ["Totoro", "OR", "NEAR", "a"]),
+          ("", []), (None, []), ("*-:", []))
+    @unpack
+    def test_query_should_be_split_into_words(self, query, expected):
+        self.assertListEqual(expected, get_terms(query))
+
+
+@ddt
+class TestSearch(TestCase):
+    def setUp(self) -> None:
+        Films.objects.create(
+            id="78d74675-c365-441e-9fb1-fe2f9188bde4",
+            title="My Neighbor Totoro", description="Two sisters move to "
+            "the country", director="Hayao Miyazaki", producer="Toru Hara",
+            release_date=1988, rt_score=93, checksum="a")
+        Films.objects.create(
+            id="9411138d-306b-48fe-8cc6-54316d82f6a7",
+            title="Spirited Away", description="A girl wanders into the "
+            "world of spirits", director="Hayao Miyazaki",
+            producer="Toshio Suzuki", release_date=2001, rt_score=97,
+            checksum="b")
+        update_search()
+
+    def test_fts_should_be_used_by_sqlite(self):
+        if connection.vendor == "sqlite":
+            self.assertIsInstance(get_search(), SqliteSearch)
+
+    @data((get_search, ), (BasicSearch, ))
+    @unpack
+    def test_films_should_be_found(self, get_backend):
+        for terms, expected in ((["totoro"], ["My Neighbor Totoro"]),
+                                (["spirit"], ["Spirited Away"]),
+                                (["sisters", "country"],
+                                 ["My Neighbor Totoro"]),
+                                (["sisters", "spirits"], []),
+                                (["a"], ["Spirited Away"])):
+            found = get_backend().filter(Films.objects.all(), terms)
+            self.assertListEqual(expected, [f.title for f in found], terms)
@@ -0,0 +1,223 @@
+import gzip
+import json
+import os
+import shutil
+import stat
+import tempfile
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio import compression, snapshot
+from gh_films.pkg.gstudio.dataset import get_cache, bump_version
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.snapshot import publish, unpublish, get_file
+from gh_films.pkg.gstudio.tasks import update_summary
+from gh_films.pkg.gstudio.views import FilmsView
+
+
+__all__ = ["TestPublish", "TestSnapshotViews", ]
+
+
+_fx_urls = {
+    "/movies/": "movies/index.html",
+    "/movies/api/films/export": "movies/api/films/export/index.json",
+    "/movies/api/people/export": "movies/api/people/export/index.json",
+}
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self._dir = tempfile.mkdtemp()
+        self._settings = override_settings(GSTUDIO_SNAPSHOT_DIR=self._dir)
+        self._settings.enable()
+
+        film = Films.objects.create(
+            id="78d74675-c365-441e-9fb1-fe2f9188bde4", title="Totoro",
+            description="...", director="Hayao Miyazaki",
+            producer="Toru Hara", release_date=1988, rt_score=93)
+        person = People.objects.create(
+            id="986faac6-67e3-4fb8-a9ee-bad077c2e7fe", name="Satsuki",
+            gender="Female", age="11", eye_color="Dark Brown",
+            hair_color="Dark Brown")
+        film.people.add(person)
+        update_summary()
+
+    def tearDown(self) -> None:
+        self._settings.disable()
+        shutil.rmtree(self._dir)
+
+    def _read(self, path: str) -> bytes:
+        with open(os.path.join(self._dir, path), "rb") as fp:
+            return fp.read()
+
+
+class TestPublish(SnapshotTestCase):
+    def test_pages_should_be_written_with_variants(self):
+        stats = publish()
+
+        self.assertEqual(3, stats["pages"])
+        self.assertEqual(3 * (1 + len(snapshot.get_encodings())),
+                         stats["files"])
+        for path in _fx_urls.values():
+            self.assertEqual(self._read(path),
+                             gzip.decompress(self._read(path + ".gz")))
+
+    @skipIf(compression.brotli is None, "brotli isn't installed")
+    def test_brotli_variant_should_be_written(self):
+        publish()
+
+        path = _fx_urls["/movies/"]
+        self.assertEqual(self._read(path), compression.brotli.decompress(
+            self._read(path + ".br")))
+
+    def test_stale_variants_should_be_removed(self):
+        path = os.path.join(self._dir, _fx_urls["/movies/"])
+        os.makedirs(os.path.dirname(path))
+        with open(path + ".br", "wb") as fp:
+            fp.write(b"stale")
+
+        with patch.object(compression, "brotli", None):
+            publish()
+
+        self.assertFalse(os.path.exists(path + ".br"))
+
+    def test_files_should_be_readable_by_others(self):
+        publish()
+
+        mode = os.stat(os.path.join(self._dir, _fx_urls["/movies/"])).st_mode
+        self.assertEqual(0o644, stat.S_IMODE(mode))
+
+    def test_manifest_should_describe_pages(self):
+        publish()
+
+        manifest = json.loads(self._read(snapshot.MANIFEST_NAME))
+        self.assertDictEqual(_fx_urls, {url: page["path"] for url, page in
+                                        manifest["pages"].items()})
+        self.assertEqual("application/json", manifest["pages"][
+            "/movies/api/films/export"]["content_type"])
+
+    def test_current_snapshot_should_not_be_published_again(self):
+        publish()
+
+        self.assertEqual(0, publish()["pages"])
+        self.assertEqual(3, publish(force=True)["pages"])
+
+    def test_snapshot_should_be_published_after_dataset_changed(self):
+        publish()
+        bump_version()
+
+        self.assertEqual(3, publish()["pages"])
+
+    def test_failed_publication_should_keep_previous_files(self):
+        publish()
+        expected = self._read(_fx_urls["/movies/"])
+        Films.objects.update(title="My Neighbor Totoro")
+        update_summary()
+
+        def _iter_broken(view):
+            yield "<html>"
+            raise OSError("No space left on device")
+
+        with patch.object(FilmsView, "iter_snapshot", _iter_broken):
+            with self.assertRaises(OSError):
+                publish(force=True)
+
+        self.assertEqual(expected, self._read(_fx_urls["/movies/"]))
+        for root, _, files in os.walk(self._dir):
+            self.assertListEqual([], [f for f in files
+                                      if f.endswith(".tmp")])
+
+    def test_snapshot_should_be_removed(self):
+        publish()
+        unpublish()
+
+        self.assertListEqual([], [files for _, _, files in os.walk(self._dir)
+                                  if files])
+
+    def test_nothing_should_be_published_without_directory(self):
+        with override_settings(GSTUDIO_SNAPSHOT_DIR=""):
+            self.assertEqual(0, publish()["pages"])
+
+        self.assertListEqual([], os.listdir(self._dir))
+
+
+class TestSnapshotViews(SnapshotTestCase):
+    def test_snapshot_should_be_same_as_live_page(self):
+        for url in _fx_urls:
+            expected = self.client.get(url)
+            get_cache().clear()
+            publish(force=True)
+
+            response = self.client.get(url)
+            self.assertEqual(expected.getvalue(), response.getvalue())
+            self.assertEqual(expected["Content-Type"],
+                             response["Content-Type"])
+
+    def test_current_snapshot_should_be_served_without_queries(self):
+        publish()
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/movies/")
+
+        self.assertTrue(response.streaming)
+        self.assertIn(b"Totoro", response.getvalue())
+
+    def test_precompressed_variant_should_be_served(self):
+        publish()
+
+        response = self.client.get("/movies/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", response["Vary"])
+        self.assertEqual(self._read(_fx_urls["/movies/"]),
+                         gzip.decompress(response.getvalue()))
+
+    def test_conditional_requests_should_be_answered_before_snapshot(self):
+        publish()
+        etag = self.client.get("/movies/")["ETag"]
+
+        response = self.client.get("/movies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+    def test_stale_snapshot_should_not_be_served(self):
+        publish()
+        Films.objects.update(title="My Neighbor Totoro")
+        update_summary()
+        bump_version()
+
+        response = self.client.get("/movies/")
+        self.assertTemplateUsed(response, "films.html")
+        self.assertIn(b"My Neighbor Totoro", response.content)
+
+    def test_snapshot_of_another_release_should_not_be_served(self):
+        publish()
+
+        with patch.object(snapshot, "VERSION", "0.0.0"):
+            self.assertIsNone(get_file("/movies/", 0))
+            response = self.client.get("/movies/")
+
+        self.assertTemplateUsed(response, "films.html")
+
+    def test_missing_snapshot_should_not_be_served(self):
+        publish()
+        os.remove(os.path.join(self._dir, _fx_urls["/movies/"]))
+
+        response = self.client.get("/movies/")
+        self.assertTemplateUsed(response, "films.html")
+
+    def test_filtered_page_should_be_rendered(self):
+        publish()
+
+        response = self.client.get("/movies/?director=Isao")
+        self.assertTemplateUsed(response, "films.html")
+        self.assertNotIn(b"Totoro", response.content)
+
+    def test_filtered_export_should_be_streamed_from_db(self):
+        publish()
+
+        response = self.client.get("/movies/api/films/export?fields=title")
+        self.assertListEqual([{"id": "78d74675-c365-441e-9fb1-fe2f9188bde4",
+                               "title": "Totoro"}],
+                             json.loads(response.getvalue()))
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from gh_films.pkg.gstudio.stub import generate_dataset, mutate_dataset
+
+
+__all__ = ["TestMutateDataset", ]
+
+
+class TestMutateDataset(TestCase):
+    def setUp(self) -> None:
+        self._films, self._people = generate_dataset(20, 100)
+
+    @staticmethod
+    def _count_changed(original, changed) -> int:
+        return sum(a != b for a, b in zip(original, changed))
+
+    def test_share_of_entries_should_be_changed(self):
+        films, people = mutate_dataset(self._films, self._people, 0.1)
+
+        self.assertEqual(2, self._count_changed(self._films, films))
+        self.assertEqual(10, self._count_changed(self._people, people))
+
+    def test_relations_should_be_changed(self):
+        _, people = mutate_dataset(self._films, self._people, 0.1)
+        changed = sum(a["films"] != b["films"]
+                      for a, b in zip(self._people, people))
+        self.assertGreater(changed, 0)
+
+    def test_given_data_should_be_kept(self):
+        films, people = generate_dataset(20, 100)
+        mutate_dataset(self._films, self._people, 0.5)
+
+        self.assertListEqual(films, self._films)
+        self.assertListEqual(people, self._people)
+
+    def test_ids_should_be_kept(self):
+        films, people = mutate_dataset(self._films, self._people, 1)
+        self.assertListEqual([f["id"] for f in self._films],
+                             [f["id"] for f in films])
+        self.assertListEqual([p["id"] for p in self._people],
+                             [p["id"] for p in people])
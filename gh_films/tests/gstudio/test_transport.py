@@ -0,0 +1,51 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ddt import ddt, data, unpack
+
+from gh_films.pkg.gstudio.transport import JitteredRetry, create_session, \
+    get_session
+
+
+__all__ = ["TestJitteredRetry", "TestSession", ]
+
+
+@ddt
+class TestJitteredRetry(TestCase):
+    @staticmethod
+    def _get_retry(errors: int) -> JitteredRetry:
+        history = tuple(MagicMock(redirect_location=None)
+                        for _ in range(errors))
+        return JitteredRetry(total=10, backoff_factor=1, history=history)
+
+    def test_first_attempt_should_not_be_delayed(self):
+        self.assertEqual(0, self._get_retry(0).get_backoff_time())
+
+    @data((1, 0.5, 1), (2, 1, 2), (3, 2, 4))
+    @unpack
+    def test_delay_should_grow_with_jitter(self, errors, low, high):
+        delays = {self._get_retry(errors).get_backoff_time()
+                  for _ in range(20)}
+
+        self.assertTrue(all(low <= d <= high for d in delays))
+        self.assertGreater(len(delays), 1)
+
+    def test_delay_should_be_limited(self):
+        self.assertLessEqual(self._get_retry(100).get_backoff_time(),
+                             JitteredRetry.BACKOFF_MAX)
+
+
+class TestSession(TestCase):
+    def test_retries_should_be_configured(self):
+        session = create_session(retries=5, backoff=0.1, pool_size=4)
+        adapter = session.get_adapter("https://example.com")
+
+        self.assertIsInstance(adapter.max_retries, JitteredRetry)
+        self.assertEqual(5, adapter.max_retries.total)
+        self.assertEqual(4, adapter._pool_maxsize)
+
+    def test_session_should_be_shared(self):
+        self.assertIs(get_session(), get_session())
+
+    def test_sessions_of_different_config_should_differ(self):
+        self.assertIsNot(get_session(retries=1), get_session(retries=2))
@@ -1,18 +1,186 @@
+from hashlib import sha1
 from unittest.mock import patch
 
+from uuid import UUID
+
+from ddt import ddt, data, unpack
 from django.test import TestCase
 
+from gh_films.pkg.gstudio.dataset import get_cache, get_version, \
+    bump_version
+from gh_films.pkg.gstudio.models import Films, People
+from gh_films.pkg.gstudio.tasks import update_summary, update_search
+from gh_films.pkg.gstudio.views import FilmsView
+
 
-__all__ = ["TestFilmsView", ]
+__all__ = ["TestFilmsView", "TestFilmsViewCache",
+           "TestFilmsViewConditional", "TestFilmsViewQueries",
+           "TestFilmsViewFilters", ]
 
 
 class TestFilmsView(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+
     def test_films_template_should_be_used(self):
         response = self.client.get("/movies/")
         self.assertTemplateUsed(response, "films.html")
 
-    def test_films_model_should_be_used(self):
-        with patch("gh_films.pkg.gstudio.views.Films") as films:
+    def test_films_summary_model_should_be_used(self):
+        with patch("gh_films.pkg.gstudio.views.FilmsSummary") as summary:
             self.client.get("/movies/")
 
-            films.objects.prefetch_related.assert_called_once()
+            summary.objects.values.assert_called_once()
+
+
+class TestFilmsViewCache(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        Films.objects.create(
+            id="78d74675-c365-441e-9fb1-fe2f9188bde4", title="Totoro",
+            description="...", director="Hayao Miyazaki",
+            producer="Toru Hara", release_date=1988, rt_score=93)
+        update_summary()
+
+    def test_cached_page_should_be_served_without_queries(self):
+        expected = self.client.get("/movies/").content
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/movies/")
+
+        self.assertEqual(expected, response.content)
+
+    def test_page_should_be_rendered_after_dataset_changed(self):
+        self.client.get("/movies/")
+        Films.objects.update(title="My Neighbor Totoro")
+        update_summary()
+        bump_version()
+
+        response = self.client.get("/movies/")
+        self.assertTemplateUsed(response, "films.html")
+        self.assertIn(b"My Neighbor Totoro", response.content)
+
+    def test_page_should_not_be_rendered_until_dataset_changed(self):
+        self.client.get("/movies/")
+        Films.objects.update(title="My Neighbor Totoro")
+        update_summary()
+
+        response = self.client.get("/movies/")
+        self.assertNotIn(b"My Neighbor Totoro", response.content)
+
+
+class TestFilmsViewConditional(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self._response = self.client.get("/movies/")
+
+    def test_validators_should_be_sent(self):
+        self.assertTrue(self._response.has_header("ETag"))
+        self.assertTrue(self._response.has_header("Last-Modified"))
+
+    def test_not_modified_should_be_answered_without_queries(self):
+        # the page isn't cached to make sure it's not rendered either
+        key = f"gstudio.page:{sha1(b'/movies/').hexdigest()}"
+        get_cache().delete(key, version=get_version())
+
+        with self.assertNumQueries(0):
+            with patch.object(FilmsView, "get_context_data") as context:
+                response = self.client.get(
+                    "/movies/",
+                    HTTP_IF_NONE_MATCH=self._response["ETag"])
+
+        self.assertEqual(304, response.status_code)
+        context.assert_not_called()
+
+    def test_not_modified_since_should_be_answered_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/movies/",
+                HTTP_IF_MODIFIED_SINCE=self._response["Last-Modified"])
+
+        self.assertEqual(304, response.status_code)
+
+    def test_page_should_be_sent_after_dataset_changed(self):
+        bump_version()
+        response = self.client.get(
+            "/movies/", HTTP_IF_NONE_MATCH=self._response["ETag"])
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(self._response["ETag"], response["ETag"])
+
+
+@ddt
+class TestFilmsViewQueries(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+
+    @staticmethod
+    def _create_dataset(size: int) -> None:
+        films = [Films(id=UUID(int=idx), title=f"film #{idx}", description="",
+                       director="", producer="", release_date=1999,
+                       rt_score=50) for idx in range(size)]
+        people = [People(id=UUID(int=idx), name=f"person #{idx}",
+                         gender="Female", eye_color="", hair_color="")
+                  for idx in range(size)]
+        through = Films.people.through
+        relations = [through(films_id=films[idx].id,
+                             people_id=people[(idx + shift) % size].id)
+                     for idx in range(size) for shift in (0, 1)]
+
+        Films.objects.bulk_create(films)
+        People.objects.bulk_create(people)
+        through.objects.bulk_create(relations)
+        update_summary()
+
+    @data(10, 1000, 10000)
+    def test_number_of_queries_should_not_depend_on_films(self, size):
+        self._create_dataset(size)
+
+        # films with names of their people are read from the summary
+        with self.assertNumQueries(1):
+            response = self.client.get("/movies/")
+
+        self.assertContains(response, f"film #{size - 1}")
+        self.assertContains(response, f"person #{size - 1}")
+
+
+@ddt
+class TestFilmsViewFilters(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        Films.objects.create(
+            id="78d74675-c365-441e-9fb1-fe2f9188bde4", title="Totoro",
+            description="Sisters and a forest spirit",
+            director="Hayao Miyazaki", producer="Toru Hara",
+            release_date=1988, rt_score=93)
+        Films.objects.create(
+            id="12cfb892-aac0-4c5b-94af-521852e46d6a",
+            title="Grave of the Fireflies", description="Orphans of the war",
+            director="Isao Takahata", producer="Toru Hara",
+            release_date=1988, rt_score=97)
+        update_summary()
+        update_search()
+
+    @data(("director=Isao+Takahata", [b"Grave of the Fireflies"]),
+          ("rt_score_max=95", [b"Totoro"]),
+          ("q=forest&producer=Toru+Hara", [b"Totoro"]),
+          ("release_date_min=1989", []),
+          ("q=", [b"Grave of the Fireflies", b"Totoro"]))
+    @unpack
+    def test_films_should_be_filtered(self, params, expected):
+        response = self.client.get(f"/movies/?{params}")
+
+        self.assertEqual(200, response.status_code)
+        found = [title for title in (b"Totoro", b"Grave of the Fireflies")
+                 if b"<td>" + title + b"</td>" in response.content]
+        self.assertListEqual(sorted(expected), sorted(found))
+
+    def test_filtered_page_should_be_rendered_by_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get("/movies/?q=forest&rt_score_min=90")
+
+    @data("rt_score_min=high", "rt_score_min=99999999999999999999",
+          "release_date_max=-1", "rt_score_max=32768")
+    def test_invalid_filters_should_be_rejected(self, params):
+        response = self.client.get(f"/movies/?{params}")
+        self.assertEqual(400, response.status_code)
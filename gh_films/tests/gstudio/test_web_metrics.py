@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from ddt import ddt, data, unpack
+from django.test import TestCase, override_settings
+
+from gh_films.pkg.gstudio.dataset import get_cache
+from gh_films.pkg.gstudio.web_metrics import Recorder, get_recorder, \
+    merge, render_web_metrics, format_labels
+
+
+__all__ = ["TestRecorder", "TestMerge", "TestRender",
+           "TestMetricsMiddleware", ]
+
+
+_fx_view = format_labels([("view", "films")])
+
+
+@ddt
+class TestRecorder(TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self._dir)
+
+    def test_counter_should_be_incremented(self):
+        recorder = Recorder()
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 1)])
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 2)])
+
+        self.assertDictEqual({"gstudio_http_requests_total": {"a": 3}},
+                             recorder.snapshot())
+
+    @data((0.004, 0), (0.005, 0), (0.006, 1), (10.0, 10), (11.0, 11))
+    @unpack
+    def test_observation_should_be_counted_by_bucket(self, value, bucket):
+        recorder = Recorder()
+        recorder.record(observations=[
+            ("gstudio_http_request_duration_seconds", _fx_view, value)])
+
+        counts = recorder.snapshot()[
+            "gstudio_http_request_duration_seconds"][_fx_view]
+        self.assertEqual(1, counts[bucket])
+        self.assertEqual(1, sum(counts[:-1]))
+        self.assertEqual(value, counts[-1])
+
+    def test_metrics_should_be_flushed_into_file_of_process(self):
+        recorder = Recorder(self._dir, flush_interval=0)
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 1)])
+
+        self.assertTrue(os.path.exists(
+            os.path.join(self._dir, f"web-{os.getpid()}.json")))
+
+    def test_flushes_should_be_throttled(self):
+        recorder = Recorder(self._dir, flush_interval=60)
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 1)])
+
+        self.assertFalse(os.path.exists(recorder.path))
+
+    def test_values_of_dead_process_should_be_continued(self):
+        recorder = Recorder(self._dir, flush_interval=0)
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 1)])
+
+        recorder = Recorder(self._dir, flush_interval=0)
+        recorder.record(increments=[("gstudio_http_requests_total", "a", 1)])
+
+        self.assertDictEqual({"gstudio_http_requests_total": {"a": 2}},
+                             recorder.snapshot())
+
+
+class TestMerge(TestCase):
+    def test_values_of_processes_should_be_summed(self):
+        result = merge([
+            {"gstudio_http_requests_total": {"a": 1},
+             "gstudio_http_db_queries": {"a": [1, 0, 2]}},
+            {"gstudio_http_requests_total": {"a": 2, "b": 1},
+             "gstudio_http_db_queries": {"a": [0, 1, 3]}},
+        ])
+
+        self.assertDictEqual({
+            "gstudio_http_requests_total": {"a": 3, "b": 1},
+            "gstudio_http_db_queries": {"a": [1, 1, 5]},
+        }, result)
+
+    def test_unknown_metrics_should_be_skipped(self):
+        self.assertDictEqual({}, merge([{"removed": {"a": 1}}]))
+
+
+@override_settings(GSTUDIO_WEB_METRICS_DIR="")
+class TestRender(TestCase):
+    def test_histogram_should_be_cumulative(self):
+        with patch("gh_films.pkg.gstudio.web_metrics.collect",
+                   return_value={"gstudio_http_db_queries": {
+                       _fx_view: [1, 2, 0, 0, 0, 0, 0, 0, 1, 102]}}):
+            lines = render_web_metrics().splitlines()
+
+        self.assertIn("# TYPE gstudio_http_db_queries histogram", lines)
+        self.assertIn('gstudio_http_db_queries_bucket{view="films",le="0"} 1',
+                      lines)
+        self.assertIn('gstudio_http_db_queries_bucket{view="films",le="1"} 3',
+                      lines)
+        self.assertIn(
+            'gstudio_http_db_queries_bucket{view="films",le="+Inf"} 4', lines)
+        self.assertIn('gstudio_http_db_queries_sum{view="films"} 102', lines)
+        self.assertIn('gstudio_http_db_queries_count{view="films"} 4', lines)
+
+    def test_labels_should_be_escaped(self):
+        self.assertEqual('view="a\\"b\\\\c\\n"',
+                         format_labels([("view", "a\"b\\c\n")]))
+
+
+class TestMetricsMiddleware(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self._dir = tempfile.mkdtemp()
+        self._settings = override_settings(GSTUDIO_WEB_METRICS_DIR=self._dir)
+        self._settings.enable()
+
+    def tearDown(self) -> None:
+        # nothing is left to dump at exit into the removed directory
+        get_recorder().flush()
+        self._settings.disable()
+        shutil.rmtree(self._dir)
+
+    def test_requests_should_be_counted_per_url_name(self):
+        self.client.get("/movies/")
+        self.client.get("/movies/")
+        self.client.get("/unknown")
+
+        text = self.client.get("/metrics").content.decode("utf-8")
+        self.assertIn('gstudio_http_requests_total{view="films",'
+                      'method="GET",status="200"} 2', text)
+        self.assertIn('gstudio_http_requests_total{view="<unresolved>",'
+                      'method="GET",status="404"} 1', text)
+        self.assertIn('gstudio_http_request_duration_seconds_count'
+                      '{view="films"} 2', text)
+
+    def test_page_cache_should_be_measured(self):
+        self.client.get("/movies/")
+        self.client.get("/movies/")
+
+        values = get_recorder().snapshot()["gstudio_http_page_cache_total"]
+        self.assertDictEqual({'view="films",result="miss"': 1,
+                              'view="films",result="hit"': 1}, values)
+
+    def test_template_rendering_should_be_measured_on_miss_only(self):
+        self.client.get("/movies/")
+        self.client.get("/movies/")
+
+        counts = get_recorder().snapshot()[
+            "gstudio_http_template_render_seconds"][_fx_view]
+        self.assertEqual(1, sum(counts[:-1]))
+
+    def test_queries_should_be_measured(self):
+        self.client.get("/movies/")
+
+        counts = get_recorder().snapshot()[
+            "gstudio_http_db_queries"][_fx_view]
+        self.assertEqual(0, counts[0])
+        self.assertEqual(1, sum(counts[:-1]))
+        self.assertGreater(counts[-1], 0)
+
+    def test_files_of_other_processes_should_be_summed(self):
+        self.client.get("/movies/")
+        other = Recorder(self._dir, flush_interval=0)
+        other._path = os.path.join(self._dir, "web-0.json")
+        other.record(increments=[
+            ("gstudio_http_requests_total",
+             'view="films",method="GET",status="200"', 5)])
+
+        text = self.client.get("/metrics").content.decode("utf-8")
+        self.assertIn('gstudio_http_requests_total{view="films",'
+                      'method="GET",status="200"} 6', text)
@@ -15,7 +15,10 @@ Including another URLconf
 """
 from django.urls import path, include
 
+from gh_films.pkg.gstudio.views import MetricsView
+
 
 urlpatterns = [
+    path('metrics', MetricsView.as_view(), name="metrics"),
     path('movies/', include("gh_films.pkg.gstudio.urls")),
 ]